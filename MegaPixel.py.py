@@ -1,428 +1,596 @@
-import pygame
-import random
-import sys
-import math
-
-# 初始化 Pygame
-pygame.init()
-pygame.mixer.init()
-
-# 游戏常量
-SCREEN_WIDTH = 800
-SCREEN_HEIGHT = 600
-TILE_SIZE = 32
-FPS = 60
-
-# 颜色定义
-BLACK = (0, 0, 0)
-WHITE = (255, 255, 255)
-RED = (255, 0, 0)
-GREEN = (0, 255, 0)
-BLUE = (0, 120, 255)
-BROWN = (139, 69, 19)
-YELLOW = (255, 255, 0)
-PURPLE = (128, 0, 128)
-
-# 创建游戏窗口
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("MegaPixel - 版权所有 © 2025 赵瀚")
-clock = pygame.time.Clock()
-
-# 创建字体
-title_font = pygame.font.SysFont(None, 48)
-ui_font = pygame.font.SysFont(None, 28)
-small_font = pygame.font.SysFont(None, 20)
-
-# 玩家类
-class Player(pygame.sprite.Sprite):
-    def __init__(self, x, y):
-        super().__init__()
-        self.image = pygame.Surface((TILE_SIZE, TILE_SIZE * 2), pygame.SRCALPHA)
-        # 身体 - 蓝色
-        pygame.draw.rect(self.image, BLUE, (0, TILE_SIZE//2, TILE_SIZE, TILE_SIZE))
-        # 头部 - 肤色
-        pygame.draw.rect(self.image, (255, 220, 177), (TILE_SIZE//4, 0, TILE_SIZE//2, TILE_SIZE//2))
-        # 眼睛 - 黑色
-        pygame.draw.rect(self.image, BLACK, (TILE_SIZE//3, TILE_SIZE//6, 3, 3))
-        pygame.draw.rect(self.image, BLACK, (2*TILE_SIZE//3, TILE_SIZE//6, 3, 3))
-        
-        self.rect = self.image.get_rect()
-        self.rect.x = x
-        self.rect.y = y
-        self.speed = 5
-        self.health = 100
-        self.coins = 0
-        self.direction = 1
-        self.jumping = False
-        self.jump_velocity = 0
-        self.gravity = 0.5
-        self.invincible = 0
-        self.on_ground = False
-        
-    def update(self, platforms, enemies, coins, megapixels):
-        if self.invincible > 0:
-            self.invincible -= 1
-            
-        old_x = self.rect.x
-        old_y = self.rect.y
-        
-        keys = pygame.key.get_pressed()
-        if keys[pygame.K_LEFT] or keys[pygame.K_a]:
-            self.rect.x -= self.speed
-            self.direction = -1
-        if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
-            self.rect.x += self.speed
-            self.direction = 1
-            
-        if (keys[pygame.K_UP] or keys[pygame.K_w] or keys[pygame.K_SPACE]) and self.on_ground and not self.jumping:
-            self.jumping = True
-            self.jump_velocity = -12
-            self.on_ground = False
-            
-        if self.jumping:
-            self.rect.y += self.jump_velocity
-            self.jump_velocity += self.gravity
-            
-            self.on_ground = False
-            for platform in platforms:
-                if (self.rect.bottom >= platform.rect.top and 
-                    self.rect.top < platform.rect.top and
-                    self.rect.right > platform.rect.left and 
-                    self.rect.left < platform.rect.right and
-                    self.jump_velocity > 0):
-                    self.rect.bottom = platform.rect.top
-                    self.jumping = False
-                    self.jump_velocity = 0
-                    self.on_ground = True
-                    break
-            
-            if self.rect.bottom >= SCREEN_HEIGHT - 40 and self.jump_velocity > 0:
-                self.rect.bottom = SCREEN_HEIGHT - 40
-                self.jumping = False
-                self.jump_velocity = 0
-                self.on_ground = True
-        else:
-            self.on_ground = False
-            for platform in platforms:
-                if (self.rect.bottom == platform.rect.top and 
-                    self.rect.right > platform.rect.left and 
-                    self.rect.left < platform.rect.right):
-                    self.on_ground = True
-                    break
-                    
-            if not self.on_ground:
-                self.rect.y += 5
-        
-        if self.rect.left < 0:
-            self.rect.left = 0
-        if self.rect.right > SCREEN_WIDTH:
-            self.rect.right = SCREEN_WIDTH
-        if self.rect.top < 0:
-            self.rect.top = 0
-        if self.rect.bottom > SCREEN_HEIGHT:
-            self.rect.bottom = SCREEN_HEIGHT
-            if not self.jumping:
-                self.health -= 5
-            
-        for platform in platforms:
-            if self.rect.colliderect(platform.rect):
-                if old_x + self.rect.width <= platform.rect.left and self.rect.right >= platform.rect.left:
-                    self.rect.right = platform.rect.left
-                elif old_x >= platform.rect.right and self.rect.left <= platform.rect.right:
-                    self.rect.left = platform.rect.right
-                    
-        if self.invincible <= 0:
-            for enemy in enemies:
-                if self.rect.colliderect(enemy.rect):
-                    if old_y + self.rect.height <= enemy.rect.top and self.rect.bottom >= enemy.rect.top:
-                        enemy.kill()
-                        self.rect.bottom = enemy.rect.top
-                        self.jumping = False
-                        self.jump_velocity = 0
-                        self.coins += 5
-                    else:
-                        self.health -= 10
-                        self.invincible = 30
-                        if self.rect.x < enemy.rect.x:
-                            self.rect.x -= 30
-                        else:
-                            self.rect.x += 30
-                        
-        for coin in coins:
-            if self.rect.colliderect(coin.rect):
-                coin.kill()
-                self.coins += 1
-                
-        for megapixel in megapixels:
-            if self.rect.colliderect(megapixel.rect):
-                megapixel.kill()
-                self.coins += 10
-                self.health = min(100, self.health + 30)
-                
-        if self.health <= 0:
-            self.health = 0
-
-    def draw_health_bar(self, surface):
-        bar_width = 100
-        bar_height = 10
-        fill_width = int((self.health / 100) * bar_width)
-        
-        pygame.draw.rect(surface, RED, (self.rect.x, self.rect.y - 15, bar_width, bar_height))
-        pygame.draw.rect(surface, GREEN, (self.rect.x, self.rect.y - 15, fill_width, bar_height))
-        pygame.draw.rect(surface, WHITE, (self.rect.x, self.rect.y - 15, bar_width, bar_height), 1)
-
-# 平台类
-class Platform(pygame.sprite.Sprite):
-    def __init__(self, x, y, width, height):
-        super().__init__()
-        self.image = pygame.Surface((width, height))
-        for i in range(0, width, 4):
-            for j in range(0, height, 4):
-                color_variation = random.randint(-10, 10)
-                color = (
-                    max(0, min(255, BROWN[0] + color_variation)),
-                    max(0, min(255, BROWN[1] + color_variation)),
-                    max(0, min(255, BROWN[2] + color_variation))
-                )
-                pygame.draw.rect(self.image, color, (i, j, 3, 3))
-                
-        self.rect = self.image.get_rect()
-        self.rect.x = x
-        self.rect.y = y
-
-# 敌人类
-class Enemy(pygame.sprite.Sprite):
-    def __init__(self, x, y):
-        super().__init__()
-        self.image = pygame.Surface((TILE_SIZE, TILE_SIZE), pygame.SRCALPHA)
-        pygame.draw.rect(self.image, RED, (0, 0, TILE_SIZE, TILE_SIZE))
-        pygame.draw.rect(self.image, WHITE, (TILE_SIZE//4, TILE_SIZE//4, 4, 4))
-        pygame.draw.rect(self.image, WHITE, (3*TILE_SIZE//4, TILE_SIZE//4, 4, 4))
-        pygame.draw.rect(self.image, BLACK, (TILE_SIZE//4, 3*TILE_SIZE//4, TILE_SIZE//2, 3))
-        
-        self.rect = self.image.get_rect()
-        self.rect.x = x
-        self.rect.y = y
-        self.speed = random.randint(1, 3)
-        self.direction = 1
-        
-    def update(self, platforms):
-        self.rect.x += self.speed * self.direction
-        
-        on_platform = False
-        for platform in platforms:
-            if (self.rect.bottom == platform.rect.top and 
-                self.rect.right > platform.rect.left and 
-                self.rect.left < platform.rect.right):
-                on_platform = True
-                if (self.direction > 0 and self.rect.right >= platform.rect.right) or \
-                   (self.direction < 0 and self.rect.left <= platform.rect.left):
-                    self.direction *= -1
-                break
-                
-        if not on_platform:
-            self.direction *= -1
-            
-        if self.rect.left < 0:
-            self.direction = 1
-        if self.rect.right > SCREEN_WIDTH:
-            self.direction = -1
-
-# 金币类
-class Coin(pygame.sprite.Sprite):
-    def __init__(self, x, y):
-        super().__init__()
-        self.image = pygame.Surface((TILE_SIZE//2, TILE_SIZE//2), pygame.SRCALPHA)
-        pygame.draw.circle(self.image, YELLOW, (TILE_SIZE//4, TILE_SIZE//4), TILE_SIZE//4)
-        pygame.draw.circle(self.image, (255, 200, 0), (TILE_SIZE//4, TILE_SIZE//4), TILE_SIZE//6)
-        
-        self.rect = self.image.get_rect()
-        self.rect.x = x
-        self.rect.y = y
-        self.float_offset = random.random() * 2 * math.pi
-
-    def update(self):
-        self.rect.y += math.sin(pygame.time.get_ticks() / 200 + self.float_offset) * 0.5
-
-# MegaPixel 特殊物品类
-class MegaPixel(pygame.sprite.Sprite):
-    def __init__(self, x, y):
-        super().__init__()
-        self.image = pygame.Surface((TILE_SIZE, TILE_SIZE), pygame.SRCALPHA)
-        pygame.draw.rect(self.image, PURPLE, (0, 0, TILE_SIZE, TILE_SIZE))
-        pygame.draw.rect(self.image, (200, 0, 200), (4, 4, TILE_SIZE-8, TILE_SIZE-8))
-        pygame.draw.rect(self.image, (255, 100, 255), (8, 8, TILE_SIZE-16, TILE_SIZE-16))
-        
-        self.rect = self.image.get_rect()
-        self.rect.x = x
-        self.rect.y = y
-        self.float_offset = random.random() * 2 * math.pi
-
-    def update(self):
-        self.rect.y += math.sin(pygame.time.get_ticks() / 200 + self.float_offset) * 0.7
-        
-        glow_size = abs(math.sin(pygame.time.get_ticks() / 300)) * 5
-        glow_surface = pygame.Surface((TILE_SIZE + int(glow_size)*2, TILE_SIZE + int(glow_size)*2), pygame.SRCALPHA)
-        pygame.draw.rect(glow_surface, (255, 100, 255, 100), 
-                        (0, 0, TILE_SIZE + int(glow_size)*2, TILE_SIZE + int(glow_size)*2))
-        self.image = glow_surface
-        pygame.draw.rect(self.image, PURPLE, (glow_size, glow_size, TILE_SIZE, TILE_SIZE))
-        pygame.draw.rect(self.image, (200, 0, 200), (glow_size+4, glow_size+4, TILE_SIZE-8, TILE_SIZE-8))
-        pygame.draw.rect(self.image, (255, 100, 255), (glow_size+8, glow_size+8, TILE_SIZE-16, TILE_SIZE-16))
-
-# 创建游戏精灵组
-all_sprites = pygame.sprite.Group()
-platforms = pygame.sprite.Group()
-enemies = pygame.sprite.Group()
-coins = pygame.sprite.Group()
-megapixels = pygame.sprite.Group()
-
-# 创建玩家
-player = Player(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
-all_sprites.add(player)
-
-# 创建平台
-platform_positions = [
-    (0, SCREEN_HEIGHT - 40, SCREEN_WIDTH, 40),
-    (100, 500, 200, 20),
-    (400, 400, 150, 20),
-    (200, 300, 100, 20),
-    (500, 250, 200, 20),
-    (100, 200, 150, 20),
-    (600, 150, 100, 20),
-]
-
-for pos in platform_positions:
-    platform = Platform(*pos)
-    platforms.add(platform)
-    all_sprites.add(platform)
-
-# 创建敌人
-for i in range(5):
-    enemy = Enemy(random.randint(50, SCREEN_WIDTH-50), 
-                  random.choice([450, 350, 250, 150]))
-    enemies.add(enemy)
-    all_sprites.add(enemy)
-
-# 创建金币
-for i in range(10):
-    coin = Coin(random.randint(50, SCREEN_WIDTH-50), 
-                random.randint(50, SCREEN_HEIGHT-100))
-    coins.add(coin)
-    all_sprites.add(coin)
-
-# 创建MegaPixel特殊物品
-for i in range(3):
-    megapixel = MegaPixel(random.randint(50, SCREEN_WIDTH-50), 
-                          random.randint(50, SCREEN_HEIGHT-150))
-    megapixels.add(megapixel)
-    all_sprites.add(megapixel)
-
-# 游戏状态
-game_over = False
-game_won = False
-
-# 游戏主循环
-running = True
-while running:
-    clock.tick(FPS)
-    
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-        if event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_ESCAPE:
-                running = False
-            if event.key == pygame.K_r and game_over:
-                game_over = False
-                game_won = False
-                player.health = 100
-                player.coins = 0
-                player.rect.x = SCREEN_WIDTH // 2
-                player.rect.y = SCREEN_HEIGHT // 2
-                player.jumping = False
-                player.jump_velocity = 0
-                player.invincible = 0
-                
-                for enemy in enemies:
-                    enemy.kill()
-                for coin in coins:
-                    coin.kill()
-                for megapixel in megapixels:
-                    megapixel.kill()
-                    
-                for i in range(5):
-                    enemy = Enemy(random.randint(50, SCREEN_WIDTH-50), 
-                                  random.choice([450, 350, 250, 150]))
-                    enemies.add(enemy)
-                    all_sprites.add(enemy)
-                    
-                for i in range(10):
-                    coin = Coin(random.randint(50, SCREEN_WIDTH-50), 
-                                random.randint(50, SCREEN_HEIGHT-100))
-                    coins.add(coin)
-                    all_sprites.add(coin)
-                    
-                for i in range(3):
-                    megapixel = MegaPixel(random.randint(50, SCREEN_WIDTH-50), 
-                                          random.randint(50, SCREEN_HEIGHT-150))
-                    megapixels.add(megapixel)
-                    all_sprites.add(megapixel)
-    
-    if not game_over:
-        player.update(platforms, enemies, coins, megapixels)
-        enemies.update(platforms)
-        coins.update()
-        megapixels.update()
-        
-        if player.health <= 0:
-            game_over = True
-            game_won = False
-        if player.coins >= 30:
-            game_over = True
-            game_won = True
-    
-    screen.fill((135, 206, 235))
-    
-    for i in range(0, SCREEN_WIDTH, 100):
-        for j in range(0, 100, 20):
-            pygame.draw.rect(screen, WHITE, (i + j, 50 + j//5, 80, 20))
-    
-    all_sprites.draw(screen)
-    
-    player.draw_health_bar(screen)
-    
-    health_text = ui_font.render(f"生命值: {player.health}", True, WHITE)
-    coins_text = ui_font.render(f"金币: {player.coins}/30", True, WHITE)
-    screen.blit(health_text, (10, 10))
-    screen.blit(coins_text, (10, 50))
-    
-    copyright_text = small_font.render("MegaPixel - 版权所有 © 2023 赵瀚", True, WHITE)
-    screen.blit(copyright_text, (SCREEN_WIDTH - copyright_text.get_width() - 10, 10))
-    
-    controls_text = small_font.render("方向键/WASD移动, 空格/上箭头/W跳跃, R重新开始, ESC退出", True, WHITE)
-    screen.blit(controls_text, (SCREEN_WIDTH//2 - controls_text.get_width()//2, SCREEN_HEIGHT - 40))
-    
-    if len(megapixels) > 0:
-        mega_text = ui_font.render("收集紫色MegaPixel获得额外奖励!", True, PURPLE)
-        screen.blit(mega_text, (SCREEN_WIDTH//2 - mega_text.get_width()//2, 80))
-    
-    if game_over:
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 180))
-        screen.blit(overlay, (0, 0))
-        
-        if not game_won:
-            game_over_text = title_font.render("游戏结束!", True, RED)
-            restart_text = ui_font.render("按R重新开始", True, WHITE)
-        else:
-            game_over_text = title_font.render("恭喜获胜!", True, GREEN)
-            restart_text = ui_font.render("你收集了所有MegaPixel! 按R重新开始", True, WHITE)
-            
-        screen.blit(game_over_text, (SCREEN_WIDTH//2 - game_over_text.get_width()//2, SCREEN_HEIGHT//2 - 50))
-        screen.blit(restart_text, (SCREEN_WIDTH//2 - restart_text.get_width()//2, SCREEN_HEIGHT//2 + 10))
-    
-    pygame.display.flip()
-
-pygame.quit()
-sys.exit()
+import time
+_import_started = time.perf_counter()
+
+import argparse
+import pygame
+import random
+import sys
+import math
+
+import numpy as np
+
+from hud import HUD
+from render import DirtyRenderer
+from spatial import SpatialGroup
+from sprite_cache import VariantCache
+from startup import LazyFont, StartupReport
+from world import LevelLayout, all_records
+
+# 注意：导入本模块没有任何副作用（不初始化 Pygame、不打开窗口），
+# 游戏由 main() 启动
+
+# 游戏常量
+SCREEN_WIDTH = 800
+SCREEN_HEIGHT = 600
+TILE_SIZE = 32
+FPS = 60
+
+# 颜色定义
+BLACK = (0, 0, 0)
+WHITE = (255, 255, 255)
+RED = (255, 0, 0)
+GREEN = (0, 255, 0)
+BLUE = (0, 120, 255)
+BROWN = (139, 69, 19)
+YELLOW = (255, 255, 0)
+PURPLE = (128, 0, 128)
+
+# 创建字体（第一次使用时才真正加载）
+title_font = LazyFont(lambda: pygame.font.SysFont(None, 48))
+ui_font = LazyFont(lambda: pygame.font.SysFont(None, 28))
+small_font = LazyFont(lambda: pygame.font.SysFont(None, 20))
+FONTS = [title_font, ui_font, small_font]
+
+# 玩家类
+class Player(pygame.sprite.Sprite):
+    def __init__(self, x, y):
+        super().__init__()
+        self.image = pygame.Surface((TILE_SIZE, TILE_SIZE * 2), pygame.SRCALPHA)
+        # 身体 - 蓝色
+        pygame.draw.rect(self.image, BLUE, (0, TILE_SIZE//2, TILE_SIZE, TILE_SIZE))
+        # 头部 - 肤色
+        pygame.draw.rect(self.image, (255, 220, 177), (TILE_SIZE//4, 0, TILE_SIZE//2, TILE_SIZE//2))
+        # 眼睛 - 黑色
+        pygame.draw.rect(self.image, BLACK, (TILE_SIZE//3, TILE_SIZE//6, 3, 3))
+        pygame.draw.rect(self.image, BLACK, (2*TILE_SIZE//3, TILE_SIZE//6, 3, 3))
+        
+        self.rect = self.image.get_rect()
+        self.rect.x = x
+        self.rect.y = y
+        self.speed = 5
+        self.health = 100
+        self.coins = 0
+        self.direction = 1
+        self.jumping = False
+        self.jump_velocity = 0
+        self.gravity = 0.5
+        self.invincible = 0
+        self.on_ground = False
+        
+    # keys 默认读取键盘状态，也可以传入任何支持 keys[按键] 的对象（例如脚本化输入）
+    def update(self, platforms, enemies, coins, megapixels, keys=None):
+        if self.invincible > 0:
+            self.invincible -= 1
+            
+        old_x = self.rect.x
+        old_y = self.rect.y
+        
+        if keys is None:
+            keys = pygame.key.get_pressed()
+        if keys[pygame.K_LEFT] or keys[pygame.K_a]:
+            self.rect.x -= self.speed
+            self.direction = -1
+        if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
+            self.rect.x += self.speed
+            self.direction = 1
+            
+        if (keys[pygame.K_UP] or keys[pygame.K_w] or keys[pygame.K_SPACE]) and self.on_ground and not self.jumping:
+            self.jumping = True
+            self.jump_velocity = -12
+            self.on_ground = False
+            
+        if self.jumping:
+            self.rect.y += self.jump_velocity
+            self.jump_velocity += self.gravity
+            
+            self.on_ground = False
+            for platform in platforms.query(self.rect.inflate(0, 2)):
+                if (self.rect.bottom >= platform.rect.top and 
+                    self.rect.top < platform.rect.top and
+                    self.rect.right > platform.rect.left and 
+                    self.rect.left < platform.rect.right and
+                    self.jump_velocity > 0):
+                    self.rect.bottom = platform.rect.top
+                    self.jumping = False
+                    self.jump_velocity = 0
+                    self.on_ground = True
+                    break
+            
+            if self.rect.bottom >= SCREEN_HEIGHT - 40 and self.jump_velocity > 0:
+                self.rect.bottom = SCREEN_HEIGHT - 40
+                self.jumping = False
+                self.jump_velocity = 0
+                self.on_ground = True
+        else:
+            self.on_ground = False
+            for platform in platforms.query(self.rect.inflate(0, 2)):
+                if (self.rect.bottom == platform.rect.top and 
+                    self.rect.right > platform.rect.left and 
+                    self.rect.left < platform.rect.right):
+                    self.on_ground = True
+                    break
+                    
+            if not self.on_ground:
+                self.rect.y += 5
+        
+        if self.rect.left < 0:
+            self.rect.left = 0
+        if self.rect.right > SCREEN_WIDTH:
+            self.rect.right = SCREEN_WIDTH
+        if self.rect.top < 0:
+            self.rect.top = 0
+        if self.rect.bottom > SCREEN_HEIGHT:
+            self.rect.bottom = SCREEN_HEIGHT
+            if not self.jumping:
+                self.health -= 5
+            
+        for platform in platforms.query(self.rect):
+            if self.rect.colliderect(platform.rect):
+                if old_x + self.rect.width <= platform.rect.left and self.rect.right >= platform.rect.left:
+                    self.rect.right = platform.rect.left
+                elif old_x >= platform.rect.right and self.rect.left <= platform.rect.right:
+                    self.rect.left = platform.rect.right
+                    
+        if self.invincible <= 0:
+            for enemy in enemies.query(self.rect):
+                if self.rect.colliderect(enemy.rect):
+                    if old_y + self.rect.height <= enemy.rect.top and self.rect.bottom >= enemy.rect.top:
+                        enemy.kill()
+                        self.rect.bottom = enemy.rect.top
+                        self.jumping = False
+                        self.jump_velocity = 0
+                        self.coins += 5
+                    else:
+                        self.health -= 10
+                        self.invincible = 30
+                        if self.rect.x < enemy.rect.x:
+                            self.rect.x -= 30
+                        else:
+                            self.rect.x += 30
+                        
+        for coin in coins.query(self.rect):
+            if self.rect.colliderect(coin.rect):
+                coin.kill()
+                self.coins += 1
+                
+        for megapixel in megapixels.query(self.rect):
+            if self.rect.colliderect(megapixel.rect):
+                megapixel.kill()
+                self.coins += 10
+                self.health = min(100, self.health + 30)
+                
+        if self.health <= 0:
+            self.health = 0
+
+    def draw_health_bar(self, surface):
+        bar_width = 100
+        bar_height = 10
+        fill_width = int((self.health / 100) * bar_width)
+        
+        pygame.draw.rect(surface, RED, (self.rect.x, self.rect.y - 15, bar_width, bar_height))
+        pygame.draw.rect(surface, GREEN, (self.rect.x, self.rect.y - 15, fill_width, bar_height))
+        pygame.draw.rect(surface, WHITE, (self.rect.x, self.rect.y - 15, bar_width, bar_height), 1)
+
+# 生成平台纹理：每个 4x4 的格子画一个 3x3 的色块，颜色在棕色基础上随机浮动，
+# 格子之间的缝隙保持黑色；同一个种子总是生成相同的纹理
+def build_platform_texture(key):
+    platform_type, width, height, seed = key
+    rng = np.random.default_rng(seed)
+    variation = rng.integers(-10, 11, size=(-(-width // 4), -(-height // 4), 1))
+    cells = np.clip(np.array(BROWN) + variation, 0, 255)
+    
+    pixels = np.repeat(np.repeat(cells, 4, axis=0), 4, axis=1)[:width, :height]
+    pixels[3::4, :] = 0
+    pixels[:, 3::4] = 0
+    image = pygame.Surface((width, height))
+    pygame.surfarray.blit_array(image, pixels)
+    return image
+
+# 平台类
+class Platform(pygame.sprite.Sprite):
+    # 纹理缓存：(类型, 宽, 高, 种子) -> 图像，相同的平台共用一张表面
+    textures = VariantCache(build_platform_texture)
+    
+    def __init__(self, x, y, width, height, seed=0):
+        super().__init__()
+        self.image = Platform.textures.get(('normal', width, height, seed))
+        
+        self.rect = self.image.get_rect()
+        self.rect.x = x
+        self.rect.y = y
+
+# 敌人类
+class Enemy(pygame.sprite.Sprite):
+    def __init__(self, x, y, speed):
+        super().__init__()
+        self.image = pygame.Surface((TILE_SIZE, TILE_SIZE), pygame.SRCALPHA)
+        pygame.draw.rect(self.image, RED, (0, 0, TILE_SIZE, TILE_SIZE))
+        pygame.draw.rect(self.image, WHITE, (TILE_SIZE//4, TILE_SIZE//4, 4, 4))
+        pygame.draw.rect(self.image, WHITE, (3*TILE_SIZE//4, TILE_SIZE//4, 4, 4))
+        pygame.draw.rect(self.image, BLACK, (TILE_SIZE//4, 3*TILE_SIZE//4, TILE_SIZE//2, 3))
+        
+        self.rect = self.image.get_rect()
+        self.reset(x, y, speed)
+        
+    # 按新的生成记录恢复初始状态（对象池复用时调用，图像保留）
+    def reset(self, x, y, speed):
+        self.rect.x = x
+        self.rect.y = y
+        self.speed = speed
+        self.direction = 1
+        
+    def update(self, platforms):
+        self.rect.x += self.speed * self.direction
+        
+        on_platform = False
+        for platform in platforms.query(self.rect.inflate(0, 2)):
+            if (self.rect.bottom == platform.rect.top and 
+                self.rect.right > platform.rect.left and 
+                self.rect.left < platform.rect.right):
+                on_platform = True
+                if (self.direction > 0 and self.rect.right >= platform.rect.right) or \
+                   (self.direction < 0 and self.rect.left <= platform.rect.left):
+                    self.direction *= -1
+                break
+                
+        if not on_platform:
+            self.direction *= -1
+            
+        if self.rect.left < 0:
+            self.direction = 1
+        if self.rect.right > SCREEN_WIDTH:
+            self.direction = -1
+
+# 金币类
+class Coin(pygame.sprite.Sprite):
+    def __init__(self, x, y, float_offset):
+        super().__init__()
+        self.image = pygame.Surface((TILE_SIZE//2, TILE_SIZE//2), pygame.SRCALPHA)
+        pygame.draw.circle(self.image, YELLOW, (TILE_SIZE//4, TILE_SIZE//4), TILE_SIZE//4)
+        pygame.draw.circle(self.image, (255, 200, 0), (TILE_SIZE//4, TILE_SIZE//4), TILE_SIZE//6)
+        
+        self.rect = self.image.get_rect()
+        self.reset(x, y, float_offset)
+        
+    def reset(self, x, y, float_offset):
+        self.rect.x = x
+        self.rect.y = y
+        self.float_offset = float_offset
+
+    def update(self):
+        self.rect.y += math.sin(pygame.time.get_ticks() / 200 + self.float_offset) * 0.5
+
+# MegaPixel 特殊物品类
+class MegaPixel(pygame.sprite.Sprite):
+    # 发光帧缓存：发光大小（整数像素）-> 图像，所有实例共享
+    glow_frames = {}
+    
+    def __init__(self, x, y, float_offset):
+        super().__init__()
+        self.reset(x, y, float_offset)
+        
+    def reset(self, x, y, float_offset):
+        self.glow = 0
+        self.image = MegaPixel.get_glow_frame(0)
+        
+        self.rect = self.image.get_rect()
+        self.rect.x = x
+        self.rect.y = y
+        self.float_offset = float_offset
+
+    @classmethod
+    def get_glow_frame(cls, glow_size):
+        frame = cls.glow_frames.get(glow_size)
+        if frame is None:
+            size = TILE_SIZE + glow_size*2
+            frame = pygame.Surface((size, size), pygame.SRCALPHA)
+            pygame.draw.rect(frame, (255, 100, 255, 100), (0, 0, size, size))
+            pygame.draw.rect(frame, PURPLE, (glow_size, glow_size, TILE_SIZE, TILE_SIZE))
+            pygame.draw.rect(frame, (200, 0, 200), (glow_size+4, glow_size+4, TILE_SIZE-8, TILE_SIZE-8))
+            pygame.draw.rect(frame, (255, 100, 255), (glow_size+8, glow_size+8, TILE_SIZE-16, TILE_SIZE-16))
+            cls.glow_frames[glow_size] = frame
+        return frame
+
+    def update(self):
+        self.rect.y += math.sin(pygame.time.get_ticks() / 200 + self.float_offset) * 0.7
+        
+        # 只在发光大小变化时换帧，并以中心为基准调整矩形
+        glow_size = int(abs(math.sin(pygame.time.get_ticks() / 300)) * 5)
+        if glow_size != self.glow:
+            self.glow = glow_size
+            self.image = MegaPixel.get_glow_frame(glow_size)
+            growth = self.image.get_width() - self.rect.width
+            self.rect.inflate_ip(growth, growth)
+
+# 平台位置
+PLATFORM_POSITIONS = [
+    (0, SCREEN_HEIGHT - 40, SCREEN_WIDTH, 40),
+    (100, 500, 200, 20),
+    (400, 400, 150, 20),
+    (200, 300, 100, 20),
+    (500, 250, 200, 20),
+    (100, 200, 150, 20),
+    (600, 150, 100, 20),
+]
+
+# 随机生成敌人、金币和MegaPixel特殊物品的生成记录（开局和重新开始时使用）
+# 敌人为 (x, y, 速度)，金币和MegaPixel为 (x, y, 浮动相位)
+def random_spawns(enemy_count=5, coin_count=10, megapixel_count=3):
+    spawns = {'enemies': [], 'coins': [], 'megapixels': []}
+    
+    # 创建敌人
+    for i in range(enemy_count):
+        spawns['enemies'].append((random.randint(50, SCREEN_WIDTH-50), 
+                                  random.choice([450, 350, 250, 150]),
+                                  random.randint(1, 3)))
+    
+    # 创建金币
+    for i in range(coin_count):
+        spawns['coins'].append((random.randint(50, SCREEN_WIDTH-50), 
+                                random.randint(50, SCREEN_HEIGHT-100),
+                                random.random() * 2 * math.pi))
+    
+    # 创建MegaPixel特殊物品
+    for i in range(megapixel_count):
+        spawns['megapixels'].append((random.randint(50, SCREEN_WIDTH-50), 
+                                     random.randint(50, SCREEN_HEIGHT-150),
+                                     random.random() * 2 * math.pi))
+    return spawns
+
+# 关卡文件里的生成记录（关卡文件的全部区块都放在这一屏里）
+def level_spawns(level):
+    return {kind: all_records(level, kind) for kind in ('enemies', 'coins', 'megapixels')}
+
+# 精灵的绘制层（从下到上）：金币和MegaPixel、敌人、玩家
+LAYER_PICKUPS = 0
+LAYER_ENEMIES = 1
+LAYER_PLAYER = 2
+
+# 实体对象池：被消灭或收集的精灵（不再属于任何组）留在池里，
+# 生成新实体时优先用 reset() 复用它们，不重新创建对象和绘制图像
+class SpritePool:
+    def __init__(self, sprite_class):
+        self.sprite_class = sprite_class
+        self.sprites = []
+    
+    def spawn(self, records):
+        free = [sprite for sprite in self.sprites if not sprite.alive()]
+        spawned = []
+        for record in records:
+            if free:
+                sprite = free.pop()
+                sprite.reset(*record)
+            else:
+                sprite = self.sprite_class(*record)
+                self.sprites.append(sprite)
+            spawned.append(sprite)
+        return spawned
+
+ENEMY_POOL = SpritePool(Enemy)
+COIN_POOL = SpritePool(Coin)
+MEGAPIXEL_POOL = SpritePool(MegaPixel)
+
+# 按生成记录生成敌人、金币和MegaPixel特殊物品（从对象池中取）
+def spawn_entities(all_sprites, enemies, coins, megapixels, spawns):
+    for pool, kind, group, layer in ((ENEMY_POOL, 'enemies', enemies, LAYER_ENEMIES),
+                                     (COIN_POOL, 'coins', coins, LAYER_PICKUPS),
+                                     (MEGAPIXEL_POOL, 'megapixels', megapixels, LAYER_PICKUPS)):
+        sprites = pool.spawn(spawns[kind])
+        group.add(sprites)
+        all_sprites.add(sprites, layer=layer)
+
+# 写死的关卡布局，供关卡文件转换工具使用
+def build_level(enemy_count=5, coin_count=10, megapixel_count=3):
+    layout = LevelLayout(SCREEN_WIDTH, SCREEN_HEIGHT, SCREEN_WIDTH)
+    for pos in PLATFORM_POSITIONS:
+        layout.add('platforms', (*pos, 'normal'))
+    for kind, records in random_spawns(enemy_count, coin_count, megapixel_count).items():
+        for record in records:
+            layout.add(kind, record)
+    return layout
+
+# 创建关卡：精灵组、玩家、平台和物品
+# 给出关卡文件（level）时平台和生成点来自文件，否则使用写死的平台布局和随机生成点
+def init_game(enemy_count=5, coin_count=10, megapixel_count=3, level=None):
+    # 创建游戏精灵组（all_sprites 只包含会移动的精灵，静态平台烘焙在背景里），按层绘制
+    all_sprites = pygame.sprite.LayeredUpdates()
+    platforms = SpatialGroup()
+    enemies = SpatialGroup()
+    coins = SpatialGroup()
+    megapixels = SpatialGroup()
+    
+    # 创建玩家
+    player = Player(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
+    all_sprites.add(player, layer=LAYER_PLAYER)
+    
+    # 创建平台
+    if level is not None:
+        positions = [record[:4] for record in all_records(level, 'platforms')]
+    else:
+        positions = PLATFORM_POSITIONS
+    for pos in positions:
+        platform = Platform(*pos)
+        platforms.add(platform)
+    
+    if level is not None:
+        spawns = level_spawns(level)
+    else:
+        spawns = random_spawns(enemy_count, coin_count, megapixel_count)
+    spawn_entities(all_sprites, enemies, coins, megapixels, spawns)
+    return all_sprites, platforms, enemies, coins, megapixels, player
+
+# 预先烘焙静态背景（天空、云朵、平台）
+def build_background(platforms):
+    background = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+    background.fill((135, 206, 235))
+    for i in range(0, SCREEN_WIDTH, 100):
+        for j in range(0, 100, 20):
+            pygame.draw.rect(background, WHITE, (i + j, 50 + j//5, 80, 20))
+    platforms.draw(background)
+    return background
+
+# 界面元素：(名字, 区域, 状态, 绘制函数)，只在状态变化或被精灵覆盖时重画
+def text_overlay(name, font, text, color, pos):
+    rect = pygame.Rect(pos, font.size(text))
+    return (name, rect, text,
+            lambda surface: surface.blit(font.render(text, True, color), rect))
+
+def centered_text_overlay(name, font, text, color, y):
+    width = font.size(text)[0]
+    return text_overlay(name, font, text, color, (SCREEN_WIDTH//2 - width//2, y))
+
+def draw_game_over(surface):
+    overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
+    overlay.fill((0, 0, 0, 180))
+    surface.blit(overlay, (0, 0))
+
+# 保留模式界面层：版权和操作说明只渲染一次，生命值、金币和提示只在变化时重新渲染
+def static_text(font, text, color, pos):
+    image = font.render(text, True, color)
+    return image.get_rect(topleft=pos), lambda surface: surface.blit(image, pos)
+
+def mega_hint(visible):
+    if not visible:
+        return None
+    mega_text = ui_font.render("收集紫色MegaPixel获得额外奖励!", True, PURPLE)
+    return mega_text, (SCREEN_WIDTH//2 - mega_text.get_width()//2, 80)
+
+def build_hud(player, megapixels):
+    copyright_message = "MegaPixel - 版权所有 © 2023 赵瀚"
+    controls_message = "方向键/WASD移动, 空格/上箭头/W跳跃, R重新开始, ESC退出"
+    hud = HUD((SCREEN_WIDTH, SCREEN_HEIGHT))
+    hud.add_static(*static_text(small_font, copyright_message, WHITE,
+                                (SCREEN_WIDTH - small_font.size(copyright_message)[0] - 10, 10)))
+    hud.add_static(*static_text(small_font, controls_message, WHITE,
+                                (SCREEN_WIDTH//2 - small_font.size(controls_message)[0]//2, SCREEN_HEIGHT - 40)))
+    hud.add_bound(lambda: player.health,
+                  lambda health: (ui_font.render(f"生命值: {health}", True, WHITE), (10, 10)))
+    hud.add_bound(lambda: player.coins,
+                  lambda coins: (ui_font.render(f"金币: {coins}/30", True, WHITE), (10, 50)))
+    hud.add_bound(lambda: len(megapixels) > 0, mega_hint)
+    return hud
+
+def hud_overlays(player, hud, game_over, game_won):
+    overlays = [('health_bar', pygame.Rect(player.rect.x, player.rect.y - 15, 100, 10), player.health,
+                 player.draw_health_bar)]
+    overlays += [(f'hud{i}', rect, hud.version, hud.draw) for i, rect in enumerate(hud.regions())]
+    
+    if game_over:
+        overlays.append(('game_over', pygame.Rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT), game_won, draw_game_over))
+        if not game_won:
+            overlays.append(centered_text_overlay('game_over_title', title_font, "游戏结束!", RED, SCREEN_HEIGHT//2 - 50))
+            overlays.append(centered_text_overlay('game_over_hint', ui_font, "按R重新开始", WHITE, SCREEN_HEIGHT//2 + 10))
+        else:
+            overlays.append(centered_text_overlay('game_over_title', title_font, "恭喜获胜!", GREEN, SCREEN_HEIGHT//2 - 50))
+            overlays.append(centered_text_overlay('game_over_hint', ui_font, "你收集了所有MegaPixel! 按R重新开始", WHITE, SCREEN_HEIGHT//2 + 10))
+    return overlays
+
+# 主游戏函数：显示和字体在这里才初始化
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="MegaPixel")
+    parser.add_argument('--startup-report', action='store_true', help="打印启动各阶段的耗时")
+    parser.add_argument('--level', help="从关卡文件（.mplv）加载关卡")
+    args = parser.parse_args(argv)
+    
+    report = StartupReport()
+    report.record('import', IMPORT_SECONDS)
+    
+    # 创建游戏窗口
+    with report.phase('display'):
+        pygame.display.init()
+        screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        pygame.display.set_caption("MegaPixel - 版权所有 © 2025 赵瀚")
+    
+    with report.phase('fonts'):
+        for font in FONTS:
+            font.load()
+    
+    with report.phase('level'):
+        level = None
+        if args.level:
+            # 关卡文件需要 NumPy，只在用到时才导入
+            from levelfile import LevelFile
+            level = LevelFile(args.level)
+        all_sprites, platforms, enemies, coins, megapixels, player = init_game(level=level)
+        hud = build_hud(player, megapixels)
+        renderer = DirtyRenderer(screen)
+        renderer.set_background(build_background(platforms))
+    
+    if args.startup_report:
+        print(report.format())
+    
+    clock = pygame.time.Clock()
+    
+    # 游戏状态
+    game_over = False
+    game_won = False
+    
+    # 游戏主循环
+    running = True
+    while running:
+        clock.tick(FPS)
+        
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    running = False
+                if event.key == pygame.K_r and game_over:
+                    game_over = False
+                    game_won = False
+                    player.health = 100
+                    player.coins = 0
+                    player.rect.x = SCREEN_WIDTH // 2
+                    player.rect.y = SCREEN_HEIGHT // 2
+                    player.jumping = False
+                    player.jump_velocity = 0
+                    player.invincible = 0
+                    
+                    for enemy in enemies:
+                        enemy.kill()
+                    for coin in coins:
+                        coin.kill()
+                    for megapixel in megapixels:
+                        megapixel.kill()
+                    
+                    spawns = level_spawns(level) if level is not None else random_spawns()
+                    spawn_entities(all_sprites, enemies, coins, megapixels, spawns)
+            if event.type == pygame.WINDOWEXPOSED:
+                renderer.invalidate()
+        
+        if not game_over:
+            player.update(platforms, enemies, coins, megapixels)
+            enemies.update(platforms)
+            coins.update()
+            megapixels.update()
+            
+            if player.health <= 0:
+                game_over = True
+                game_won = False
+            if player.coins >= 30:
+                game_over = True
+                game_won = True
+        
+        hud.update()
+        renderer.render(all_sprites, hud_overlays(player, hud, game_over, game_won))
+    
+    pygame.quit()
+    sys.exit()
+
+# 导入本模块所花的时间（包括导入 Pygame）
+IMPORT_SECONDS = time.perf_counter() - _import_started
+
+# 运行游戏
+if __name__ == "__main__":
+    main()
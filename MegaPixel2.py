@@ -1,747 +1,1358 @@
-import pygame
-import random
-import math
-import sys
-import os
-
-# 初始化 Pygame
-pygame.init()
-pygame.mixer.init()
-
-# 游戏常量
-SCREEN_WIDTH = 1024
-SCREEN_HEIGHT = 768
-TILE_SIZE = 48
-FPS = 60
-
-# 颜色定义
-BACKGROUND = (25, 25, 50)
-UI_BACKGROUND = (40, 40, 80, 200)
-UI_BOTTOM_BACKGROUND = (30, 30, 60, 220)
-PLAYER_BLUE = (65, 105, 225)
-PLAYER_ACCENT = (100, 149, 237)
-ENEMY_RED = (220, 20, 60)
-ENEMY_ACCENT = (255, 99, 71)
-COIN_YELLOW = (255, 215, 0)
-COIN_GLOW = (255, 255, 100)
-MEGAPIXEL_PURPLE = (138, 43, 226)
-MEGAPIXEL_GLOW = (186, 85, 211)
-PLATFORM_COLOR = (101, 67, 33)
-PLATFORM_HIGHLIGHT = (139, 115, 85)
-TEXT_COLOR = (240, 240, 255)
-UI_ACCENT = (70, 130, 180)
-BUTTON_COLOR = (80, 80, 120)
-BUTTON_HOVER = (100, 100, 150)
-VICTORY_GOLD = (255, 215, 0)
-DEFEAT_RED = (200, 0, 0)
-
-# 创建游戏窗口
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("MegaPixel v2.0 - 版权所有 © 2025 赵瀚")
-clock = pygame.time.Clock()
-
-# 创建字体
-try:
-    title_font = pygame.font.Font(None, 64)
-    large_font = pygame.font.Font(None, 48)
-    medium_font = pygame.font.Font(None, 36)
-    small_font = pygame.font.Font(None, 24)
-    tiny_font = pygame.font.Font(None, 18)
-except:
-    title_font = pygame.font.SysFont("arial", 64, bold=True)
-    large_font = pygame.font.SysFont("arial", 48)
-    medium_font = pygame.font.SysFont("arial", 36)
-    small_font = pygame.font.SysFont("arial", 24)
-    tiny_font = pygame.font.SysFont("arial", 18)
-
-# 音效系统
-class SoundSystem:
-    def __init__(self):
-        self.sounds = {}
-        self.music_playing = False
-        self.load_sounds()
-        
-    def load_sounds(self):
-        # 尝试创建简单的音效
-        try:
-            # 跳跃音效
-            self.sounds['jump'] = self.create_beep_sound(523, 100)
-            # 收集金币音效
-            self.sounds['coin'] = self.create_beep_sound(659, 150)
-            # 收集MegaPixel音效
-            self.sounds['megapixel'] = self.create_beep_sound(784, 200)
-            # 击败敌人音效
-            self.sounds['enemy'] = self.create_beep_sound(392, 100)
-            # 受伤音效
-            self.sounds['hurt'] = self.create_beep_sound(220, 200)
-            # 胜利音效
-            self.sounds['victory'] = self.create_victory_sound()
-            # 失败音效
-            self.sounds['defeat'] = self.create_defeat_sound()
-            
-            # 设置音量
-            for sound in self.sounds.values():
-                sound.set_volume(0.5)
-                
-        except Exception as e:
-            print(f"音效创建失败: {e}")
-            # 创建空的音效作为备用
-            for key in ['jump', 'coin', 'megapixel', 'enemy', 'hurt', 'victory', 'defeat']:
-                self.sounds[key] = pygame.mixer.Sound(bytes(0))
-    
-    def create_beep_sound(self, frequency, duration):
-        # 创建一个简单的正弦波音效
-        sample_rate = 44100
-        n_samples = int(round(duration * 0.001 * sample_rate))
-        buf = bytearray()
-        
-        for i in range(n_samples):
-            # 简单的正弦波
-            sample = int(127 * math.sin(2 * math.pi * frequency * i / sample_rate) + 128)
-            buf.append(sample)
-            buf.append(sample)  # 立体声
-        
-        return pygame.mixer.Sound(bytes(buf))
-    
-    def create_victory_sound(self):
-        # 胜利音效 - 上升的音阶
-        sample_rate = 44100
-        buf = bytearray()
-        
-        # 创建上升的音阶
-        for freq in [523, 659, 784, 1047]:  # C5, E5, G5, C6
-            n_samples = int(round(100 * 0.001 * sample_rate))
-            for i in range(n_samples):
-                sample = int(127 * math.sin(2 * math.pi * freq * i / sample_rate) + 128)
-                buf.append(sample)
-                buf.append(sample)
-        
-        return pygame.mixer.Sound(bytes(buf))
-    
-    def create_defeat_sound(self):
-        # 失败音效 - 下降的音阶
-        sample_rate = 44100
-        buf = bytearray()
-        
-        # 创建下降的音阶
-        for freq in [523, 392, 330, 262]:  # C5, G4, E4, C4
-            n_samples = int(round(150 * 0.001 * sample_rate))
-            for i in range(n_samples):
-                sample = int(127 * math.sin(2 * math.pi * freq * i / sample_rate) + 128)
-                buf.append(sample)
-                buf.append(sample)
-        
-        return pygame.mixer.Sound(bytes(buf))
-    
-    def play_sound(self, sound_name):
-        if sound_name in self.sounds:
-            self.sounds[sound_name].play()
-    
-    def play_background_music(self):
-        # 尝试播放背景音乐
-        try:
-            # 创建一个简单的背景音乐循环
-            if not self.music_playing:
-                # 这里可以添加实际的音乐文件，现在使用静音
-                self.music_playing = True
-        except:
-            pass
-
-# 玩家类
-class Player(pygame.sprite.Sprite):
-    def __init__(self, x, y, sound_system):
-        super().__init__()
-        self.sound_system = sound_system
-        
-        # 创建更精细的像素风格角色
-        self.base_image = pygame.Surface((TILE_SIZE, TILE_SIZE * 2), pygame.SRCALPHA)
-        
-        # 绘制角色身体
-        pygame.draw.rect(self.base_image, PLAYER_BLUE, (4, TILE_SIZE//2, TILE_SIZE-8, TILE_SIZE))
-        pygame.draw.rect(self.base_image, PLAYER_ACCENT, (8, TILE_SIZE//2+4, TILE_SIZE-16, TILE_SIZE-8))
-        
-        # 绘制头部
-        pygame.draw.rect(self.base_image, (255, 220, 177), (8, 4, TILE_SIZE-16, TILE_SIZE//2))
-        
-        # 绘制面部特征
-        pygame.draw.rect(self.base_image, (0, 0, 0), (TILE_SIZE//3, 16, 4, 4))
-        pygame.draw.rect(self.base_image, (0, 0, 0), (2*TILE_SIZE//3, 16, 4, 4))
-        pygame.draw.rect(self.base_image, (0, 0, 0), (TILE_SIZE//2-6, 28, 12, 3))
-        
-        self.image = self.base_image.copy()
-        self.rect = self.image.get_rect()
-        self.rect.x = x
-        self.rect.y = y
-        
-        # 物理属性
-        self.velocity_x = 0
-        self.velocity_y = 0
-        self.speed = 6
-        self.jump_power = 16
-        self.gravity = 0.8
-        self.max_fall_speed = 12
-        
-        # 游戏属性
-        self.health = 100
-        self.max_health = 100
-        self.coins = 0
-        self.direction = 1  # 1 for right, -1 for left
-        self.on_ground = False
-        self.invincible = 0
-        self.invincible_flash = 0
-        
-    def handle_input(self):
-        keys = pygame.key.get_pressed()
-        
-        # 水平移动
-        self.velocity_x = 0
-        if keys[pygame.K_LEFT] or keys[pygame.K_a]:
-            self.velocity_x = -self.speed
-            self.direction = -1
-        if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
-            self.velocity_x = self.speed
-            self.direction = 1
-            
-        # 跳跃
-        if (keys[pygame.K_UP] or keys[pygame.K_w] or keys[pygame.K_SPACE]) and self.on_ground:
-            self.velocity_y = -self.jump_power
-            self.on_ground = False
-            self.sound_system.play_sound('jump')
-            
-    def update(self, platforms, enemies, coins, megapixels):
-        # 处理输入
-        self.handle_input()
-        
-        # 应用重力
-        self.velocity_y += self.gravity
-        if self.velocity_y > self.max_fall_speed:
-            self.velocity_y = self.max_fall_speed
-            
-        # 更新位置
-        self.rect.x += self.velocity_x
-        self.rect.y += self.velocity_y
-        
-        # 屏幕边界检查
-        if self.rect.left < 0:
-            self.rect.left = 0
-        if self.rect.right > SCREEN_WIDTH:
-            self.rect.right = SCREEN_WIDTH
-        if self.rect.top < 0:
-            self.rect.top = 0
-            self.velocity_y = 0
-        if self.rect.bottom > SCREEN_HEIGHT:
-            self.rect.bottom = SCREEN_HEIGHT
-            self.on_ground = True
-            self.velocity_y = 0
-            
-        # 平台碰撞检测
-        self.on_ground = False
-        for platform in platforms:
-            if self.rect.colliderect(platform.rect):
-                # 从上方落在平台上
-                if (self.velocity_y > 0 and 
-                    self.rect.bottom > platform.rect.top and 
-                    self.rect.top < platform.rect.top):
-                    self.rect.bottom = platform.rect.top
-                    self.on_ground = True
-                    self.velocity_y = 0
-                # 从下方碰到平台
-                elif (self.velocity_y < 0 and 
-                      self.rect.top < platform.rect.bottom and 
-                      self.rect.bottom > platform.rect.bottom):
-                    self.rect.top = platform.rect.bottom
-                    self.velocity_y = 0
-                # 水平碰撞
-                elif self.velocity_x > 0 and self.rect.right > platform.rect.left and self.rect.left < platform.rect.left:
-                    self.rect.right = platform.rect.left
-                elif self.velocity_x < 0 and self.rect.left < platform.rect.right and self.rect.right > platform.rect.right:
-                    self.rect.left = platform.rect.right
-        
-        # 敌人碰撞检测
-        if self.invincible <= 0:
-            for enemy in enemies:
-                if self.rect.colliderect(enemy.rect):
-                    # 从上方跳到敌人头上
-                    if self.velocity_y > 0 and self.rect.bottom <= enemy.rect.top + 10:
-                        enemy.kill()
-                        self.velocity_y = -self.jump_power * 0.7  # 反弹
-                        self.coins += 5
-                        self.sound_system.play_sound('enemy')
-                    else:
-                        self.health -= 15
-                        self.invincible = 60  # 1秒无敌时间
-                        self.sound_system.play_sound('hurt')
-                        # 击退效果
-                        if self.rect.centerx < enemy.rect.centerx:
-                            self.velocity_x = -8
-                        else:
-                            self.velocity_x = 8
-                        self.velocity_y = -5
-        
-        # 收集金币
-        for coin in coins:
-            if self.rect.colliderect(coin.rect):
-                coin.kill()
-                self.coins += 1
-                self.sound_system.play_sound('coin')
-                
-        # 收集MegaPixel特殊物品
-        for megapixel in megapixels:
-            if self.rect.colliderect(megapixel.rect):
-                megapixel.kill()
-                self.coins += 10
-                self.health = min(self.max_health, self.health + 25)
-                self.sound_system.play_sound('megapixel')
-        
-        # 无敌时间处理
-        if self.invincible > 0:
-            self.invincible -= 1
-            self.invincible_flash = (self.invincible_flash + 1) % 10
-            
-        # 更新角色图像（考虑方向和无敌闪烁）
-        self.image = self.base_image.copy()
-        if self.direction == -1:
-            self.image = pygame.transform.flip(self.image, True, False)
-            
-        if self.invincible > 0 and self.invincible_flash < 5:
-            # 创建半透明效果
-            alpha_surface = pygame.Surface(self.image.get_size(), pygame.SRCALPHA)
-            alpha_surface.fill((255, 255, 255, 128))
-            self.image.blit(alpha_surface, (0, 0), special_flags=pygame.BLEND_RGBA_MULT)
-        
-        # 确保生命值不会低于0
-        if self.health <= 0:
-            self.health = 0
-
-# 平台类
-class Platform(pygame.sprite.Sprite):
-    def __init__(self, x, y, width, height, platform_type="normal"):
-        super().__init__()
-        self.image = pygame.Surface((width, height))
-        
-        # 根据平台类型选择颜色
-        if platform_type == "normal":
-            base_color = PLATFORM_COLOR
-            highlight_color = PLATFORM_HIGHLIGHT
-        else:
-            base_color = (80, 80, 120)
-            highlight_color = (120, 120, 160)
-            
-        # 绘制平台顶部
-        self.image.fill(base_color)
-        pygame.draw.rect(self.image, highlight_color, (0, 0, width, 4))
-        
-        # 添加平台纹理
-        for i in range(0, width, 8):
-            pygame.draw.line(self.image, highlight_color, (i, 4), (i, height), 1)
-            
-        self.rect = self.image.get_rect()
-        self.rect.x = x
-        self.rect.y = y
-
-# 敌人类
-class Enemy(pygame.sprite.Sprite):
-    def __init__(self, x, y):
-        super().__init__()
-        self.image = pygame.Surface((TILE_SIZE, TILE_SIZE), pygame.SRCALPHA)
-        
-        # 绘制敌人身体
-        pygame.draw.rect(self.image, ENEMY_RED, (4, 4, TILE_SIZE-8, TILE_SIZE-8))
-        pygame.draw.rect(self.image, ENEMY_ACCENT, (8, 8, TILE_SIZE-16, TILE_SIZE-16))
-        
-        # 绘制眼睛
-        pygame.draw.rect(self.image, (255, 255, 255), (12, 12, 6, 6))
-        pygame.draw.rect(self.image, (255, 255, 255), (TILE_SIZE-18, 12, 6, 6))
-        pygame.draw.rect(self.image, (0, 0, 0), (14, 14, 2, 2))
-        pygame.draw.rect(self.image, (0, 0, 0), (TILE_SIZE-16, 14, 2, 2))
-        
-        self.rect = self.image.get_rect()
-        self.rect.x = x
-        self.rect.y = y
-        
-        self.speed = random.choice([-2, -1, 1, 2])
-        self.direction = 1 if self.speed > 0 else -1
-        
-    def update(self, *args):
-        # 只使用第一个参数（platforms），忽略其他参数
-        platforms = args[0] if args else []
-        
-        self.rect.x += self.speed
-        
-        # 平台边缘检测
-        on_platform = False
-        for platform in platforms:
-            if (self.rect.bottom == platform.rect.top and 
-                self.rect.right > platform.rect.left and 
-                self.rect.left < platform.rect.right):
-                on_platform = True
-                
-                # 检查是否在平台边缘
-                if (self.speed > 0 and self.rect.right >= platform.rect.right - 5) or \
-                   (self.speed < 0 and self.rect.left <= platform.rect.left + 5):
-                    self.speed *= -1
-                    self.direction *= -1
-                break
-                
-        # 如果不在平台上，转向
-        if not on_platform:
-            self.speed *= -1
-            self.direction *= -1
-            
-        # 屏幕边界检查
-        if self.rect.left < 0 or self.rect.right > SCREEN_WIDTH:
-            self.speed *= -1
-            self.direction *= -1
-
-# 金币类
-class Coin(pygame.sprite.Sprite):
-    def __init__(self, x, y):
-        super().__init__()
-        self.image = pygame.Surface((TILE_SIZE//2, TILE_SIZE//2), pygame.SRCALPHA)
-        
-        # 绘制金币
-        pygame.draw.circle(self.image, COIN_YELLOW, (TILE_SIZE//4, TILE_SIZE//4), TILE_SIZE//4)
-        pygame.draw.circle(self.image, COIN_GLOW, (TILE_SIZE//4, TILE_SIZE//4), TILE_SIZE//6)
-        
-        self.rect = self.image.get_rect()
-        self.rect.x = x
-        self.rect.y = y
-        
-        self.float_offset = random.random() * 2 * math.pi
-        self.rotation = 0
-        
-    def update(self, *args):
-        # 忽略所有参数
-        # 浮动效果
-        self.rect.y += math.sin(pygame.time.get_ticks() / 300 + self.float_offset) * 0.8
-        
-        # 旋转效果
-        self.rotation = (self.rotation + 2) % 360
-        orig_rect = self.image.get_rect()
-        rotated_image = pygame.transform.rotate(self.image, self.rotation)
-        rot_rect = orig_rect.copy()
-        rot_rect.center = rotated_image.get_rect().center
-        self.image = rotated_image.subsurface(rot_rect).copy()
-
-# MegaPixel 特殊物品类
-class MegaPixel(pygame.sprite.Sprite):
-    def __init__(self, x, y):
-        super().__init__()
-        self.base_size = TILE_SIZE
-        self.image = pygame.Surface((self.base_size, self.base_size), pygame.SRCALPHA)
-        
-        # 绘制MegaPixel
-        pygame.draw.rect(self.image, MEGAPIXEL_PURPLE, (0, 0, self.base_size, self.base_size))
-        pygame.draw.rect(self.image, (160, 60, 220), (4, 4, self.base_size-8, self.base_size-8))
-        pygame.draw.rect(self.image, MEGAPIXEL_GLOW, (8, 8, self.base_size-16, self.base_size-16))
-        
-        self.rect = self.image.get_rect()
-        self.rect.x = x
-        self.rect.y = y
-        
-        self.float_offset = random.random() * 2 * math.pi
-        self.pulse_timer = 0
-        
-    def update(self, *args):
-        # 忽略所有参数
-        # 浮动效果
-        self.rect.y += math.sin(pygame.time.get_ticks() / 250 + self.float_offset) * 1.2
-        
-        # 脉动效果
-        self.pulse_timer += 1
-        pulse_size = math.sin(self.pulse_timer / 10) * 4
-        
-        # 重新绘制带有脉动效果的MegaPixel
-        self.image = pygame.Surface((self.base_size + int(pulse_size)*2, 
-                                   self.base_size + int(pulse_size)*2), pygame.SRCALPHA)
-        
-        # 绘制发光效果
-        pygame.draw.rect(self.image, (*MEGAPIXEL_GLOW[:3], 100), 
-                        (0, 0, self.base_size + int(pulse_size)*2, self.base_size + int(pulse_size)*2))
-        
-        # 绘制MegaPixel核心
-        pygame.draw.rect(self.image, MEGAPIXEL_PURPLE, 
-                        (pulse_size, pulse_size, self.base_size, self.base_size))
-        pygame.draw.rect(self.image, (160, 60, 220), 
-                        (pulse_size+4, pulse_size+4, self.base_size-8, self.base_size-8))
-        pygame.draw.rect(self.image, MEGAPIXEL_GLOW, 
-                        (pulse_size+8, pulse_size+8, self.base_size-16, self.base_size-16))
-
-# 创建背景星星
-def create_stars(count):
-    stars = []
-    for _ in range(count):
-        x = random.randint(0, SCREEN_WIDTH)
-        y = random.randint(0, SCREEN_HEIGHT)
-        size = random.choice([1, 1, 1, 2, 2, 3])
-        brightness = random.randint(150, 255)
-        stars.append((x, y, size, brightness))
-    return stars
-
-# 初始化游戏
-def init_game(sound_system):
-    # 创建精灵组
-    all_sprites = pygame.sprite.Group()
-    platforms = pygame.sprite.Group()
-    enemies = pygame.sprite.Group()
-    coins = pygame.sprite.Group()
-    megapixels = pygame.sprite.Group()
-    
-    # 创建玩家
-    player = Player(SCREEN_WIDTH // 4, SCREEN_HEIGHT // 2, sound_system)
-    all_sprites.add(player)
-    
-    # 创建平台
-    platform_data = [
-        (0, SCREEN_HEIGHT - 60, SCREEN_WIDTH, 60, "ground"),
-        (200, 600, 300, 20, "normal"),
-        (600, 500, 200, 20, "normal"),
-        (150, 400, 250, 20, "normal"),
-        (500, 350, 180, 20, "normal"),
-        (800, 300, 150, 20, "normal"),
-        (300, 250, 200, 20, "normal"),
-        (700, 200, 180, 20, "normal"),
-        (100, 150, 150, 20, "normal"),
-    ]
-    
-    for data in platform_data:
-        platform = Platform(*data)
-        platforms.add(platform)
-        all_sprites.add(platform)
-    
-    # 创建敌人
-    for i in range(6):
-        x = random.randint(100, SCREEN_WIDTH - 100)
-        y = random.choice([550, 450, 350, 250])
-        enemy = Enemy(x, y)
-        enemies.add(enemy)
-        all_sprites.add(enemy)
-    
-    # 创建金币
-    for i in range(15):
-        x = random.randint(50, SCREEN_WIDTH - 50)
-        y = random.randint(50, SCREEN_HEIGHT - 100)
-        coin = Coin(x, y)
-        coins.add(coin)
-        all_sprites.add(coin)
-    
-    # 创建MegaPixel物品
-    for i in range(4):
-        x = random.randint(100, SCREEN_WIDTH - 100)
-        y = random.randint(100, SCREEN_HEIGHT - 200)
-        megapixel = MegaPixel(x, y)
-        megapixels.add(megapixel)
-        all_sprites.add(megapixel)
-    
-    return all_sprites, platforms, enemies, coins, megapixels, player
-
-# 创建顶部UI元素
-def draw_top_ui(screen, player):
-    # 绘制半透明UI背景
-    ui_bg = pygame.Surface((SCREEN_WIDTH, 80), pygame.SRCALPHA)
-    ui_bg.fill(UI_BACKGROUND)
-    screen.blit(ui_bg, (0, 0))
-    
-    # 绘制生命值条
-    health_bar_width = 300
-    health_bar_height = 25
-    health_fill = (player.health / player.max_health) * health_bar_width
-    
-    # 生命值条背景
-    pygame.draw.rect(screen, (60, 60, 80), (20, 20, health_bar_width, health_bar_height), border_radius=5)
-    # 生命值条填充
-    pygame.draw.rect(screen, (50, 200, 100), (20, 20, health_fill, health_bar_height), border_radius=5)
-    # 生命值条边框
-    pygame.draw.rect(screen, UI_ACCENT, (20, 20, health_bar_width, health_bar_height), 2, border_radius=5)
-    
-    # 生命值文本
-    health_text = medium_font.render(f"{player.health}/{player.max_health}", True, TEXT_COLOR)
-    screen.blit(health_text, (25, 25))
-    
-    # 金币计数
-    coins_text = medium_font.render(f"金币: {player.coins}/50", True, TEXT_COLOR)
-    screen.blit(coins_text, (SCREEN_WIDTH - coins_text.get_width() - 20, 25))
-    
-    # 游戏标题
-    title_text = small_font.render("MegaPixel v2.0", True, TEXT_COLOR)
-    screen.blit(title_text, (SCREEN_WIDTH // 2 - title_text.get_width() // 2, 25))
-
-# 创建底部菜单
-def draw_bottom_menu(screen):
-    # 绘制底部菜单背景
-    bottom_bg = pygame.Surface((SCREEN_WIDTH, 60), pygame.SRCALPHA)
-    bottom_bg.fill(UI_BOTTOM_BACKGROUND)
-    screen.blit(bottom_bg, (0, SCREEN_HEIGHT - 60))
-    
-    # 绘制控制说明
-    controls_text = small_font.render("移动: WASD/方向键 | 跳跃: 空格/W/上箭头", True, TEXT_COLOR)
-    screen.blit(controls_text, (20, SCREEN_HEIGHT - 45))
-    
-    # 绘制按钮说明
-    button_text = small_font.render("R - 重新开始 | ESC - 退出游戏", True, TEXT_COLOR)
-    screen.blit(button_text, (SCREEN_WIDTH - button_text.get_width() - 20, SCREEN_HEIGHT - 45))
-    
-    # 绘制版本信息
-    version_text = tiny_font.render("MegaPixel 版本: 2.0 | 版权所有 © 2025 赵瀚", True, TEXT_COLOR)
-    screen.blit(version_text, (SCREEN_WIDTH // 2 - version_text.get_width() // 2, SCREEN_HEIGHT - 25))
-    
-    # 绘制底部装饰线
-    pygame.draw.line(screen, UI_ACCENT, (0, SCREEN_HEIGHT - 60), (SCREEN_WIDTH, SCREEN_HEIGHT - 60), 2)
-
-# 创建胜利界面
-def draw_victory_screen(screen, player):
-    # 创建半透明覆盖层
-    overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-    overlay.fill((0, 0, 0, 180))
-    screen.blit(overlay, (0, 0))
-    
-    # 绘制胜利框
-    victory_rect = pygame.Rect(SCREEN_WIDTH//2 - 300, SCREEN_HEIGHT//2 - 150, 600, 300)
-    pygame.draw.rect(screen, (40, 40, 80, 240), victory_rect, border_radius=20)
-    pygame.draw.rect(screen, VICTORY_GOLD, victory_rect, 4, border_radius=20)
-    
-    # 绘制胜利标题
-    victory_text = title_font.render("胜利!", True, VICTORY_GOLD)
-    screen.blit(victory_text, (SCREEN_WIDTH//2 - victory_text.get_width()//2, SCREEN_HEIGHT//2 - 120))
-    
-    # 绘制分数
-    score_text = large_font.render(f"得分: {player.coins}", True, TEXT_COLOR)
-    screen.blit(score_text, (SCREEN_WIDTH//2 - score_text.get_width()//2, SCREEN_HEIGHT//2 - 40))
-    
-    # 绘制胜利图标
-    pygame.draw.circle(screen, VICTORY_GOLD, (SCREEN_WIDTH//2, SCREEN_HEIGHT//2 + 40), 40, 6)
-    pygame.draw.polygon(screen, VICTORY_GOLD, [
-        (SCREEN_WIDTH//2 - 20, SCREEN_HEIGHT//2 + 20),
-        (SCREEN_WIDTH//2 - 5, SCREEN_HEIGHT//2 + 40),
-        (SCREEN_WIDTH//2 + 25, SCREEN_HEIGHT//2 + 10)
-    ])
-
-# 创建失败界面
-def draw_defeat_screen(screen, player):
-    # 创建半透明覆盖层
-    overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-    overlay.fill((0, 0, 0, 180))
-    screen.blit(overlay, (0, 0))
-    
-    # 绘制失败框
-    defeat_rect = pygame.Rect(SCREEN_WIDTH//2 - 300, SCREEN_HEIGHT//2 - 150, 600, 300)
-    pygame.draw.rect(screen, (60, 40, 40, 240), defeat_rect, border_radius=20)
-    pygame.draw.rect(screen, DEFEAT_RED, defeat_rect, 4, border_radius=20)
-    
-    # 绘制失败标题
-    defeat_text = title_font.render("你tm输了", True, DEFEAT_RED)
-    screen.blit(defeat_text, (SCREEN_WIDTH//2 - defeat_text.get_width()//2, SCREEN_HEIGHT//2 - 120))
-    
-    # 绘制分数
-    score_text = large_font.render(f"得分: {player.coins}", True, TEXT_COLOR)
-    screen.blit(score_text, (SCREEN_WIDTH//2 - score_text.get_width()//2, SCREEN_HEIGHT//2 - 40))
-    
-    # 绘制失败图标
-    pygame.draw.circle(screen, DEFEAT_RED, (SCREEN_WIDTH//2, SCREEN_HEIGHT//2 + 40), 40, 6)
-    pygame.draw.line(screen, DEFEAT_RED, 
-                    (SCREEN_WIDTH//2 - 25, SCREEN_HEIGHT//2 + 15),
-                    (SCREEN_WIDTH//2 + 25, SCREEN_HEIGHT//2 + 65), 8)
-    pygame.draw.line(screen, DEFEAT_RED, 
-                    (SCREEN_WIDTH//2 + 25, SCREEN_HEIGHT//2 + 15),
-                    (SCREEN_WIDTH//2 - 25, SCREEN_HEIGHT//2 + 65), 8)
-
-# 主游戏函数
-def main():
-    # 初始化音效系统
-    sound_system = SoundSystem()
-    
-    # 初始化游戏
-    all_sprites, platforms, enemies, coins, megapixels, player = init_game(sound_system)
-    stars = create_stars(100)
-    
-    # 游戏状态
-    game_over = False
-    game_won = False
-    victory_sound_played = False
-    defeat_sound_played = False
-    running = True
-    
-    # 游戏主循环
-    while running:
-        # 控制游戏速度
-        clock.tick(FPS)
-        
-        # 处理事件
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_ESCAPE:
-                    running = False
-                if event.key == pygame.K_r:
-                    # 重新开始游戏
-                    all_sprites, platforms, enemies, coins, megapixels, player = init_game(sound_system)
-                    game_over = False
-                    game_won = False
-                    victory_sound_played = False
-                    defeat_sound_played = False
-        
-        if not game_over:
-            # 分别更新不同类型的精灵
-            player.update(platforms, enemies, coins, megapixels)
-            
-            # 更新敌人
-            for enemy in enemies:
-                enemy.update(platforms)
-            
-            # 更新金币
-            for coin in coins:
-                coin.update()
-            
-            # 更新MegaPixel
-            for megapixel in megapixels:
-                megapixel.update()
-            
-            # 检查游戏结束条件
-            if player.health <= 0:
-                game_over = True
-                game_won = False
-                if not defeat_sound_played:
-                    sound_system.play_sound('defeat')
-                    defeat_sound_played = True
-                    
-            if player.coins >= 50:
-                game_over = True
-                game_won = True
-                if not victory_sound_played:
-                    sound_system.play_sound('victory')
-                    victory_sound_played = True
-        
-        # 绘制
-        screen.fill(BACKGROUND)
-        
-        # 绘制星星
-        for star in stars:
-            x, y, size, brightness = star
-            color = (brightness, brightness, brightness)
-            pygame.draw.circle(screen, color, (x, y), size)
-        
-        # 绘制所有精灵
-        all_sprites.draw(screen)
-        
-        # 绘制UI
-        draw_top_ui(screen, player)
-        draw_bottom_menu(screen)
-        
-        # 绘制游戏结束画面
-        if game_over:
-            if game_won:
-                draw_victory_screen(screen, player)
-            else:
-                draw_defeat_screen(screen, player)
-        
-        # 更新显示
-        pygame.display.flip()
-    
-    # 退出游戏
-    pygame.quit()
-    sys.exit()
-
-# 运行游戏
-if __name__ == "__main__":
-    main()
+import time
+_import_started = time.perf_counter()
+
+import argparse
+import pygame
+import random
+import math
+import sys
+import os
+
+import numpy as np
+
+from entities import EntityStore, rect_round
+from hud import HUD
+from levelfile import LevelFile
+from levelgen import ChunkGenerator, ProceduralLevel
+from physics import sweep
+from pipeline import SimulationThread, SnapshotSprites
+from profiler import Profiler, ProfilerOverlay
+from render import DirtyRenderer, DrawList, Layers, SpriteLayer
+from replay import Replay
+from spatial import SpatialGroup
+from sprite_cache import VariantCache, frame_masks
+from startup import LazyFont, StartupReport
+from synth import SoundSynth
+from voices import SoundDispatcher
+from world import Camera, ChunkedWorld, LevelLayout
+
+# 注意：导入本模块没有任何副作用（不初始化 Pygame、不打开窗口），
+# 显示、混音器、字体和音效都由 App 在第一次使用时初始化
+
+# 游戏常量
+SCREEN_WIDTH = 1024
+SCREEN_HEIGHT = 768
+TILE_SIZE = 48
+FPS = 60
+
+# 颜色定义
+BACKGROUND = (25, 25, 50)
+UI_BACKGROUND = (40, 40, 80, 200)
+UI_BOTTOM_BACKGROUND = (30, 30, 60, 220)
+PLAYER_BLUE = (65, 105, 225)
+PLAYER_ACCENT = (100, 149, 237)
+ENEMY_RED = (220, 20, 60)
+ENEMY_ACCENT = (255, 99, 71)
+COIN_YELLOW = (255, 215, 0)
+COIN_GLOW = (255, 255, 100)
+MEGAPIXEL_PURPLE = (138, 43, 226)
+MEGAPIXEL_GLOW = (186, 85, 211)
+PLATFORM_COLOR = (101, 67, 33)
+PLATFORM_HIGHLIGHT = (139, 115, 85)
+TEXT_COLOR = (240, 240, 255)
+UI_ACCENT = (70, 130, 180)
+BUTTON_COLOR = (80, 80, 120)
+BUTTON_HOVER = (100, 100, 150)
+VICTORY_GOLD = (255, 215, 0)
+DEFEAT_RED = (200, 0, 0)
+
+# 金币样式：名字 -> (外圈颜色, 内圈颜色)
+COIN_STYLES = {
+    'gold': (COIN_YELLOW, COIN_GLOW),
+}
+# 金币旋转动画的角度步数（每种样式只预渲染一次，所有金币共享）
+COIN_ROTATION_STEPS = 36
+
+# 胜利所需金币数
+WIN_COINS = 50
+
+# 界面区域
+TOP_UI_RECT = pygame.Rect(0, 0, SCREEN_WIDTH, 80)
+BOTTOM_MENU_RECT = pygame.Rect(0, SCREEN_HEIGHT - 62, SCREEN_WIDTH, 62)
+SCREEN_RECT = pygame.Rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT)
+
+# 输入位掩码
+INPUT_LEFT = 1
+INPUT_RIGHT = 2
+INPUT_JUMP = 4
+# 重新开始游戏（R 键），和其他输入一起录进回放
+INPUT_RESET = 8
+
+# 加载字体（默认字体不可用时退回系统字体）
+def load_font(size, bold=False):
+    try:
+        return pygame.font.Font(None, size)
+    except:
+        return pygame.font.SysFont("arial", size, bold=bold)
+
+# 创建字体（第一次使用时才真正加载）
+title_font = LazyFont(lambda: load_font(64, bold=True))
+large_font = LazyFont(lambda: load_font(48))
+medium_font = LazyFont(lambda: load_font(36))
+small_font = LazyFont(lambda: load_font(24))
+tiny_font = LazyFont(lambda: load_font(18))
+FONTS = [title_font, large_font, medium_font, small_font, tiny_font]
+
+# 音效系统
+# 各音效的 (优先级, 最多同时播放的声部数)，见 voices.py
+# 胜利和失败优先级最高，受伤和 MegaPixel 次之，一串金币声最多占两个声道
+SOUND_VOICES = {
+    'victory': (3, 1),
+    'defeat': (3, 1),
+    'hurt': (2, 1),
+    'megapixel': (2, 1),
+    'enemy': (1, 2),
+    'jump': (1, 1),
+    'coin': (0, 2),
+}
+
+class SoundSystem:
+    def __init__(self):
+        self.sounds = {}
+        self.music_playing = False
+        self.load_sounds()
+        self.dispatcher = SoundDispatcher(self.sounds, SOUND_VOICES)
+        
+    def load_sounds(self):
+        # 尝试创建简单的音效
+        try:
+            self.synth = SoundSynth()
+            # 跳跃音效
+            self.sounds['jump'] = self.create_beep_sound(523, 100)
+            # 收集金币音效
+            self.sounds['coin'] = self.create_beep_sound(659, 150)
+            # 收集MegaPixel音效
+            self.sounds['megapixel'] = self.create_beep_sound(784, 200)
+            # 击败敌人音效
+            self.sounds['enemy'] = self.create_beep_sound(392, 100)
+            # 受伤音效
+            self.sounds['hurt'] = self.create_beep_sound(220, 200)
+            # 胜利音效
+            self.sounds['victory'] = self.create_victory_sound()
+            # 失败音效
+            self.sounds['defeat'] = self.create_defeat_sound()
+            
+            # 设置音量
+            for sound in self.sounds.values():
+                sound.set_volume(0.5)
+                
+        except Exception as e:
+            print(f"音效创建失败: {e}")
+            # 创建空的音效作为备用
+            for key in ['jump', 'coin', 'megapixel', 'enemy', 'hurt', 'victory', 'defeat']:
+                self.sounds[key] = pygame.mixer.Sound(bytes(0))
+    
+    def create_beep_sound(self, frequency, duration):
+        # 创建一个简单的正弦波音效
+        return self.synth.tone(frequency, duration)
+    
+    def create_victory_sound(self):
+        # 胜利音效 - 上升的音阶 C5, E5, G5, C6
+        return self.synth.sequence([(523, 100), (659, 100), (784, 100), (1047, 100)])
+    
+    def create_defeat_sound(self):
+        # 失败音效 - 下降的音阶 C5, G4, E4, C4
+        return self.synth.sequence([(523, 150), (392, 150), (330, 150), (262, 150)])
+    
+    # 只把请求放进队列（游戏逻辑的碰撞循环里会调用），由 flush() 每帧统一播放
+    def play_sound(self, sound_name):
+        self.dispatcher.play(sound_name)
+    
+    # 播放这一帧排队的音效：合并重复的请求，按优先级和声部数分配声道
+    def flush(self):
+        self.dispatcher.dispatch()
+    
+    def play_background_music(self):
+        # 尝试播放背景音乐
+        try:
+            # 创建一个简单的背景音乐循环
+            if not self.music_playing:
+                # 这里可以添加实际的音乐文件，现在使用静音
+                self.music_playing = True
+        except:
+            pass
+
+# 静音音效系统（无头模拟时使用，不需要混音器）
+class SilentSoundSystem:
+    def play_sound(self, sound_name):
+        pass
+
+    def flush(self):
+        pass
+
+    def play_background_music(self):
+        pass
+
+# 从键盘读取当前输入，转换为位掩码
+def read_inputs():
+    keys = pygame.key.get_pressed()
+    inputs = 0
+    if keys[pygame.K_LEFT] or keys[pygame.K_a]:
+        inputs |= INPUT_LEFT
+    if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
+        inputs |= INPUT_RIGHT
+    if keys[pygame.K_UP] or keys[pygame.K_w] or keys[pygame.K_SPACE]:
+        inputs |= INPUT_JUMP
+    return inputs
+
+# 绘制玩家外观变体：key = (朝向, 是否处于无敌闪烁的半透明状态)
+def build_player_variant(key):
+    direction, faded = key
+    
+    # 创建更精细的像素风格角色
+    image = pygame.Surface((TILE_SIZE, TILE_SIZE * 2), pygame.SRCALPHA)
+    
+    # 绘制角色身体
+    pygame.draw.rect(image, PLAYER_BLUE, (4, TILE_SIZE//2, TILE_SIZE-8, TILE_SIZE))
+    pygame.draw.rect(image, PLAYER_ACCENT, (8, TILE_SIZE//2+4, TILE_SIZE-16, TILE_SIZE-8))
+    
+    # 绘制头部
+    pygame.draw.rect(image, (255, 220, 177), (8, 4, TILE_SIZE-16, TILE_SIZE//2))
+    
+    # 绘制面部特征
+    pygame.draw.rect(image, (0, 0, 0), (TILE_SIZE//3, 16, 4, 4))
+    pygame.draw.rect(image, (0, 0, 0), (2*TILE_SIZE//3, 16, 4, 4))
+    pygame.draw.rect(image, (0, 0, 0), (TILE_SIZE//2-6, 28, 12, 3))
+    
+    if direction == -1:
+        image = pygame.transform.flip(image, True, False)
+    
+    if faded:
+        # 创建半透明效果
+        alpha_surface = pygame.Surface(image.get_size(), pygame.SRCALPHA)
+        alpha_surface.fill((255, 255, 255, 128))
+        image.blit(alpha_surface, (0, 0), special_flags=pygame.BLEND_RGBA_MULT)
+    return image
+
+# 玩家所有外观组合：朝向 x 是否半透明
+PLAYER_VARIANTS = [(1, False), (-1, False), (1, True), (-1, True)]
+
+# 玩家类
+class Player(pygame.sprite.Sprite):
+    # 外观变体缓存，所有玩家实例共享
+    variants = VariantCache(build_player_variant)
+    
+    # 物理属性（类属性，程序化关卡按它们计算跳跃范围；GameSim 会按参数覆盖实例的 jump_power）
+    speed = 6
+    jump_power = 16
+    gravity = 0.8
+    max_fall_speed = 12
+    max_health = 100
+    
+    # bounds 为玩家可以活动的世界范围
+    def __init__(self, x, y, sound_system, bounds=SCREEN_RECT):
+        super().__init__()
+        self.sound_system = sound_system
+        self.bounds = pygame.Rect(bounds)
+        
+        Player.variants.prebuild(PLAYER_VARIANTS)
+        self.base_image = Player.variants.get((1, False))
+        
+        self.image = self.base_image
+        self.rect = self.image.get_rect()
+        
+        self.reset(x, y)
+        
+    # 回到出生点并恢复初始状态（重新开始时原地复用玩家对象）
+    def reset(self, x, y):
+        self.image = self.base_image
+        self.rect.x = x
+        self.rect.y = y
+        self.velocity_x = 0
+        self.velocity_y = 0
+        
+        # 游戏属性
+        self.health = self.max_health
+        self.coins = 0
+        self.direction = 1  # 1 for right, -1 for left
+        self.on_ground = False
+        self.invincible = 0
+        self.invincible_flash = 0
+        
+    def handle_input(self, inputs):
+        # 水平移动
+        self.velocity_x = 0
+        if inputs & INPUT_LEFT:
+            self.velocity_x = -self.speed
+            self.direction = -1
+        if inputs & INPUT_RIGHT:
+            self.velocity_x = self.speed
+            self.direction = 1
+            
+        # 跳跃
+        if inputs & INPUT_JUMP and self.on_ground:
+            self.velocity_y = -self.jump_power
+            self.on_ground = False
+            self.sound_system.play_sound('jump')
+            
+    # dt 为这一步相当于几个逻辑帧：速度按帧计，位移为速度 × dt；
+    # 碰撞按整段位移连续检测（扫掠 AABB），无头批量运行时可以用较大的 dt 减少步数
+    def update(self, platforms, enemies, coins, megapixels, inputs=0, dt=1):
+        # 处理输入
+        self.handle_input(inputs)
+        
+        # 应用重力：按 dt 个子帧逐帧累加速度和位移，前 dt-1 个子帧的位置和 Rect 一样取整，
+        # 所以自由飞行时每一步结束的位置与 dt=1 逐帧模拟完全相同，粗步长不会降低跳跃高度
+        y = self.rect.y
+        for frame in range(dt):
+            self.velocity_y = min(self.velocity_y + self.gravity, self.max_fall_speed)
+            if frame < dt - 1:
+                y = int(rect_round(y + self.velocity_y))
+        dy = y - self.rect.y + self.velocity_y
+            
+        # 移动并解决与平台的碰撞，start 为这一步连续移动的起点
+        start = self.move(platforms, self.velocity_x * dt, dy)
+        
+        # 世界边界检查
+        bounds = self.bounds
+        if self.rect.left < bounds.left:
+            self.rect.left = bounds.left
+        if self.rect.right > bounds.right:
+            self.rect.right = bounds.right
+        if self.rect.top < bounds.top:
+            self.rect.top = bounds.top
+            self.velocity_y = 0
+        if self.rect.bottom > bounds.bottom:
+            self.rect.bottom = bounds.bottom
+            self.on_ground = True
+            self.velocity_y = 0
+        
+        # 敌人、金币和MegaPixel按可见的像素判定碰撞：存储按这一步扫过的矩形筛出候选，
+        # 再沿移动路径比较遮罩（见 touches），一步移动得再远也不会穿过它们
+        image = self.image
+        area = self.rect.union(pygame.Rect(start, self.rect.size))
+        
+        # 敌人碰撞检测
+        if self.invincible <= 0:
+            # 这一步开始时可见部分的下沿，用来判断是不是从上方踩到敌人头上
+            feet = start[1] + frame_masks.get(image).bounds.bottom
+            for enemy in enemies.query(area):
+                if self.touches(start, image, enemy.image, enemy.rect):
+                    # 从上方跳到敌人头上
+                    head = enemy.rect.y + frame_masks.get(enemy.image).bounds.top
+                    if (self.velocity_y > 0 or self.rect.y > start[1]) and feet <= head + 10:
+                        enemy.kill()
+                        self.velocity_y = -self.jump_power * 0.7  # 反弹
+                        self.coins += 5
+                        self.sound_system.play_sound('enemy')
+                    else:
+                        self.health -= 15
+                        self.invincible = 60  # 1秒无敌时间
+                        self.sound_system.play_sound('hurt')
+                        # 击退效果
+                        if self.rect.centerx < enemy.rect.centerx:
+                            self.velocity_x = -8
+                        else:
+                            self.velocity_x = 8
+                        self.velocity_y = -5
+        
+        # 收集金币
+        for coin in coins.query(area):
+            if self.touches(start, image, coin.image, coin.rect):
+                coin.kill()
+                self.coins += 1
+                self.sound_system.play_sound('coin')
+                
+        # 收集MegaPixel特殊物品
+        for megapixel in megapixels.query(area):
+            if self.touches(start, image, megapixel.image, megapixel.rect):
+                megapixel.kill()
+                self.coins += 10
+                self.health = min(self.max_health, self.health + 25)
+                self.sound_system.play_sound('megapixel')
+        
+        # 无敌时间处理
+        if self.invincible > 0:
+            self.invincible = max(0, self.invincible - dt)
+            self.invincible_flash = (self.invincible_flash + dt) % 10
+            
+        # 更新角色图像（考虑方向和无敌闪烁），只从预先生成的变体中取引用
+        faded = self.invincible > 0 and self.invincible_flash < 5
+        self.image = Player.variants.get((self.direction, faded))
+        
+        # 确保生命值不会低于0
+        if self.health <= 0:
+            self.health = 0
+
+    # 按位移 (dx, dy) 移动并解决与平台的碰撞（扫掠 AABB）
+    # 先把开始时已经嵌在平台里的情况推出去（出生点和平台重叠时会这样），然后沿位移找出最早
+    # 接触的平台：从上方落在平台上、从下方顶到平台或者被侧面挡住，在接触的那一刻停下这个轴，
+    # 剩下的位移沿另一个轴继续滑动，直到走完或者两个轴都被挡住
+    # 返回推出之后、连续移动开始时的位置（推出不算移动，不用来判断路上碰到了什么）
+    def move(self, platforms, dx, dy):
+        rect = self.rect
+        candidates = platforms.query(rect.union(rect.move(dx, dy)).inflate(2, 2))
+        self.on_ground = False
+        for platform in candidates:
+            other = platform.rect
+            if not rect.colliderect(other):
+                continue
+            if dy > 0 and rect.bottom > other.top and rect.top < other.top:
+                rect.bottom = other.top
+                self.on_ground = True
+                self.velocity_y = 0
+                dy = 0
+            elif dy < 0 and rect.top < other.bottom and rect.bottom > other.bottom:
+                rect.top = other.bottom
+                self.velocity_y = 0
+                dy = 0
+            elif dx > 0 and rect.right > other.left and rect.left < other.left:
+                rect.right = other.left
+            elif dx < 0 and rect.left < other.right and rect.right > other.right:
+                rect.left = other.right
+                
+        start = x, y = rect.x, rect.y
+        width, height = rect.size
+        # 每次接触都会停下一个轴，所以最多两次接触之后就走完了
+        for _ in range(3):
+            contact = None
+            for platform in candidates:
+                hit = sweep(x, y, width, height, dx, dy, *platform.rect)
+                if hit is not None and 0 <= hit[0] < 1 and (contact is None or hit[0] < contact[0]):
+                    contact = (hit[0], hit[2], platform.rect)
+            if contact is None:
+                x += dx
+                y += dy
+                break
+            t, axis, other = contact
+            if axis == 'y':
+                x += dx * t
+                dx -= dx * t
+                if dy > 0:
+                    # 从上方落在平台上
+                    y = other.top - height
+                    self.on_ground = True
+                else:
+                    # 从下方碰到平台
+                    y = other.bottom
+                dy = 0
+                self.velocity_y = 0
+            else:
+                # 水平碰撞
+                y += dy * t
+                dy -= dy * t
+                x = other.left - width if dx > 0 else other.right
+                dx = 0
+        rect.x = x
+        rect.y = y
+        return start
+        
+    # 这一步从 start 沿直线移动到当前位置的路上，可见像素是否碰到另一个精灵
+    # 先按两者可见部分的外框求重叠的时间段，再在这段时间里取一个位置比较遮罩：
+    # 结束时仍然重叠就取最终位置（和只看最终位置的判定一致），否则取穿过时的中点
+    def touches(self, start, image, other_image, other_rect):
+        own = frame_masks.get(image)
+        other = frame_masks.get(other_image)
+        dx = self.rect.x - start[0]
+        dy = self.rect.y - start[1]
+        hit = sweep(start[0] + own.bounds.x, start[1] + own.bounds.y, own.bounds.width, own.bounds.height,
+                    dx, dy, other_rect.x + other.bounds.x, other_rect.y + other.bounds.y,
+                    other.bounds.width, other.bounds.height)
+        if hit is None or hit[0] >= 1 or hit[1] <= 0:
+            return False
+        t0, t1, axis = hit
+        t = 1 if t1 > 1 else (max(t0, 0) + t1) / 2
+        probe = pygame.Rect(start, self.rect.size)
+        probe.x += dx * t
+        probe.y += dy * t
+        return own.mask.overlap(other.mask, (other_rect.x - probe.x, other_rect.y - probe.y)) is not None
+
+# 生成平台纹理：底色、顶部高光，以及每 8 像素一条的竖向纹理线
+# 这种纹理不含随机成分，种子只用作缓存键
+def build_platform_texture(key):
+    platform_type, width, height, seed = key
+    # 根据平台类型选择颜色
+    if platform_type == "normal":
+        base_color = PLATFORM_COLOR
+        highlight_color = PLATFORM_HIGHLIGHT
+    else:
+        base_color = (80, 80, 120)
+        highlight_color = (120, 120, 160)
+    
+    pixels = np.empty((width, height, 3), dtype=np.uint8)
+    pixels[:] = base_color
+    # 平台顶部
+    pixels[:, :4] = highlight_color
+    # 平台纹理
+    pixels[::8, 4:] = highlight_color
+    
+    image = pygame.Surface((width, height))
+    pygame.surfarray.blit_array(image, pixels)
+    return image
+
+# 平台类
+class Platform(pygame.sprite.Sprite):
+    # 纹理缓存：(类型, 宽, 高, 种子) -> 图像，相同的平台共用一张表面
+    textures = VariantCache(build_platform_texture)
+    
+    def __init__(self, x, y, width, height, platform_type="normal", seed=0):
+        super().__init__()
+        self.place(x, y, width, height, platform_type, seed)
+        
+    # 把平台对象放到新的位置（对象池复用平台时调用）
+    def place(self, x, y, width, height, platform_type="normal", seed=0):
+        self.image = Platform.textures.get((platform_type, width, height, seed))
+        self.rect = self.image.get_rect(topleft=(x, y))
+
+# 预渲染某种样式金币的全部旋转帧
+def build_coin_atlas(style):
+    outer_color, inner_color = COIN_STYLES[style]
+    base = pygame.Surface((TILE_SIZE//2, TILE_SIZE//2), pygame.SRCALPHA)
+    
+    # 绘制金币
+    pygame.draw.circle(base, outer_color, (TILE_SIZE//4, TILE_SIZE//4), TILE_SIZE//4)
+    pygame.draw.circle(base, inner_color, (TILE_SIZE//4, TILE_SIZE//4), TILE_SIZE//6)
+    
+    # 每一帧都从原始图像旋转，裁剪回原始大小，避免反复旋转造成的画质损失
+    atlas = []
+    base_rect = base.get_rect()
+    for step in range(COIN_ROTATION_STEPS):
+        rotated = pygame.transform.rotate(base, step * 360 / COIN_ROTATION_STEPS)
+        crop = base_rect.copy()
+        crop.center = rotated.get_rect().center
+        atlas.append(rotated.subsurface(crop).copy())
+    return atlas
+
+# 绘制某个脉动大小的MegaPixel图像
+def build_pulse_frame(pulse):
+    base_size = TILE_SIZE
+    size = base_size + pulse*2
+    frame = pygame.Surface((size, size), pygame.SRCALPHA)
+    
+    # 绘制发光效果
+    pygame.draw.rect(frame, (*MEGAPIXEL_GLOW[:3], 100), (0, 0, size, size))
+    
+    # 绘制MegaPixel核心
+    pygame.draw.rect(frame, MEGAPIXEL_PURPLE, (pulse, pulse, base_size, base_size))
+    pygame.draw.rect(frame, (160, 60, 220), (pulse+4, pulse+4, base_size-8, base_size-8))
+    pygame.draw.rect(frame, MEGAPIXEL_GLOW, (pulse+8, pulse+8, base_size-16, base_size-16))
+    return frame
+
+# 绘制敌人图像
+def build_enemy_image(style):
+    image = pygame.Surface((TILE_SIZE, TILE_SIZE), pygame.SRCALPHA)
+    
+    # 绘制敌人身体
+    pygame.draw.rect(image, ENEMY_RED, (4, 4, TILE_SIZE-8, TILE_SIZE-8))
+    pygame.draw.rect(image, ENEMY_ACCENT, (8, 8, TILE_SIZE-16, TILE_SIZE-16))
+    
+    # 绘制眼睛
+    pygame.draw.rect(image, (255, 255, 255), (12, 12, 6, 6))
+    pygame.draw.rect(image, (255, 255, 255), (TILE_SIZE-18, 12, 6, 6))
+    pygame.draw.rect(image, (0, 0, 0), (14, 14, 2, 2))
+    pygame.draw.rect(image, (0, 0, 0), (TILE_SIZE-16, 14, 2, 2))
+    return image
+
+# 平台的左、右、上边界数组，供敌人巡逻的向量化计算使用（按平台加入的顺序）
+def platform_extents(platforms):
+    rects = [platform.rect for platform in platforms]
+    left = np.array([rect.left for rect in rects], dtype=np.int64)
+    right = np.array([rect.right for rect in rects], dtype=np.int64)
+    top = np.array([rect.top for rect in rects], dtype=np.int64)
+    return left, right, top
+
+# 敌人：所有敌人的巡逻一次算完
+class EnemyStore(EntityStore):
+    COLUMNS = {'speed': np.int64, 'direction': np.int64}
+    images = VariantCache(build_enemy_image)
+    
+    # world_width 为敌人可以巡逻的世界宽度
+    def __init__(self, world_width=SCREEN_WIDTH):
+        super().__init__([EnemyStore.images.get('default')])
+        self.world_width = world_width
+        
+    def spawn_enemy(self, x, y, speed, chunk=-1, record=-1):
+        return self.spawn(x, y, chunk=chunk, record=record,
+                          speed=speed, direction=1 if speed > 0 else -1)
+        
+    # extents 为 platform_extents() 的结果，dt 为这一步相当于几个逻辑帧
+    def update(self, extents, dt=1):
+        n = self.size
+        plat_left, plat_right, plat_top = extents
+        if n == 0:
+            return
+        speed = self.speed[:n]
+        
+        self.x[:n] += speed * dt
+        left = self.x[:n]
+        right = left + self.w[:n]
+        bottom = self.y[:n] + self.h[:n]
+        
+        if len(plat_top) == 0:
+            # 没有平台时所有敌人都不在平台上
+            turn = np.ones(n, dtype=bool)
+        else:
+            # 平台边缘检测：每个敌人取第一个站立的平台
+            support = ((bottom[:, None] == plat_top) &
+                       (right[:, None] > plat_left) & (left[:, None] < plat_right))
+            on_platform = support.any(axis=1)
+            first = support.argmax(axis=1)
+            at_edge = (((speed > 0) & (right >= plat_right[first] - 5)) |
+                       ((speed < 0) & (left <= plat_left[first] + 5)))
+            # 走到平台边缘或者不在平台上，转向
+            turn = np.where(on_platform, at_edge, True)
+        
+        # 世界边界检查（与上面的转向叠加）
+        turn ^= (left < 0) | (right > self.world_width)
+        
+        sign = np.where(turn, -1, 1)
+        self.speed[:n] *= sign
+        self.direction[:n] *= sign
+
+# 金币：浮动和旋转帧一次算完
+class CoinStore(EntityStore):
+    COLUMNS = {'float_offset': np.float64, 'rotation': np.int64}
+    # 旋转帧图集：样式 -> [每个角度的图像]
+    atlases = VariantCache(build_coin_atlas)
+    
+    def __init__(self, style='gold'):
+        super().__init__(CoinStore.atlases.get(style))
+        
+    def spawn_coin(self, x, y, float_offset, chunk=-1, record=-1):
+        return self.spawn(x, y, chunk=chunk, record=record, float_offset=float_offset)
+        
+    def update(self, now, dt=1):
+        # now 为模拟时间（毫秒），dt 为这一步相当于几个逻辑帧
+        n = self.size
+        # 浮动效果（和 Rect 一样把坐标取整）
+        self.y[:n] = rect_round(self.y[:n] + np.sin(now / 300 + self.float_offset[:n]) * 0.8 * dt)
+        
+        # 旋转效果：只根据角度查表取帧
+        self.rotation[:n] = (self.rotation[:n] + 2 * dt) % 360
+        self.frame[:n] = self.rotation[:n] * COIN_ROTATION_STEPS // 360
+
+# MegaPixel 的最大脉动幅度（像素），帧下标 = 脉动 + MEGAPIXEL_PULSE
+MEGAPIXEL_PULSE = 4
+
+# MegaPixel 特殊物品：浮动和脉动一次算完
+class MegaPixelStore(EntityStore):
+    COLUMNS = {'float_offset': np.float64, 'pulse_timer': np.int64}
+    # 脉动帧缓存：脉动大小（整数像素）-> 图像，所有实例共享
+    pulse_frames = VariantCache(build_pulse_frame)
+    
+    def __init__(self):
+        super().__init__([MegaPixelStore.pulse_frames.get(pulse)
+                          for pulse in range(-MEGAPIXEL_PULSE, MEGAPIXEL_PULSE + 1)])
+        
+    def spawn_megapixel(self, x, y, float_offset, chunk=-1, record=-1):
+        return self.spawn(x, y, frame=MEGAPIXEL_PULSE, chunk=chunk, record=record,
+                          float_offset=float_offset)
+        
+    def update(self, now, dt=1):
+        # now 为模拟时间（毫秒），dt 为这一步相当于几个逻辑帧
+        n = self.size
+        # 浮动效果
+        self.y[:n] = rect_round(self.y[:n] + np.sin(now / 250 + self.float_offset[:n]) * 1.2 * dt)
+        
+        # 脉动效果：换成对应大小的帧，并以中心为基准调整矩形
+        self.pulse_timer[:n] += dt
+        pulse = np.trunc(np.sin(self.pulse_timer[:n] / 10) * MEGAPIXEL_PULSE).astype(np.int64)
+        self.frame[:n] = pulse + MEGAPIXEL_PULSE
+        growth = self.frame_sizes[self.frame[:n], 0] - self.w[:n]
+        self.x[:n] -= growth // 2
+        self.y[:n] -= growth // 2
+        self.w[:n] += growth
+        self.h[:n] += growth
+
+# 创建背景星星
+def create_stars(count):
+    stars = []
+    for _ in range(count):
+        x = random.randint(0, SCREEN_WIDTH)
+        y = random.randint(0, SCREEN_HEIGHT)
+        size = random.choice([1, 1, 1, 2, 2, 3])
+        brightness = random.randint(150, 255)
+        stars.append((x, y, size, brightness))
+    return stars
+
+# 预先烘焙天空（底色和星星），天空不随摄像机滚动
+def build_sky(stars):
+    sky = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+    sky.fill(BACKGROUND)
+    
+    for star in stars:
+        x, y, size, brightness = star
+        color = (brightness, brightness, brightness)
+        pygame.draw.circle(sky, color, (x, y), size)
+    return sky
+
+# 画出视野内的平台
+def draw_platforms(surface, platforms, camera):
+    offset = camera.offset
+    surface.blits([(platform.image, platform.rect.move(offset))
+                   for platform in platforms.query(camera.view)], doreturn=False)
+
+# 静态图层：天空不随摄像机滚动；平台图层在视野变化（摄像机移动或区块加载/卸载）时重画
+# 平台图层给出自己画到的屏幕矩形，渲染器只重画平台前后两个位置覆盖的区域
+# 摄像机不动时背景保持不变，渲染器只需要重画移动的精灵
+def add_static_layers(renderer, sim, sky):
+    renderer.add_static_layer('sky', lambda surface: surface.blit(sky, (0, 0)))
+    renderer.add_static_layer('platforms', lambda surface: draw_platforms(surface, sim.platforms, sim.camera),
+                              lambda: sim.view_version,
+                              lambda: platform_rects(sim.platforms, sim.camera))
+
+def platform_rects(platforms, camera):
+    offset = camera.offset
+    return [platform.rect.move(offset) for platform in platforms.query(camera.view)]
+
+# 流水线模式下的静态图层：平台来自当前的渲染快照，而不是正在另一个线程里推进的模拟
+def add_snapshot_layers(renderer, pipeline, sky):
+    renderer.add_static_layer('sky', lambda surface: surface.blit(sky, (0, 0)))
+    renderer.add_static_layer('platforms',
+                              lambda surface: surface.blits(pipeline.snapshot.platforms, doreturn=False),
+                              lambda: pipeline.snapshot.view_version,
+                              lambda: [image.get_rect(topleft=position)
+                                       for image, position in pipeline.snapshot.platforms])
+
+# 玩家的出生点
+PLAYER_SPAWN = (SCREEN_WIDTH // 4, SCREEN_HEIGHT // 2)
+
+# 一屏关卡的平台布局
+PLATFORM_DATA = [
+    (0, SCREEN_HEIGHT - 60, SCREEN_WIDTH, 60, "ground"),
+    (200, 600, 300, 20, "normal"),
+    (600, 500, 200, 20, "normal"),
+    (150, 400, 250, 20, "normal"),
+    (500, 350, 180, 20, "normal"),
+    (800, 300, 150, 20, "normal"),
+    (300, 250, 200, 20, "normal"),
+    (700, 200, 180, 20, "normal"),
+    (100, 150, 150, 20, "normal"),
+]
+
+# 生成关卡布局：把一屏的平台布局重复 screens 次，每一屏随机放置敌人、金币和 MegaPixel
+# 每个区块正好是一屏宽
+# rng 为随机数来源（random.Random 或 random 模块），enemy_speed 为敌人的最大速度
+def build_level(enemy_count=6, coin_count=15, megapixel_count=4, screens=1, rng=random, enemy_speed=2):
+    speeds = [speed for speed in range(-enemy_speed, enemy_speed + 1) if speed != 0]
+    layout = LevelLayout(SCREEN_WIDTH * screens, SCREEN_HEIGHT, SCREEN_WIDTH)
+    
+    # 创建平台
+    for screen in range(screens):
+        left = screen * SCREEN_WIDTH
+        for x, y, width, height, platform_type in PLATFORM_DATA:
+            layout.add('platforms', (left + x, y, width, height, platform_type))
+    
+    # 创建敌人：(x, y, 速度)
+    for screen in range(screens):
+        left = screen * SCREEN_WIDTH
+        for i in range(enemy_count):
+            x = left + rng.randint(100, SCREEN_WIDTH - 100)
+            y = rng.choice([550, 450, 350, 250])
+            layout.add('enemies', (x, y, rng.choice(speeds)))
+    
+    # 创建金币：(x, y, 浮动相位)
+    for screen in range(screens):
+        left = screen * SCREEN_WIDTH
+        for i in range(coin_count):
+            x = left + rng.randint(50, SCREEN_WIDTH - 50)
+            y = rng.randint(50, SCREEN_HEIGHT - 100)
+            layout.add('coins', (x, y, rng.random() * 2 * math.pi))
+    
+    # 创建MegaPixel物品：(x, y, 浮动相位)
+    for screen in range(screens):
+        left = screen * SCREEN_WIDTH
+        for i in range(megapixel_count):
+            x = left + rng.randint(100, SCREEN_WIDTH - 100)
+            y = rng.randint(100, SCREEN_HEIGHT - 200)
+            layout.add('megapixels', (x, y, rng.random() * 2 * math.pi))
+    
+    return layout
+
+# 程序化关卡的区块生成器（见 levelgen.py），尺寸和跳跃范围与游戏的常量和玩家的物理属性一致
+# 每个区块一屏宽，平台数与 PLATFORM_DATA 相同，其余数量与 build_level 的含义相同（每屏）
+def level_generator(enemy_count=6, coin_count=15, megapixel_count=4, enemy_speed=2, jump_power=Player.jump_power):
+    return ChunkGenerator(SCREEN_WIDTH, SCREEN_HEIGHT, (TILE_SIZE, TILE_SIZE * 2), Player.speed, jump_power,
+                          Player.gravity, Player.max_fall_speed, PLAYER_SPAWN, top=TOP_UI_RECT.bottom,
+                          enemy_size=TILE_SIZE, coin_size=TILE_SIZE // 2,
+                          megapixel_size=TILE_SIZE + 2 * MEGAPIXEL_PULSE,
+                          platform_count=len(PLATFORM_DATA) - 1, enemy_count=enemy_count,
+                          coin_count=coin_count, megapixel_count=megapixel_count, enemy_speed=enemy_speed)
+
+# 初始化游戏：创建玩家和空的平台组、实体存储，关卡内容由 GameSim 按区块加载
+def init_game(sound_system, layout, camera):
+    # 平台使用空间哈希索引；敌人、金币和 MegaPixel 保存在结构数组存储里，整批向量化更新
+    platforms = SpatialGroup()
+    enemies = EnemyStore(layout.width)
+    coins = CoinStore()
+    megapixels = MegaPixelStore()
+    
+    # 创建玩家
+    player = Player(*PLAYER_SPAWN, sound_system, layout.bounds)
+    
+    # all_sprites 只包含会移动的对象（静态平台烘焙在背景里），按 z 顺序从下到上分层；
+    # 特效层留给短暂的视觉效果
+    all_sprites = Layers([
+        ('pickups', DrawList(coins, megapixels)),
+        ('enemies', enemies),
+        ('player', SpriteLayer(player)),
+        ('effects', SpriteLayer()),
+    ], camera=camera)
+    
+    return all_sprites, platforms, enemies, coins, megapixels, player
+
+# 创建顶部UI面板（静态部分：半透明背景和标题）
+def draw_top_panel(surface):
+    # 绘制半透明UI背景
+    ui_bg = pygame.Surface((SCREEN_WIDTH, 80), pygame.SRCALPHA)
+    ui_bg.fill(UI_BACKGROUND)
+    surface.blit(ui_bg, (0, 0))
+    
+    # 游戏标题
+    title_text = small_font.render("MegaPixel v2.0", True, TEXT_COLOR)
+    surface.blit(title_text, (SCREEN_WIDTH // 2 - title_text.get_width() // 2, 25))
+
+# 渲染生命值条，value = (生命值, 最大生命值)
+def render_health_bar(value):
+    health, max_health = value
+    health_bar_width = 300
+    health_bar_height = 25
+    health_fill = (health / max_health) * health_bar_width
+    
+    # 生命值文本
+    health_text = medium_font.render(f"{health}/{max_health}", True, TEXT_COLOR)
+    
+    image = pygame.Surface((max(health_bar_width, health_text.get_width() + 5),
+                            max(health_bar_height, health_text.get_height() + 5)), pygame.SRCALPHA)
+    
+    # 生命值条背景
+    pygame.draw.rect(image, (60, 60, 80), (0, 0, health_bar_width, health_bar_height), border_radius=5)
+    # 生命值条填充
+    pygame.draw.rect(image, (50, 200, 100), (0, 0, health_fill, health_bar_height), border_radius=5)
+    # 生命值条边框
+    pygame.draw.rect(image, UI_ACCENT, (0, 0, health_bar_width, health_bar_height), 2, border_radius=5)
+    
+    image.blit(health_text, (5, 5))
+    return image, (20, 20)
+
+# 渲染金币计数
+def render_coin_counter(coins):
+    coins_text = medium_font.render(f"金币: {coins}/{WIN_COINS}", True, TEXT_COLOR)
+    return coins_text, (SCREEN_WIDTH - coins_text.get_width() - 20, 25)
+
+# 创建保留模式的界面层：静态部分只渲染一次，生命值和金币只在数值变化时重新渲染
+def build_hud(sim):
+    hud = HUD((SCREEN_WIDTH, SCREEN_HEIGHT))
+    hud.add_static(TOP_UI_RECT, draw_top_panel)
+    hud.add_static(BOTTOM_MENU_RECT, draw_bottom_menu)
+    hud.add_bound(lambda: (sim.player.health, sim.player.max_health), render_health_bar)
+    hud.add_bound(lambda: sim.player.coins, render_coin_counter)
+    return hud
+
+# 创建底部菜单
+def draw_bottom_menu(screen):
+    # 绘制底部菜单背景
+    bottom_bg = pygame.Surface((SCREEN_WIDTH, 60), pygame.SRCALPHA)
+    bottom_bg.fill(UI_BOTTOM_BACKGROUND)
+    screen.blit(bottom_bg, (0, SCREEN_HEIGHT - 60))
+    
+    # 绘制控制说明
+    controls_text = small_font.render("移动: WASD/方向键 | 跳跃: 空格/W/上箭头", True, TEXT_COLOR)
+    screen.blit(controls_text, (20, SCREEN_HEIGHT - 45))
+    
+    # 绘制按钮说明
+    button_text = small_font.render("R - 重新开始 | ESC - 退出游戏", True, TEXT_COLOR)
+    screen.blit(button_text, (SCREEN_WIDTH - button_text.get_width() - 20, SCREEN_HEIGHT - 45))
+    
+    # 绘制版本信息
+    version_text = tiny_font.render("MegaPixel 版本: 2.0 | 版权所有 © 2025 赵瀚", True, TEXT_COLOR)
+    screen.blit(version_text, (SCREEN_WIDTH // 2 - version_text.get_width() // 2, SCREEN_HEIGHT - 25))
+    
+    # 绘制底部装饰线
+    pygame.draw.line(screen, UI_ACCENT, (0, SCREEN_HEIGHT - 60), (SCREEN_WIDTH, SCREEN_HEIGHT - 60), 2)
+
+# 创建胜利界面
+def draw_victory_screen(screen, player):
+    # 创建半透明覆盖层
+    overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
+    overlay.fill((0, 0, 0, 180))
+    screen.blit(overlay, (0, 0))
+    
+    # 绘制胜利框
+    victory_rect = pygame.Rect(SCREEN_WIDTH//2 - 300, SCREEN_HEIGHT//2 - 150, 600, 300)
+    pygame.draw.rect(screen, (40, 40, 80, 240), victory_rect, border_radius=20)
+    pygame.draw.rect(screen, VICTORY_GOLD, victory_rect, 4, border_radius=20)
+    
+    # 绘制胜利标题
+    victory_text = title_font.render("胜利!", True, VICTORY_GOLD)
+    screen.blit(victory_text, (SCREEN_WIDTH//2 - victory_text.get_width()//2, SCREEN_HEIGHT//2 - 120))
+    
+    # 绘制分数
+    score_text = large_font.render(f"得分: {player.coins}", True, TEXT_COLOR)
+    screen.blit(score_text, (SCREEN_WIDTH//2 - score_text.get_width()//2, SCREEN_HEIGHT//2 - 40))
+    
+    # 绘制胜利图标
+    pygame.draw.circle(screen, VICTORY_GOLD, (SCREEN_WIDTH//2, SCREEN_HEIGHT//2 + 40), 40, 6)
+    pygame.draw.polygon(screen, VICTORY_GOLD, [
+        (SCREEN_WIDTH//2 - 20, SCREEN_HEIGHT//2 + 20),
+        (SCREEN_WIDTH//2 - 5, SCREEN_HEIGHT//2 + 40),
+        (SCREEN_WIDTH//2 + 25, SCREEN_HEIGHT//2 + 10)
+    ])
+
+# 创建失败界面
+def draw_defeat_screen(screen, player):
+    # 创建半透明覆盖层
+    overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
+    overlay.fill((0, 0, 0, 180))
+    screen.blit(overlay, (0, 0))
+    
+    # 绘制失败框
+    defeat_rect = pygame.Rect(SCREEN_WIDTH//2 - 300, SCREEN_HEIGHT//2 - 150, 600, 300)
+    pygame.draw.rect(screen, (60, 40, 40, 240), defeat_rect, border_radius=20)
+    pygame.draw.rect(screen, DEFEAT_RED, defeat_rect, 4, border_radius=20)
+    
+    # 绘制失败标题
+    defeat_text = title_font.render("你tm输了", True, DEFEAT_RED)
+    screen.blit(defeat_text, (SCREEN_WIDTH//2 - defeat_text.get_width()//2, SCREEN_HEIGHT//2 - 120))
+    
+    # 绘制分数
+    score_text = large_font.render(f"得分: {player.coins}", True, TEXT_COLOR)
+    screen.blit(score_text, (SCREEN_WIDTH//2 - score_text.get_width()//2, SCREEN_HEIGHT//2 - 40))
+    
+    # 绘制失败图标
+    pygame.draw.circle(screen, DEFEAT_RED, (SCREEN_WIDTH//2, SCREEN_HEIGHT//2 + 40), 40, 6)
+    pygame.draw.line(screen, DEFEAT_RED, 
+                    (SCREEN_WIDTH//2 - 25, SCREEN_HEIGHT//2 + 15),
+                    (SCREEN_WIDTH//2 + 25, SCREEN_HEIGHT//2 + 65), 8)
+    pygame.draw.line(screen, DEFEAT_RED, 
+                    (SCREEN_WIDTH//2 + 25, SCREEN_HEIGHT//2 + 15),
+                    (SCREEN_WIDTH//2 - 25, SCREEN_HEIGHT//2 + 65), 8)
+
+# 无渲染的固定步长游戏模拟核心
+# step() 只推进一个逻辑帧，不读取键盘、不绘制、不等待时钟，可在无窗口环境下全速运行
+# 关卡按区块流式加载：只有摄像机附近区块里的平台和实体参与模拟和绘制
+# 给出关卡文件（level，路径或已打开的 LevelFile）时关卡来自文件，否则随机生成
+# 给出种子（seed）时所有随机数都来自以它初始化的 random.Random，
+# 同样的种子和输入序列总是得到同样的结果（回放依赖这一点）
+# enemy_speed、jump_power、win_coins 是可以调整的难度参数（敌人最大速度、跳跃力度、胜利所需金币）
+# dt 为每次 step() 推进的逻辑帧数：碰撞按整段位移连续检测，所以无头批量运行可以用
+# dt=4 之类的粗步长，用四分之一的步数模拟同样长的时间（轨迹是近似的，不能和 dt=1 的回放混用）
+class GameSim:
+    def __init__(self, sound_system=None, enemy_count=6, coin_count=15, megapixel_count=4, screens=1,
+                 level=None, seed=None, enemy_speed=2, jump_power=16, win_coins=WIN_COINS, dt=1,
+                 procedural=False):
+        if not isinstance(dt, int) or dt < 1:
+            raise ValueError(f"dt 必须是正整数: {dt!r}")
+        self.sound_system = sound_system if sound_system is not None else SilentSoundSystem()
+        self.seed = seed
+        self.dt = dt
+        self.enemy_speed = enemy_speed
+        self.jump_power = jump_power
+        self.win_coins = win_coins
+        self.rng = random.Random(seed) if seed is not None else random
+        self.counts = dict(enemy_count=enemy_count, coin_count=coin_count, megapixel_count=megapixel_count)
+        self.screens = screens
+        # 给出路径时关卡文件由 GameSim 打开，也由 close() 关闭；传入的 LevelFile 由调用方负责关闭
+        self._owns_level = isinstance(level, str)
+        self.level = LevelFile(level) if self._owns_level else level
+        # procedural 为真时（且没有给出 level）使用程序化生成的关卡，区块在加载时才生成
+        self.generator = level_generator(enemy_speed=enemy_speed, jump_power=jump_power,
+                                         **self.counts) if procedural else None
+        # 视野（摄像机位置或已加载的平台）每变化一次加一，渲染端据此重新烘焙背景
+        self.view_version = 0
+        # 卸载区块时回收的平台对象，加载区块时优先复用
+        self.platform_pool = []
+        self.player = None
+        self.reset()
+
+    # 重新开始；给出 seed 时改用这个种子生成关卡（结果与 GameSim(seed=seed) 相同）
+    # 第一次之后，玩家、实体存储、平台对象和精灵图层都原地复用，只重新生成位置和状态
+    def reset(self, seed=None):
+        if seed is not None:
+            self.seed = seed
+            self.rng = random.Random(seed)
+        if self.level is not None:
+            self.layout = self.level
+        elif self.generator is not None:
+            # 关卡的种子取自 rng，所以同一个种子总是得到同一个关卡
+            self.layout = ProceduralLevel(self.generator, self.rng.randrange(2 ** 32), self.screens)
+        else:
+            self.layout = build_level(screens=self.screens, rng=self.rng, enemy_speed=self.enemy_speed,
+                                      **self.counts)
+        if self.player is None:
+            self.camera = Camera(SCREEN_WIDTH, SCREEN_HEIGHT, self.layout.bounds)
+            self.world = ChunkedWorld(self.layout.chunk_width, self.layout.chunk_count)
+            # 区块 -> 已经被收集或消灭的生成记录，重新加载区块时不再生成
+            self.consumed = {}
+            # 已加载区块 -> 该区块的平台
+            self.chunk_platforms = {}
+            (self.all_sprites, self.platforms, self.enemies,
+             self.coins, self.megapixels, self.player) = init_game(self.sound_system, self.layout, self.camera)
+        else:
+            # 卸载全部区块（平台回到对象池），清空实体存储，玩家回到出生点
+            for chunk in self.world.loaded:
+                self.release_platforms(chunk)
+            self.world.loaded.clear()
+            self.consumed.clear()
+            for store in (self.enemies, self.coins, self.megapixels):
+                store.empty()
+            self.camera.view.topleft = (0, 0)
+            self.player.reset(*PLAYER_SPAWN)
+        self.player.jump_power = self.jump_power
+        self.tick = 0
+        self.game_over = False
+        self.game_won = False
+        self.view_version += 1
+        self.update_world()
+
+    # 关闭 GameSim 自己打开的关卡文件（之后不能再使用这个模拟）
+    def close(self):
+        if self._owns_level:
+            self.level.close()
+            self._owns_level = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # 模拟时间（毫秒），由帧数推算，与真实时钟无关
+    @property
+    def time_ms(self):
+        return self.tick * 1000 // FPS
+
+    def step(self, inputs=0):
+        if inputs & INPUT_RESET:
+            self.reset()
+        if self.game_over:
+            return
+
+        self.tick += self.dt
+        self.update_player(inputs)
+        self.update_world()
+        self.update_enemies()
+        self.update_coins()
+        self.update_megapixels()
+        self.check_game_over()
+
+    # 与 step() 相同，但每个阶段都通过 timer.run(阶段, 函数, *参数) 调用，用于性能分析
+    def step_timed(self, inputs, timer):
+        if inputs & INPUT_RESET:
+            self.reset()
+        if self.game_over:
+            return
+
+        self.tick += self.dt
+        timer.run('player', self.update_player, inputs)
+        timer.run('world', self.update_world)
+        timer.run('enemies', self.update_enemies)
+        timer.run('coins', self.update_coins)
+        timer.run('megapixels', self.update_megapixels)
+        self.check_game_over()
+
+    # 以下是一帧模拟的各个阶段，step() 依次调用，性能测试时也可以单独调用
+    def update_player(self, inputs):
+        self.player.update(self.platforms, self.enemies, self.coins, self.megapixels, inputs, self.dt)
+
+    # 摄像机跟随玩家，并加载/卸载视野附近的区块
+    def update_world(self):
+        moved = self.camera.follow(self.player.rect)
+        load, unload = self.world.update(self.camera.view)
+        for chunk in unload:
+            self.unload_chunk(chunk)
+        for chunk in load:
+            self.load_chunk(chunk)
+        if load or unload:
+            self.platform_extents = platform_extents(self.platforms)
+        if moved or load or unload:
+            self.view_version += 1
+
+    def load_chunk(self, chunk):
+        records = self.layout.chunk(chunk)
+        consumed = self.consumed.get(chunk, {})
+        
+        platforms = [self.make_platform(record) for record in records['platforms']]
+        self.platforms.add(platforms)
+        self.chunk_platforms[chunk] = platforms
+        
+        for store, kind, spawn in ((self.enemies, 'enemies', self.enemies.spawn_enemy),
+                                   (self.coins, 'coins', self.coins.spawn_coin),
+                                   (self.megapixels, 'megapixels', self.megapixels.spawn_megapixel)):
+            skip = consumed.get(kind, ())
+            for record, values in enumerate(records[kind]):
+                if record not in skip:
+                    spawn(*values, chunk=chunk, record=record)
+
+    # 卸载区块时记下已经被收集或消灭的生成记录，其余实体下次加载时按原样重新生成
+    def unload_chunk(self, chunk):
+        self.release_platforms(chunk)
+        
+        records = self.layout.chunk(chunk)
+        consumed = self.consumed.setdefault(chunk, {})
+        for store, kind in ((self.enemies, 'enemies'), (self.coins, 'coins'),
+                            (self.megapixels, 'megapixels')):
+            alive = set(store.chunk_records(chunk))
+            consumed[kind] = {record for record in range(len(records[kind])) if record not in alive}
+            store.kill_chunk(chunk)
+
+    # 从对象池取出平台对象，池空时才新建
+    def make_platform(self, record):
+        if self.platform_pool:
+            platform = self.platform_pool.pop()
+            platform.place(*record)
+            return platform
+        return Platform(*record)
+
+    # 移除区块的平台，放回对象池
+    def release_platforms(self, chunk):
+        platforms = self.chunk_platforms.pop(chunk)
+        self.platforms.remove(platforms)
+        self.platform_pool.extend(platforms)
+
+    def update_enemies(self):
+        self.enemies.update(self.platform_extents, self.dt)
+
+    def update_coins(self):
+        self.coins.update(self.time_ms, self.dt)
+
+    def update_megapixels(self):
+        self.megapixels.update(self.time_ms, self.dt)
+
+    # 检查游戏结束条件
+    def check_game_over(self):
+        if self.player.health <= 0:
+            self.game_over = True
+            self.game_won = False
+            self.sound_system.play_sound('defeat')
+
+        if self.player.coins >= self.win_coins:
+            self.game_over = True
+            self.game_won = True
+            self.sound_system.play_sound('victory')
+
+# 模拟的关键状态（只含 JSON 可以表示的值），用于比较两次运行的结果是否一致
+def sim_state(sim):
+    player = sim.player
+    return {
+        'tick': sim.tick,
+        'player': [player.rect.x, player.rect.y],
+        'health': player.health,
+        'coins': player.coins,
+        'enemies': len(sim.enemies),
+        'coins_left': len(sim.coins),
+        'megapixels': len(sim.megapixels),
+        'game_over': sim.game_over,
+        'game_won': sim.game_won,
+    }
+
+# 当前帧需要显示的界面元素：(名字, 区域, 状态, 绘制函数)
+# 状态不变且没有被精灵覆盖时，渲染器不会重画该元素
+def game_overlays(sim, hud):
+    player = sim.player
+    overlays = [(f'hud{i}', rect, hud.version, hud.draw) for i, rect in enumerate(hud.regions())]
+    if sim.game_over:
+        if sim.game_won:
+            overlays.append(('result', SCREEN_RECT, True,
+                             lambda screen: draw_victory_screen(screen, player)))
+        else:
+            overlays.append(('result', SCREEN_RECT, False,
+                             lambda screen: draw_defeat_screen(screen, player)))
+    return overlays
+
+# 主循环中分别计时的阶段（F3 叠加层和 --profile 输出）
+# 流水线模式下模拟在另一个线程里，主线程只记录等待下一帧快照的时间（wait）
+PROFILE_PHASES = ['events', 'player', 'world', 'enemies', 'coins', 'megapixels', 'sound',
+                  'background', 'draw', 'hud', 'flip', 'wait']
+
+# 游戏应用：显示、混音器、字体和音效都在第一次用到时才初始化，
+# 各阶段的耗时记录在 report 中
+class App:
+    # screens 为关卡的宽度（屏数），level 为关卡文件的路径，seed 为随机种子，
+    # procedural 为真时使用程序化生成的关卡
+    def __init__(self, screens=1, level=None, seed=None, procedural=False):
+        self.screens = screens
+        self.level = level
+        self.procedural = procedural
+        self.seed = seed
+        self.report = StartupReport()
+        self.report.record('import', IMPORT_SECONDS)
+        self._screen = None
+        self._sound_system = None
+    
+    @property
+    def screen(self):
+        if self._screen is None:
+            with self.report.phase('display'):
+                pygame.display.init()
+                self._screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+                pygame.display.set_caption("MegaPixel v2.0 - 版权所有 © 2025 赵瀚")
+        return self._screen
+    
+    @property
+    def sound_system(self):
+        if self._sound_system is None:
+            with self.report.phase('sound'):
+                try:
+                    pygame.mixer.init()
+                    self._sound_system = SoundSystem()
+                except pygame.error as e:
+                    print(f"音频初始化失败: {e}")
+                    self._sound_system = SilentSoundSystem()
+        return self._sound_system
+    
+    def load_fonts(self):
+        with self.report.phase('fonts'):
+            for font in FONTS:
+                font.load()
+    
+    # record 为录制回放的文件路径；replay 为要播放的 Replay，播放时忽略键盘输入；
+    # profile 为性能数据的输出文件（.csv 或 .json），指定后从一开始就记录每一帧；
+    # pipeline 为 'thread' 时模拟在工作线程里与绘制并行（见 pipeline.py），
+    # 为 'serial' 时按同样的快照流程在主线程里串行执行（用于调试），不给出时使用普通的主循环
+    def run(self, startup_report=False, record=None, replay=None, profile=None, pipeline=None):
+        screen = self.screen
+        self.load_fonts()
+        sound_system = self.sound_system
+        
+        if replay is not None:
+            params = replay.params
+            seed = replay.seed
+            inputs_stream = replay.inputs()
+        else:
+            params = dict(screens=self.screens, level=self.level)
+            if self.procedural:
+                params['procedural'] = True
+            seed = self.seed
+            if record is not None and seed is None:
+                # 录制时必须有种子
+                seed = random.randrange(2 ** 32)
+        recording = Replay(seed, params) if record is not None else None
+        
+        # 初始化游戏
+        with self.report.phase('level'):
+            sim = GameSim(sound_system, seed=seed, **params)
+            sky = build_sky(create_stars(100))
+            renderer = DirtyRenderer(screen)
+            if pipeline is None:
+                frames = None
+                view = sim
+                sprites = sim.all_sprites
+                add_static_layers(renderer, sim, sky)
+            else:
+                # 界面和精灵都从快照读取，模拟只属于模拟线程
+                frames = SimulationThread(sim, threaded=pipeline == 'thread')
+                view = frames
+                sprites = SnapshotSprites()
+                add_snapshot_layers(renderer, frames, sky)
+            hud = build_hud(view)
+        
+        if startup_report:
+            print(self.report.format())
+        
+        # 性能分析：F3 显示/隐藏叠加层；只有显示叠加层或者需要保存数据时才计时
+        profiler = Profiler(PROFILE_PHASES)
+        profiler_overlay = ProfilerOverlay(profiler, tiny_font, (10, TOP_UI_RECT.bottom + 10), 1000 / FPS)
+        show_profiler = False
+        if profile is not None:
+            profiler.start_recording()
+        
+        clock = pygame.time.Clock()
+        running = True
+        restart = 0
+        
+        def draw_hud(dirty):
+            hud.update()
+            overlays = game_overlays(view, hud)
+            if show_profiler:
+                overlays.append(('profiler', profiler_overlay.rect, profiler_overlay.state,
+                                 profiler_overlay.draw))
+            return renderer.draw_overlays(sprites, overlays, dirty)
+        
+        # 游戏主循环：读取输入 -> 推进一帧模拟 -> 渲染
+        while running:
+            # 控制游戏速度（等待的时间不计入帧耗时）
+            clock.tick(FPS)
+            profiler.begin_frame()
+            
+            # 处理事件
+            for event in profiler.run('events', pygame.event.get):
+                if event.type == pygame.QUIT:
+                    running = False
+                if event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_ESCAPE:
+                        running = False
+                    if event.key == pygame.K_r:
+                        # 重新开始游戏（在下一次 step() 中执行，这样也会被录进回放）
+                        restart = INPUT_RESET
+                    if event.key == pygame.K_F3:
+                        show_profiler = not show_profiler
+                        if show_profiler:
+                            profiler.enable()
+                        elif profile is None:
+                            profiler.disable()
+                if event.type == pygame.WINDOWEXPOSED:
+                    renderer.invalidate()
+            
+            if replay is not None:
+                inputs = next(inputs_stream, None)
+                if inputs is None:
+                    break
+            else:
+                inputs = read_inputs() | restart
+                restart = 0
+            if recording is not None:
+                recording.record(inputs)
+            if frames is None:
+                sim.step_timed(inputs, profiler)
+                profiler.run('sound', sound_system.flush)
+            else:
+                # 模拟线程推进下一帧的同时，绘制当前快照
+                frames.submit(inputs)
+                sprites.show(frames.snapshot)
+            
+            # 摄像机移动或区块变化后重新合成静态图层（整屏重画）
+            profiler.run('background', renderer.compose_background)
+            
+            # 绘制（只提交发生变化的区域）
+            dirty = profiler.run('draw', renderer.draw_sprites, sprites)
+            dirty += profiler.run('hud', draw_hud, dirty)
+            profiler.run('flip', renderer.present, dirty)
+            if frames is not None:
+                # 模拟线程这时已经空闲，可以安全地取走它这一帧排队的音效
+                profiler.run('wait', frames.wait)
+                profiler.run('sound', sound_system.flush)
+            profiler.end_frame()
+        
+        if frames is not None:
+            frames.close()
+        if recording is not None:
+            recording.final = sim_state(sim)
+            recording.save(record)
+        sim.close()
+        if profile is not None:
+            profiler.save(profile)
+        
+        # 退出游戏
+        pygame.quit()
+
+# 主游戏函数
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="MegaPixel v2.0")
+    parser.add_argument('--startup-report', action='store_true', help="打印启动各阶段的耗时")
+    parser.add_argument('--screens', type=int, default=1, help="关卡宽度（屏数），超过一屏时摄像机跟随玩家滚动")
+    parser.add_argument('--level', help="从关卡文件（.mplv）加载关卡")
+    parser.add_argument('--seed', type=int, help="随机种子（同样的种子生成同样的关卡）")
+    parser.add_argument('--procedural', action='store_true',
+                        help="使用程序化生成的关卡：平台保证跳得上去，生成的区块缓存在磁盘上")
+    parser.add_argument('--record', metavar='PATH', help="把这局游戏录制成回放文件")
+    parser.add_argument('--replay', metavar='PATH', help="按正常速度播放回放文件")
+    parser.add_argument('--profile', metavar='PATH',
+                        help="记录每一帧各阶段的耗时，退出时保存为 CSV（.csv）或 Chrome trace（.json）")
+    parser.add_argument('--pipeline', choices=['thread', 'serial'],
+                        help="按渲染快照流水线运行：thread 在工作线程里推进模拟、与绘制并行，"
+                             "serial 在主线程里按同样的流程串行执行（用于调试）")
+    args = parser.parse_args(argv)
+    
+    replay = Replay.load(args.replay) if args.replay else None
+    App(screens=args.screens, level=args.level, seed=args.seed, procedural=args.procedural).run(
+        startup_report=args.startup_report, record=args.record, replay=replay, profile=args.profile,
+        pipeline=args.pipeline)
+    sys.exit()
+
+# 导入本模块所花的时间（包括导入 Pygame）
+IMPORT_SECONDS = time.perf_counter() - _import_started
+
+# 运行游戏
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+import os
+
+# 批量对局在无窗口、无声卡的环境下运行（子进程会继承这些环境变量）
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import argparse
+import itertools
+import json
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import MegaPixel2
+from MegaPixel2 import FPS, INPUT_JUMP, INPUT_LEFT, INPUT_RIGHT
+from bench import scripted_input
+
+# 批量对局：用于平衡关卡难度
+# 把 (参数组合 x 种子) 的无头对局分发到进程池里运行，每局结束后立即把结果
+# 追加写入 JSON Lines 文件，并汇总成按参数组合分组的表格。
+# 再次运行同样的命令时会跳过输出文件中已经完成的对局，所以中断后可以继续。
+#
+#   python batch.py --episodes 500 --param jump_power=14,16,18 --param win_coins=30,50 \
+#       --policy random --output balance.jsonl
+
+# 可以调整的参数（GameSim 的关键字参数）及其类型
+PARAMS = {
+    'enemy_count': int,
+    'coin_count': int,
+    'megapixel_count': int,
+    'enemy_speed': int,
+    'jump_power': int,
+    'win_coins': int,
+    'screens': int,
+    # 每步推进的逻辑帧数，粗步长（如 dt=4）可以用更少的步数跑完长时间的对局
+    'dt': int,
+    # 1 时使用程序化生成的关卡（levelgen.py），0 时使用固定的平台布局
+    'procedural': int,
+}
+
+# 随机策略：每个动作保持一段随机的时间（5 到 30 个逻辑帧，按 sim.tick 计，与步长 dt 无关）
+RANDOM_ACTIONS = [0, INPUT_LEFT, INPUT_RIGHT, INPUT_JUMP, INPUT_LEFT | INPUT_JUMP, INPUT_RIGHT | INPUT_JUMP]
+
+class RandomPolicy:
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+        self.action = 0
+        self.until = 0
+
+    def __call__(self, tick):
+        # 动作的时间表只由种子决定，粗步长只是按 dt 对同一个时间表取样
+        while tick >= self.until:
+            self.action = self.rng.choice(RANDOM_ACTIONS)
+            self.until += self.rng.randint(5, 30)
+        return self.action
+
+def make_policy(name, seed):
+    if name == 'scripted':
+        return scripted_input
+    return RandomPolicy(seed)
+
+# 对局的标识：参数组合、策略、帧数上限和种子都相同才是同一局
+def episode_id(params, policy, max_ticks, seed):
+    return f"{json.dumps(params, sort_keys=True)}/{policy}/{max_ticks}/{seed}"
+
+# 每个子进程里复用的模拟：(参数组合, GameSim)。同一组参数换种子时用 reset(seed) 原地重新开始，
+# 参数组合变化时先关闭旧的模拟（释放它打开的资源）再新建
+_sim = None
+
+# 运行一局（在子进程中执行），返回结果
+def run_episode(params, policy, max_ticks, seed):
+    global _sim
+    key = json.dumps(params, sort_keys=True)
+    if _sim is not None and _sim[0] == key:
+        sim = _sim[1]
+        sim.reset(seed)
+    else:
+        if _sim is not None:
+            _sim[1].close()
+        sim = MegaPixel2.GameSim(seed=seed, **params)
+        _sim = (key, sim)
+    act = make_policy(policy, seed)
+    damage = 0
+    health = sim.player.health
+    while not sim.game_over and sim.tick < max_ticks:
+        sim.step(act(sim.tick))
+        if sim.player.health < health:
+            damage += health - sim.player.health
+        health = sim.player.health
+    return {
+        'id': episode_id(params, policy, max_ticks, seed),
+        'params': params,
+        'policy': policy,
+        'max_ticks': max_ticks,
+        'seed': seed,
+        'won': sim.game_won,
+        'lost': sim.game_over and not sim.game_won,
+        'ticks': sim.tick,
+        'coins': sim.player.coins,
+        'damage': damage,
+    }
+
+# 按 (参数组合, 策略, 帧数上限) 汇总结果
+class Summary:
+    def __init__(self):
+        self.groups = {}
+
+    def add(self, result):
+        key = (json.dumps(result['params'], sort_keys=True), result['policy'], result['max_ticks'])
+        group = self.groups.setdefault(key, {'episodes': 0, 'won': 0, 'lost': 0,
+                                             'ticks': 0, 'coins': 0, 'damage': 0})
+        group['episodes'] += 1
+        group['won'] += result['won']
+        group['lost'] += result['lost']
+        group['ticks'] += result['ticks']
+        group['coins'] += result['coins']
+        group['damage'] += result['damage']
+
+    def format(self):
+        lines = [f"{'params':<48}{'policy':<10}{'max ticks':>10}{'episodes':>9}{'win %':>8}{'loss %':>8}"
+                 f"{'time s':>9}{'coins':>8}{'damage':>8}"]
+        for (params, policy, max_ticks), group in sorted(self.groups.items()):
+            n = group['episodes']
+            lines.append(f"{params:<48}{policy:<10}{max_ticks:>10}{n:>9}{group['won'] / n * 100:>8.1f}{group['lost'] / n * 100:>8.1f}"
+                         f"{group['ticks'] / n / FPS:>9.1f}{group['coins'] / n:>8.1f}{group['damage'] / n:>8.1f}")
+        return '\n'.join(lines)
+
+# 解析 --param 名字=值1,值2,...
+def parse_param(text):
+    name, _, values = text.partition('=')
+    if name not in PARAMS or not values:
+        raise argparse.ArgumentTypeError(f"未知参数或缺少取值: {text}（可用: {', '.join(PARAMS)}）")
+    try:
+        return name, [PARAMS[name](value) for value in values.split(',')]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"参数取值无效: {text}")
+
+# 已经完成的对局（忽略被中断时写了一半的最后一行）
+def load_results(path):
+    results = []
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    results.append(json.loads(line))
+                except ValueError:
+                    pass
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="MegaPixel2 批量对局")
+    parser.add_argument('--episodes', type=int, default=100, help="每个参数组合的对局数（种子 0..N-1）")
+    parser.add_argument('--param', type=parse_param, action='append', default=[],
+                        metavar='NAME=V1,V2', help="参数及其取值，多个 --param 取笛卡尔积")
+    parser.add_argument('--policy', choices=['scripted', 'random'], default='random')
+    parser.add_argument('--max-ticks', type=int, default=FPS * 180, help="每局最多模拟的帧数")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="进程数")
+    parser.add_argument('--output', default='batch.jsonl', help="逐局结果（JSON Lines），也用于断点续跑")
+    args = parser.parse_args(argv)
+
+    names = [name for name, values in args.param]
+    param_sets = [dict(zip(names, values))
+                  for values in itertools.product(*(values for name, values in args.param))]
+    episodes = [(params, args.policy, args.max_ticks, seed)
+                for params in param_sets for seed in range(args.episodes)]
+
+    # 只汇总属于这次对局集合的结果（输出文件里可能还有其他策略、帧数上限或种子的对局）
+    wanted = {episode_id(*episode) for episode in episodes}
+    summary = Summary()
+    done = set()
+    for result in load_results(args.output):
+        if result.get('id') in wanted and result['id'] not in done:
+            done.add(result['id'])
+            summary.add(result)
+    pending = [episode for episode in episodes if episode_id(*episode) not in done]
+    print(f"{len(episodes)} 局，已完成 {len(episodes) - len(pending)} 局，使用 {args.workers} 个进程",
+          file=sys.stderr)
+
+    started = time.perf_counter()
+    with open(args.output, 'a', encoding='utf-8') as output, \
+         ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(run_episode, *episode) for episode in pending]
+        try:
+            for finished, future in enumerate(as_completed(futures), 1):
+                result = future.result()
+                output.write(json.dumps(result) + '\n')
+                output.flush()
+                summary.add(result)
+                if finished % 100 == 0 or finished == len(futures):
+                    elapsed = time.perf_counter() - started
+                    print(f"{finished}/{len(futures)} 局，{finished / elapsed:.1f} 局/秒", file=sys.stderr)
+        except KeyboardInterrupt:
+            # 已经写入的结果会在下次运行时保留
+            for future in futures:
+                future.cancel()
+            print("已中断，再次运行同样的命令可以继续", file=sys.stderr)
+
+    print(summary.format())
+
+if __name__ == "__main__":
+    main()
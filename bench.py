@@ -0,0 +1,281 @@
+import os
+
+# 性能测试在无窗口、无声卡的环境下运行
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import argparse
+import importlib.util
+import json
+import math
+import platform
+import random
+import sys
+import time
+
+import pygame
+
+import MegaPixel2
+from MegaPixel2 import INPUT_JUMP, INPUT_LEFT, INPUT_RIGHT
+from render import DirtyRenderer
+from replay import Replay
+
+# 无头性能测试：在 init_game() 的关卡布局上生成指定数量的敌人/金币/MegaPixel，
+# 用脚本化输入运行若干帧，分别统计每个阶段（玩家、区块加载、敌人、金币、MegaPixel、
+# 精灵绘制、界面、提交显示）的耗时分位数，并输出 JSON 方便比较多次运行的结果
+# --screens 让 MegaPixel2 的关卡变宽（数量为每屏的数量），用来检查每帧开销是否与关卡长度无关
+#
+#   python bench.py --counts 10 100 1000 10000 --frames 300 --output bench.json
+#   python bench.py --game v2 --counts 100 --screens 1 100 500
+
+PHASES = ['player', 'world', 'enemies', 'coins', 'megapixels', 'draw', 'hud', 'flip']
+PERCENTILES = [50, 90, 99]
+
+# 原版游戏的文件名里带点，只能按路径加载
+def load_v1():
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'MegaPixel.py.py')
+    spec = importlib.util.spec_from_file_location('MegaPixel_v1', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+# 脚本化输入：左右来回跑，并定期起跳
+def scripted_input(tick):
+    inputs = INPUT_RIGHT if (tick // 90) % 2 == 0 else INPUT_LEFT
+    if tick % 40 < 10:
+        inputs |= INPUT_JUMP
+    return inputs
+
+# 把输入位掩码伪装成 pygame.key.get_pressed() 的结果，供原版游戏使用
+class ScriptedKeys:
+    def __init__(self, inputs):
+        self.inputs = inputs
+
+    def __getitem__(self, key):
+        if key in (pygame.K_LEFT, pygame.K_a):
+            return bool(self.inputs & INPUT_LEFT)
+        if key in (pygame.K_RIGHT, pygame.K_d):
+            return bool(self.inputs & INPUT_RIGHT)
+        if key in (pygame.K_UP, pygame.K_w, pygame.K_SPACE):
+            return bool(self.inputs & INPUT_JUMP)
+        return False
+
+# 记录每个阶段每一帧的耗时
+class PhaseTimer:
+    def __init__(self):
+        self.samples = {phase: [] for phase in PHASES}
+        self.frames = []
+        # 每帧是否整屏提交，以及提交到显示器的面积占整个屏幕的比例
+        self.presented = []
+
+    def run(self, phase, function, *args):
+        started = time.perf_counter()
+        result = function(*args)
+        self.samples[phase].append(time.perf_counter() - started)
+        return result
+
+    def end_frame(self, started, renderer=None):
+        self.frames.append(time.perf_counter() - started)
+        if renderer is not None:
+            screen = renderer.screen
+            self.presented.append((renderer.presented_full,
+                                   renderer.presented_area / (screen.get_width() * screen.get_height())))
+
+    def summary(self):
+        # 没有用到的阶段（例如原版游戏没有区块加载）不出现在结果里
+        phases = {phase: summarize(samples) for phase, samples in self.samples.items() if samples}
+        phases['frame'] = summarize(self.frames)
+        return phases
+
+    # 提交面积：整屏提交的帧数，以及每帧提交面积占屏幕比例的平均值和最大值（重叠的矩形重复计算）
+    # 摄像机滚动时只提交平台前后位置和精灵的矩形，预热之后整屏提交的帧数应该为 0
+    def presented_summary(self):
+        if not self.presented:
+            return {}
+        areas = [area for full, area in self.presented]
+        return {
+            'full_frames': sum(1 for full, area in self.presented if full),
+            'mean': sum(areas) / len(areas),
+            'max': max(areas),
+        }
+
+# 耗时分位数（毫秒）
+def summarize(samples):
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    summary = {f'p{p}': ordered[min(len(ordered) - 1, len(ordered) * p // 100)] * 1000
+               for p in PERCENTILES}
+    summary['max'] = ordered[-1] * 1000
+    summary['mean'] = sum(ordered) / len(ordered) * 1000
+    return summary
+
+# inputs 为逐帧的输入（例如回放），不给出时使用脚本化输入，并保持玩家存活
+def bench_v2(count, frames, warmup, screens=1, sim=None, inputs=None):
+    screen = pygame.display.set_mode((MegaPixel2.SCREEN_WIDTH, MegaPixel2.SCREEN_HEIGHT))
+    if sim is None:
+        sim = MegaPixel2.GameSim(enemy_count=count, coin_count=count, megapixel_count=count, screens=screens)
+    if inputs is None:
+        # 脚本输入会很快吃够金币，不设胜利条件，否则之后的帧只剩结算画面；
+        # 敌人很多时一帧里可能同时碰到好几个敌人，所以生命上限也要足够大
+        sim.win_coins = math.inf
+        sim.player.max_health = 10 ** 6
+    hud = MegaPixel2.build_hud(sim)
+    renderer = DirtyRenderer(screen)
+    sky = MegaPixel2.build_sky(MegaPixel2.create_stars(100))
+    MegaPixel2.add_static_layers(renderer, sim, sky)
+
+    def draw_sprites():
+        renderer.compose_background()
+        return renderer.draw_sprites(sim.all_sprites)
+
+    def draw_hud(dirty):
+        hud.update()
+        return renderer.draw_overlays(sim.all_sprites, MegaPixel2.game_overlays(sim, hud), dirty)
+
+    timer = PhaseTimer()
+    for tick in range(warmup + frames):
+        if tick == warmup:
+            timer = PhaseTimer()
+        started = time.perf_counter()
+        if inputs is None:
+            # 保持玩家存活，保证每一帧都执行完整的更新
+            sim.player.health = sim.player.max_health
+            tick_inputs = scripted_input(tick)
+        else:
+            tick_inputs = int(inputs[tick])
+        # 与 GameSim.step() 相同的阶段，分别计时
+        sim.step_timed(tick_inputs, timer)
+        dirty = timer.run('draw', draw_sprites)
+        dirty += timer.run('hud', draw_hud, dirty)
+        timer.run('flip', renderer.present, dirty)
+        timer.end_frame(started, renderer)
+
+    if inputs is None and sim.game_over:
+        # 游戏结束后 step 直接返回，各模拟阶段会从结果里消失
+        raise RuntimeError(f"脚本输入的对局在第 {sim.tick} 帧结束，模拟阶段的计时不完整")
+    remaining = {'enemies': len(sim.enemies), 'coins': len(sim.coins), 'megapixels': len(sim.megapixels)}
+    return timer, remaining
+
+def bench_v1(v1, count, frames, warmup):
+    screen = pygame.display.set_mode((v1.SCREEN_WIDTH, v1.SCREEN_HEIGHT))
+    all_sprites, platforms, enemies, coins, megapixels, player = v1.init_game(count, count, count)
+    hud = v1.build_hud(player, megapixels)
+    renderer = DirtyRenderer(screen)
+    renderer.set_background(v1.build_background(platforms))
+
+    def draw_hud(dirty):
+        hud.update()
+        return renderer.draw_overlays(all_sprites, v1.hud_overlays(player, hud, False, False), dirty)
+
+    timer = PhaseTimer()
+    for tick in range(warmup + frames):
+        if tick == warmup:
+            timer = PhaseTimer()
+        started = time.perf_counter()
+        player.health = 100
+        timer.run('player', player.update, platforms, enemies, coins, megapixels,
+                  ScriptedKeys(scripted_input(tick)))
+        timer.run('enemies', enemies.update, platforms)
+        timer.run('coins', coins.update)
+        timer.run('megapixels', megapixels.update)
+        dirty = timer.run('draw', renderer.draw_sprites, all_sprites)
+        dirty += timer.run('hud', draw_hud, dirty)
+        timer.run('flip', renderer.present, dirty)
+        timer.end_frame(started, renderer)
+
+    remaining = {'enemies': len(enemies), 'coins': len(coins), 'megapixels': len(megapixels)}
+    return timer, remaining
+
+def format_table(results):
+    lines = [f"{'game':<12}{'count':>7}{'screens':>8}  {'phase':<11}" +
+             ''.join(f"{f'p{p}':>9}" for p in PERCENTILES) + f"{'max':>9}"]
+    for result in results:
+        for phase, summary in result['phases'].items():
+            lines.append(f"{result['game']:<12}{result['count']:>7}{result['screens']:>8}  {phase:<11}" +
+                         ''.join(f"{summary[f'p{p}']:9.3f}" for p in PERCENTILES) +
+                         f"{summary['max']:9.3f}")
+    return '\n'.join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="MegaPixel 无头性能测试")
+    parser.add_argument('--game', choices=['v1', 'v2', 'both'], default='both')
+    parser.add_argument('--counts', type=int, nargs='+', default=[10, 100, 1000],
+                        help="每种实体（敌人、金币、MegaPixel）的数量")
+    parser.add_argument('--screens', type=int, nargs='+', default=[1],
+                        help="MegaPixel2 关卡宽度（屏数），可以给出多个")
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--warmup', type=int, default=30)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--replay', help="用回放文件作为 MegaPixel2 的负载（代替脚本化输入）")
+    parser.add_argument('--output', help="把结果写入 JSON 文件")
+    args = parser.parse_args(argv)
+
+    pygame.display.init()
+    games = ['v1', 'v2'] if args.game == 'both' else [args.game]
+    v1 = load_v1() if 'v1' in games else None
+
+    results = []
+    if args.replay:
+        # 回放决定了关卡、输入和帧数
+        replay = Replay.load(args.replay)
+        inputs = replay.input_array()
+        warmup = min(args.warmup, len(inputs))
+        with MegaPixel2.GameSim(seed=replay.seed, **replay.params) as sim:
+            timer, remaining = bench_v2(None, len(inputs) - warmup, warmup, sim=sim, inputs=inputs)
+        results.append({
+            'game': 'MegaPixel2',
+            'count': sim.counts['enemy_count'],
+            'screens': sim.screens,
+            'frames': len(inputs) - warmup,
+            'replay': args.replay,
+            'remaining': remaining,
+            'phases': timer.summary(),
+            'presented': timer.presented_summary(),
+        })
+        games = []
+
+    for game in games:
+        # 原版游戏只有一屏
+        for screens in (args.screens if game == 'v2' else [1]):
+            for count in args.counts:
+                random.seed(args.seed)
+                if game == 'v1':
+                    timer, remaining = bench_v1(v1, count, args.frames, args.warmup)
+                else:
+                    timer, remaining = bench_v2(count, args.frames, args.warmup, screens)
+                results.append({
+                    'game': 'MegaPixel' if game == 'v1' else 'MegaPixel2',
+                    'count': count,
+                    'screens': screens,
+                    'frames': args.frames,
+                    'remaining': remaining,
+                    'phases': timer.summary(),
+                    'presented': timer.presented_summary(),
+                })
+                presented = results[-1]['presented']
+                print(f"{results[-1]['game']} x{count} ({screens} 屏): "
+                      f"帧耗时 p50 {results[-1]['phases']['frame']['p50']:.3f} ms, "
+                      f"提交面积 平均 {presented['mean']:.0%} 最大 {presented['max']:.0%}, "
+                      f"整屏提交 {presented['full_frames']} 帧", file=sys.stderr)
+
+    print(format_table(results))
+    if args.output:
+        report = {
+            'meta': {
+                'python': platform.python_version(),
+                'pygame': pygame.version.ver,
+                'machine': platform.machine(),
+                'seed': args.seed,
+                'warmup': args.warmup,
+                'unit': 'ms',
+            },
+            'results': results,
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    pygame.quit()
+
+if __name__ == "__main__":
+    main()
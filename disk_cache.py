@@ -0,0 +1,11 @@
+import os
+
+# 磁盘缓存根目录，可以用环境变量 MEGAPIXEL_CACHE_DIR 覆盖
+CACHE_ROOT = os.environ.get('MEGAPIXEL_CACHE_DIR',
+                            os.path.join(os.path.expanduser('~'), '.cache', 'megapixel'))
+
+# 返回（必要时创建）某一类缓存的目录
+def cache_dir(name):
+    path = os.path.join(CACHE_ROOT, name)
+    os.makedirs(path, exist_ok=True)
+    return path
@@ -0,0 +1,177 @@
+import numpy as np
+import pygame
+
+# 与给 Rect 的坐标赋浮点数时相同的取整（四舍五入，0.5 远离零）
+def rect_round(values):
+    whole = np.trunc(values)
+    return (whole + np.sign(values) * (np.abs(values - whole) >= 0.5)).astype(np.int64)
+
+# 结构数组（SoA）实体存储
+# 同一类实体的全部状态按列保存在 NumPy 数组里，整批实体的更新用向量运算一次完成；
+# 只有在碰撞处理或者绘制时，才把单个实体具体化为精灵视图（EntityView）。
+# 对玩家的碰撞代码来说，它和 SpatialGroup 一样提供 query(rect)；
+# 对渲染器来说，它和 RenderUpdates 一样提供 clear()/draw()。
+# 死亡实体的槽位会被回收，供之后生成的实体复用。
+class EntityStore:
+    # 所有存储共有的列：位置、尺寸（与 Rect 一样是整数）、当前帧、存活标记，
+    # 以及实体来自哪个世界区块的哪条生成记录（-1 表示不属于任何区块）
+    BASE_COLUMNS = {'x': np.int64, 'y': np.int64, 'w': np.int64, 'h': np.int64,
+                    'frame': np.int64, 'alive': np.bool_, 'chunk': np.int64, 'record': np.int64}
+    # 子类追加的列：名字 -> dtype
+    COLUMNS = {}
+
+    def __init__(self, frames, capacity=64):
+        # 所有实体共享的帧图像，frame 列保存的是这里的下标
+        self.frames = np.empty(len(frames), dtype=object)
+        for i, frame in enumerate(frames):
+            self.frames[i] = frame
+        self.frame_sizes = np.array([frame.get_size() for frame in frames], dtype=np.int64)
+
+        self.capacity = capacity
+        for name, dtype in {**self.BASE_COLUMNS, **self.COLUMNS}.items():
+            setattr(self, name, np.zeros(capacity, dtype=dtype))
+        # 使用过的槽位数量（之后的槽位从未使用过）
+        self.size = 0
+        self.free = []
+        self.alive_count = 0
+        # 上一帧绘制的矩形，用于擦除
+        self.drawn_rects = []
+
+    def column_names(self):
+        return list({**self.BASE_COLUMNS, **self.COLUMNS})
+
+    # 生成一个实体，返回它的槽位下标；未给出的列置零
+    def spawn(self, x, y, frame=0, chunk=-1, record=-1, **values):
+        if self.free:
+            index = self.free.pop()
+        else:
+            if self.size == self.capacity:
+                self._grow()
+            index = self.size
+            self.size += 1
+
+        for name in self.COLUMNS:
+            getattr(self, name)[index] = values.get(name, 0)
+        self.x[index] = x
+        self.y[index] = y
+        self.frame[index] = frame
+        self.chunk[index] = chunk
+        self.record[index] = record
+        self.w[index], self.h[index] = self.frame_sizes[frame]
+        self.alive[index] = True
+        self.alive_count += 1
+        return index
+
+    def kill(self, index):
+        if self.alive[index]:
+            self.alive[index] = False
+            self.free.append(index)
+            self.alive_count -= 1
+
+    # 区块中仍然存活的实体的生成记录编号
+    def chunk_records(self, chunk):
+        n = self.size
+        return self.record[:n][self.alive[:n] & (self.chunk[:n] == chunk)].tolist()
+
+    # 移除某个区块的全部实体（区块卸载时调用）
+    def kill_chunk(self, chunk):
+        n = self.size
+        for index in np.flatnonzero(self.alive[:n] & (self.chunk[:n] == chunk)).tolist():
+            self.kill(index)
+
+    # 清空所有实体（保留已分配的数组）；之后生成的实体按 0, 1, 2... 的顺序占用槽位，
+    # 和新建的存储完全一样
+    def empty(self):
+        self.alive[:self.size] = False
+        self.size = 0
+        self.free = []
+        self.alive_count = 0
+
+    def __len__(self):
+        return self.alive_count
+
+    def __bool__(self):
+        return True
+
+    # 存活实体的下标
+    def active(self):
+        return np.flatnonzero(self.alive[:self.size])
+
+    def rect_of(self, index):
+        return pygame.Rect(int(self.x[index]), int(self.y[index]), int(self.w[index]), int(self.h[index]))
+
+    def image_of(self, index):
+        return self.frames[self.frame[index]]
+
+    # 与 rect 重叠的存活实体下标（和 Rect.colliderect 的判定一致）
+    def overlapping(self, rect):
+        n = self.size
+        x = self.x[:n]
+        y = self.y[:n]
+        return np.flatnonzero(self.alive[:n] &
+                              (x < rect.right) & (x + self.w[:n] > rect.left) &
+                              (y < rect.bottom) & (y + self.h[:n] > rect.top))
+
+    # 与 rect 重叠的实体，具体化为精灵视图
+    def query(self, rect):
+        return [EntityView(self, index) for index in self.overlapping(rect).tolist()]
+
+    def sprites(self):
+        return [EntityView(self, index) for index in self.active().tolist()]
+
+    def __iter__(self):
+        return iter(self.sprites())
+
+    # 下标对应实体的 (图像, 屏幕坐标) 列表（offset 为世界坐标到屏幕坐标的偏移）
+    def blit_list(self, indices, offset=(0, 0)):
+        dx, dy = offset
+        images = self.frames[self.frame[indices]].tolist()
+        positions = zip((self.x[indices] + dx).tolist(), (self.y[indices] + dy).tolist())
+        return list(zip(images, positions))
+
+    # 把下标对应的实体一次性画出，返回画出的矩形
+    def blit_indices(self, surface, indices, offset=(0, 0)):
+        return surface.blits(self.blit_list(indices, offset))
+
+    # 渲染器接口：用背景擦掉上一帧画过的位置
+    def clear(self, surface, background):
+        surface.blits([(background, rect, rect) for rect in self.drawn_rects], doreturn=False)
+
+    # 渲染器接口：画出视野内的存活实体，返回被改动的矩形（旧位置和新位置）
+    def draw(self, surface, offset=(0, 0)):
+        view = surface.get_rect().move(-offset[0], -offset[1])
+        rects = self.blit_indices(surface, self.overlapping(view), offset)
+        dirty = self.drawn_rects + rects
+        self.drawn_rects = rects
+        return dirty
+
+    # 渲染器接口：只重画与 area 重叠的实体
+    def draw_area(self, surface, area, offset=(0, 0)):
+        self.blit_indices(surface, self.overlapping(area.move(-offset[0], -offset[1])), offset)
+
+    # 渲染快照接口：area（屏幕坐标）内的存活实体的 (图像, 屏幕坐标) 列表，与 draw() 画出的相同
+    def blits(self, area, offset=(0, 0)):
+        return self.blit_list(self.overlapping(area.move(-offset[0], -offset[1])), offset)
+
+    def _grow(self):
+        capacity = self.capacity * 2
+        for name in self.column_names():
+            column = getattr(self, name)
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:self.capacity] = column
+            setattr(self, name, grown)
+        self.capacity = capacity
+
+# 存储中单个实体的精灵视图，rect 和 image 是具体化时的快照；
+# kill() 会把实体从存储中移除
+class EntityView(pygame.sprite.Sprite):
+    def __init__(self, store, index):
+        super().__init__()
+        self.store = store
+        self.index = index
+        self.rect = store.rect_of(index)
+        self.image = store.image_of(index)
+
+    def kill(self):
+        self.store.kill(self.index)
+        super().kill()
@@ -0,0 +1,82 @@
+import pygame
+
+# 保留模式界面层
+# 静态控件（面板、标题、操作说明……）只渲染一次到缓存的静态层；
+# 动态控件绑定一个取值函数，只有值变化时才重新渲染；
+# 任何控件变化后重新合成整张界面表面，显示时只需要一次 blit
+class HUD:
+    def __init__(self, size):
+        self.static_layer = pygame.Surface(size, pygame.SRCALPHA)
+        self.surface = self.static_layer.copy()
+        self.static_rects = []
+        self.widgets = []
+        # 合成结果每变化一次加一，渲染器用它判断是否需要重画
+        self.version = 0
+        self.needs_compose = True
+
+    # 静态控件：draw(surface) 立即画到静态层上，rect 为它覆盖的区域
+    def add_static(self, rect, draw):
+        draw(self.static_layer)
+        self.static_rects.append(pygame.Rect(rect))
+        self.needs_compose = True
+
+    # 动态控件：bind() 返回绑定的值，render(value) 返回 (图像, 位置)，返回 None 表示隐藏
+    def add_bound(self, bind, render):
+        self.widgets.append(BoundWidget(bind, render))
+        self.needs_compose = True
+
+    # 每帧调用一次，返回界面是否发生了变化
+    def update(self):
+        changed = self.needs_compose
+        for widget in self.widgets:
+            if widget.refresh():
+                changed = True
+        if changed:
+            self.compose()
+        return changed
+
+    def compose(self):
+        surface = self.static_layer.copy()
+        surface.blits([(widget.image, widget.rect) for widget in self.widgets
+                       if widget.image is not None], doreturn=False)
+        self.surface = surface
+        self.version += 1
+        self.needs_compose = False
+
+    # 界面覆盖的互不重叠的区域（静态区域，加上不在静态区域里的动态控件）
+    def regions(self):
+        regions = list(self.static_rects)
+        for widget in self.widgets:
+            if widget.image is None:
+                continue
+            if not any(rect.contains(widget.rect) for rect in self.static_rects):
+                regions.append(widget.rect)
+        return regions
+
+    def draw(self, surface):
+        surface.blit(self.surface, (0, 0))
+
+# 绑定到某个值的动态控件，值不变时复用上次渲染的图像
+class BoundWidget:
+    def __init__(self, bind, render):
+        self.bind = bind
+        self.render = render
+        self.value = None
+        self.has_value = False
+        self.image = None
+        self.rect = None
+
+    def refresh(self):
+        value = self.bind()
+        if self.has_value and value == self.value:
+            return False
+        self.value = value
+        self.has_value = True
+        rendered = self.render(value)
+        if rendered is None:
+            self.image = None
+            self.rect = None
+        else:
+            self.image, position = rendered
+            self.rect = self.image.get_rect(topleft=position)
+        return True
@@ -0,0 +1,198 @@
+import argparse
+import mmap
+import random
+import struct
+import sys
+
+import numpy as np
+import pygame
+
+from world import LevelLayout, all_records
+
+# 二进制关卡文件（.mplv）
+# 布局（全部为小端）：
+#   文件头     魔数 b'MPLV'、版本、平台类型数、世界宽高、区块宽度、区块数
+#   平台类型表 每个类型名占 16 字节（UTF-8，不足补零）
+#   段表       每类记录一项：(段偏移, 记录数)
+#   区块索引   每个区块、每类记录一项：(该区块第一条记录在段内的序号, 记录数)
+#   记录段     平台、敌人、金币、MegaPixel 的紧凑定长记录，同一区块的记录连续存放
+# 读取时把文件映射到内存，只解析文件头和索引；区块的记录在加载该区块时才解码
+
+MAGIC = b'MPLV'
+VERSION = 1
+HEADER = struct.Struct('<4sHHiiii')
+TYPE_NAME_SIZE = 16
+SECTION = np.dtype([('offset', '<u8'), ('count', '<u4')])
+INDEX = np.dtype([('start', '<u4'), ('count', '<u4')])
+
+# 每类记录的格式，字段顺序与 LevelLayout 中的记录元组一致
+RECORDS = {
+    'platforms': np.dtype([('x', '<i4'), ('y', '<i4'), ('w', '<i4'), ('h', '<i4'), ('type', 'u1')]),
+    'enemies': np.dtype([('x', '<i4'), ('y', '<i4'), ('speed', 'i1')]),
+    'coins': np.dtype([('x', '<i4'), ('y', '<i4'), ('float_offset', '<f8')]),
+    'megapixels': np.dtype([('x', '<i4'), ('y', '<i4'), ('float_offset', '<f8')]),
+}
+KINDS = LevelLayout.KINDS
+
+# 把关卡布局写成二进制关卡文件
+def write_level(path, layout):
+    types = sorted({record[4] for record in all_records(layout, 'platforms')})
+    if len(types) > 255:
+        raise ValueError("平台类型过多")
+    type_codes = {name: code for code, name in enumerate(types)}
+
+    # 按区块顺序把每类记录打包成数组，同时生成区块索引
+    index = np.zeros((layout.chunk_count, len(KINDS)), dtype=INDEX)
+    sections = []
+    for k, kind in enumerate(KINDS):
+        records = []
+        for chunk in range(layout.chunk_count):
+            chunk_records = layout.chunk(chunk)[kind]
+            index[chunk, k] = (len(records), len(chunk_records))
+            if kind == 'platforms':
+                chunk_records = [(*record[:4], type_codes[record[4]]) for record in chunk_records]
+            records.extend(chunk_records)
+        sections.append(np.array(records, dtype=RECORDS[kind]))
+
+    header = HEADER.pack(MAGIC, VERSION, len(types), layout.width, layout.height,
+                         layout.chunk_width, layout.chunk_count)
+    type_table = b''.join(name.encode('utf-8')[:TYPE_NAME_SIZE].ljust(TYPE_NAME_SIZE, b'\0')
+                          for name in types)
+    offset = len(header) + len(type_table) + SECTION.itemsize * len(KINDS) + index.nbytes
+    section_table = np.zeros(len(KINDS), dtype=SECTION)
+    for k, records in enumerate(sections):
+        section_table[k] = (offset, len(records))
+        offset += records.nbytes
+
+    with open(path, 'wb') as f:
+        f.write(header)
+        f.write(type_table)
+        f.write(section_table.tobytes())
+        f.write(index.tobytes())
+        for records in sections:
+            f.write(records.tobytes())
+
+# 内存映射的关卡文件，提供和 LevelLayout 相同的接口
+class LevelFile:
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.file.close()
+            raise ValueError(f"{path}: 不是有效的关卡文件")
+        try:
+            self._read_header()
+        except:
+            self.close()
+            raise
+
+    def _read_header(self):
+        if len(self.map) < HEADER.size:
+            raise ValueError(f"{self.path}: 不是有效的关卡文件")
+        (magic, version, type_count, self.width, self.height,
+         self.chunk_width, self.chunk_count) = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path}: 不是有效的关卡文件")
+        if version != VERSION:
+            raise ValueError(f"{self.path}: 不支持的关卡文件版本 {version}")
+
+        offset = HEADER.size
+        self.types = [self.map[offset + i * TYPE_NAME_SIZE:offset + (i + 1) * TYPE_NAME_SIZE]
+                      .rstrip(b'\0').decode('utf-8') for i in range(type_count)]
+        offset += type_count * TYPE_NAME_SIZE
+        # 段表和区块索引很小，复制出来，避免一直引用映射的内存
+        self.sections = np.frombuffer(self.map, dtype=SECTION, count=len(KINDS), offset=offset).copy()
+        offset += SECTION.itemsize * len(KINDS)
+        self.index = np.frombuffer(self.map, dtype=INDEX, count=self.chunk_count * len(KINDS),
+                                   offset=offset).reshape(self.chunk_count, len(KINDS)).copy()
+
+        end = max(start + count * RECORDS[kind].itemsize
+                  for (start, count), kind in zip(self.sections.tolist(), KINDS))
+        if end > len(self.map):
+            raise ValueError(f"{self.path}: 关卡文件不完整")
+
+    @property
+    def bounds(self):
+        return pygame.Rect(0, 0, self.width, self.height)
+
+    # 解码一个区块的全部记录：种类 -> [记录]
+    def chunk(self, index):
+        records = {}
+        for k, kind in enumerate(KINDS):
+            start, count = self.index[index, k].tolist()
+            dtype = RECORDS[kind]
+            section_offset = int(self.sections[k]['offset'])
+            values = np.frombuffer(self.map, dtype=dtype, count=count,
+                                   offset=section_offset + start * dtype.itemsize).tolist()
+            if kind == 'platforms':
+                values = [(x, y, w, h, self.types[code]) for x, y, w, h, code in values]
+            records[kind] = values
+        return records
+
+    # 每类记录的总数
+    def counts(self):
+        return {kind: int(count) for kind, count in zip(KINDS, self.sections['count'].tolist())}
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# 从游戏里写死的布局生成关卡文件
+def convert(game, path, seed=0, screens=1, counts=None):
+    random.seed(seed)
+    if game == 'v1':
+        from bench import load_v1
+        layout = load_v1().build_level(**(counts or {}))
+    else:
+        import MegaPixel2
+        layout = MegaPixel2.build_level(screens=screens, **(counts or {}))
+    write_level(path, layout)
+    return layout
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="MegaPixel 关卡文件工具")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    convert_parser = commands.add_parser('convert', help="把游戏里写死的关卡布局转换成关卡文件")
+    convert_parser.add_argument('game', choices=['v1', 'v2'])
+    convert_parser.add_argument('output')
+    convert_parser.add_argument('--seed', type=int, default=0, help="随机生成点使用的种子")
+    convert_parser.add_argument('--screens', type=int, default=1, help="关卡宽度（屏数，只用于 v2）")
+    convert_parser.add_argument('--counts', type=int, nargs=3, metavar=('ENEMIES', 'COINS', 'MEGAPIXELS'),
+                                help="每屏敌人、金币、MegaPixel 的数量")
+
+    info_parser = commands.add_parser('info', help="显示关卡文件的内容概要")
+    info_parser.add_argument('path')
+    args = parser.parse_args(argv)
+
+    if args.command == 'convert':
+        counts = None
+        if args.counts:
+            counts = dict(zip(['enemy_count', 'coin_count', 'megapixel_count'], args.counts))
+        convert(args.game, args.output, args.seed, args.screens, counts)
+        path = args.output
+    else:
+        path = args.path
+
+    try:
+        level = LevelFile(path)
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    with level:
+        print(f"{path}: 版本 {VERSION}，{level.width}x{level.height}，"
+              f"{level.chunk_count} 个区块（宽 {level.chunk_width}）")
+        for kind, count in level.counts().items():
+            print(f"  {kind:<11}{count:>8}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
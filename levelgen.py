@@ -0,0 +1,351 @@
+import hashlib
+import json
+import math
+import os
+import random
+from collections import OrderedDict
+
+import pygame
+
+from disk_cache import cache_dir
+from entities import rect_round
+from world import LevelLayout
+
+# 程序化关卡生成
+# 关卡按区块生成，每个区块只由 (种子, 区块序号) 决定，所以区块可以按任意顺序、在需要时才生成，
+# 流式加载的世界在区块进入加载范围时才调用生成器。每个区块都有一整块地面，地面在区块之间连续，
+# 所以只要区块内的每个平台都能从地面一步步跳上去，整个关卡就都能走通。
+#
+# 可达性按玩家真实的跳跃轨迹判断：JumpEnvelope 用和 Player 相同的重力、速度上限和取整
+# 预先模拟一次跳跃，得到每一帧的高度，以及落到每个相对高度时最远能飞过的水平距离。
+# 生成平台时先用距离表快速排除跳不到的位置，再沿着轨迹逐帧检查路上有没有被别的平台挡住，
+# 只接受能从已有平台跳上去的位置；之后的平台也不能挡住这些已经验证过的路径。金币和 MegaPixel 只放在某个平台上方跳得到、并且浮动时不会碰到平台的地方，
+# 敌人站在平台上，以所在平台为巡逻范围（EnemyStore 在平台边缘转向）。
+
+# 跳跃包络：起跳后一直按住方向键时，落到相对起跳平台高度 dy（向下为正）的平台上
+# 最远能飞过的水平距离，按像素高度预先算成表
+class JumpEnvelope:
+    # 参数与 Player 的物理属性相同；depth 为表中最大的下落高度，更深的落点按 depth 计算
+    def __init__(self, speed, jump_power, gravity, max_fall_speed, depth):
+        # 逐帧模拟脚底相对起跳点的高度（和 Rect 一样每帧把坐标取整）
+        heights = [0]
+        y = 0
+        velocity = -jump_power
+        while y < depth:
+            velocity = min(velocity + gravity, max_fall_speed)
+            y = int(rect_round(y + velocity))
+            heights.append(y)
+        # heights[t]：起跳后第 t 帧脚底的相对高度
+        self.heights = heights
+        self.speed = speed
+        self.apex = -min(heights)
+        self.depth = depth
+        top = heights.index(-self.apex)
+        # reach[dy + apex]：下落阶段第一次到达 dy 的帧 T，落地前一帧（T - 1）为止的水平距离
+        self.reach_table = []
+        frame = top
+        for dy in range(-self.apex, depth + 1):
+            while heights[frame] < dy:
+                frame += 1
+            self.reach_table.append(speed * (frame - 1))
+
+    # 跳到相对高度 dy 的平台上时最远的水平距离；高于跳跃最高点时返回 -1
+    def reach(self, dy):
+        if dy < -self.apex:
+            return -1
+        return self.reach_table[min(dy, self.depth) + self.apex]
+
+# 区块生成器：参数固定，对同一个 (种子, 区块序号) 总是生成同样的记录
+#   chunk_width, height  区块大小；ground_height 为地面厚度
+#   player_size          玩家的宽高；speed、jump_power、gravity、max_fall_speed 与 Player 相同
+#   top                  平台和物品的最高位置（顶部界面的下沿）
+#   spawn                玩家出生点，出生点和它下方落到地面的路径上不放平台和敌人
+#   enemy_size           敌人的边长；coin_size、megapixel_size 为物品的最大边长（包括脉动）
+#   coin_float、megapixel_float 为物品上下浮动的最大距离
+#   platform_count、enemy_count、coin_count、megapixel_count 为每个区块的数量
+#   enemy_speed          敌人的最大速度
+#   slack                可达性的余量：只使用跳跃高度和水平距离的这个比例
+class ChunkGenerator:
+    def __init__(self, chunk_width, height, player_size, speed, jump_power, gravity, max_fall_speed,
+                 spawn, top=80, ground_height=60, enemy_size=48, coin_size=24, coin_float=32,
+                 megapixel_size=56, megapixel_float=40, platform_count=8, enemy_count=6,
+                 coin_count=15, megapixel_count=4, enemy_speed=2, slack=0.9):
+        if platform_count < 0 or enemy_count < 0 or coin_count < 0 or megapixel_count < 0:
+            raise ValueError("生成数量不能为负数")
+        if enemy_speed < 1:
+            raise ValueError(f"敌人的最大速度必须至少为 1: {enemy_speed!r}")
+        self.params = (chunk_width, height, tuple(player_size), speed, jump_power, gravity,
+                       max_fall_speed, tuple(spawn), top, ground_height, enemy_size, coin_size,
+                       coin_float, megapixel_size, megapixel_float, platform_count, enemy_count,
+                       coin_count, megapixel_count, enemy_speed, slack)
+        self.chunk_width = chunk_width
+        self.height = height
+        self.player_width, self.player_height = player_size
+        self.top = top
+        self.ground_top = height - ground_height
+        self.ground_height = ground_height
+        self.enemy_size = enemy_size
+        self.items = {'coins': (coin_size, coin_float, coin_count),
+                      'megapixels': (megapixel_size, megapixel_float, megapixel_count)}
+        self.platform_count = platform_count
+        self.enemy_count = enemy_count
+        self.speeds = [speed for speed in range(-enemy_speed, enemy_speed + 1) if speed != 0]
+        self.envelope = JumpEnvelope(speed, jump_power, gravity, max_fall_speed, height)
+        self.jump_height = int(self.envelope.apex * slack)
+        self.slack = slack
+        # 水平方向有重叠的两个平台之间至少留出玩家的高度，玩家能从下面走过去；
+        # 跳得不够高时缩小间距（但至少留出敌人的高度），保证第一层平台能从地面跳上去
+        self.clearance = max(min(self.player_height + 8, self.jump_height - 28), enemy_size)
+        # 出生点和落到地面的路径
+        spawn_x, spawn_y = spawn
+        self.spawn_zone = pygame.Rect(spawn_x, spawn_y, self.player_width,
+                                      self.ground_top - spawn_y).inflate(self.player_width * 2, 0)
+
+    # 从平台 a 跳到平台 b（都是 Rect）的一条路径：按跳跃轨迹逐帧移动，向落点靠近，
+    # 但这一帧开始时脚还没有高过 b 的顶面时不进入 b 的正上方（否则会撞到 b 的侧面或底面）。
+    # 返回每一帧扫过的矩形；路上碰到 platforms 中的平台、顶到世界上沿或者落不到 b 上时返回 None。
+    # left 为所在区块的左边界，玩家只在这个区块里移动（关卡的两端可能就是区块的边界）
+    def jump_path(self, a, b, platforms, left):
+        dy = b.top - a.top
+        if dy < -self.jump_height:
+            return None
+        # 玩家站在平台上时 x 的范围（和平台至少重叠一个像素）
+        width = self.player_width
+        low, high = left, left + self.chunk_width - width
+        a0, a1 = max(a.left - width + 1, low), min(a.right - 1, high)
+        b0, b1 = max(b.left - width + 1, low), min(b.right - 1, high)
+        if a0 > a1 or b0 > b1:
+            return None
+        # (起跳位置, 落点)，都是玩家的 x
+        if b0 > a1:
+            options = [(a1, b0)]
+        elif b1 < a0:
+            options = [(a0, b1)]
+        elif dy < 0:
+            # b 在 a 的上方：从 a 上不在 b 正下方的位置起跳
+            options = [(b0 - 1, b0)] if a0 < b0 else []
+            if a1 > b1:
+                options.append((b1 + 1, b1))
+        else:
+            # b 在 a 的下方：从 a 的边缘出去落到 b 上
+            options = [(a1, a1 + 1)] if b1 > a1 else []
+            if b0 < a0:
+                options.append((a0, a0 - 1))
+        reach = self.envelope.reach(dy) * self.slack
+        for start, target in options:
+            if abs(target - start) <= reach:
+                path = self.follow_jump(a.top, start, target, b, b0, b1, platforms)
+                if path is not None:
+                    return path
+        return None
+
+    # 从平台顶面 top 上的 x 起跳、向 target 移动的逐帧模拟（见 jump_path）
+    def follow_jump(self, top, x, target, b, b0, b1, platforms):
+        width, height = self.player_width, self.player_height
+        speed = self.envelope.speed
+        heights = self.envelope.heights
+        rect = pygame.Rect(x, top - height, width, height)
+        path = []
+        for frame in range(1, len(heights)):
+            feet = top + heights[frame]
+            step = max(-speed, min(speed, target - x))
+            if b0 <= x + step <= b1 and rect.bottom > b.top:
+                step = 0
+            x += step
+            landed = b0 <= x <= b1 and feet >= b.top and heights[frame] > heights[frame - 1]
+            moved = pygame.Rect(x, (b.top if landed else feet) - height, width, height)
+            swept = rect.union(moved)
+            if swept.top < 0 or swept.collidelist(platforms) != -1 or \
+               (not landed and swept.colliderect(b)):
+                return None
+            path.append(swept)
+            if landed:
+                return path
+            rect = moved
+        return None
+
+    # 生成一个区块的记录：种类 -> [记录]，格式与 LevelLayout 相同
+    def generate(self, seed, index):
+        rng = random.Random(repr((seed, index)))
+        left = index * self.chunk_width
+        ground = pygame.Rect(left, self.ground_top, self.chunk_width, self.ground_height)
+        platforms = [ground]
+        # 每个平台被接受时的跳跃路径（逐帧扫过的矩形）
+        paths = []
+        records = {kind: [] for kind in LevelLayout.KINDS}
+        records['platforms'].append((ground.x, ground.y, ground.width, ground.height, 'ground'))
+
+        # 平台：从已有的平台出发，在跳得到的范围里取一个位置，放得下并且能从某个已有的平台
+        # 沿着不被挡住的路径跳上去才接受
+        attempts = self.platform_count * 40
+        while len(platforms) <= self.platform_count and attempts > 0:
+            attempts -= 1
+            base = rng.choice(platforms)
+            width = rng.randrange(120, 321, 20)
+            if rng.random() < 0.25:
+                # 叠在 base 的上方
+                lowest = self.clearance + 20
+                if lowest > self.jump_height:
+                    continue
+                y = base.top - rng.randint(lowest, self.jump_height)
+                low, high = base.left - width + 1, base.right - 1
+            else:
+                # 在 base 的左边或右边，和 base 之间至少留出玩家的宽度
+                dy = rng.randint(-self.jump_height, self.jump_height)
+                y = base.top + dy
+                gap = self.player_width - 2 + int(max(self.envelope.reach(dy), 0) * self.slack)
+                if rng.random() < 0.5:
+                    low, high = base.right + self.player_width, base.right + gap
+                else:
+                    low, high = base.left - gap - width, base.left - self.player_width - width
+            low = max(low, left)
+            high = min(high, left + self.chunk_width - width)
+            if low > high:
+                continue
+            candidate = pygame.Rect(rng.randint(low, high), y, width, 20)
+            # 新平台不能挡住已有平台的路径，这样之前的平台仍然跳得上去
+            if not self.fits(candidate, platforms) or candidate.collidelist(paths) != -1:
+                continue
+            for platform in platforms:
+                path = self.jump_path(platform, candidate, platforms, left)
+                if path is not None:
+                    platforms.append(candidate)
+                    paths.extend(path)
+                    records['platforms'].append((candidate.x, candidate.y, width, 20, 'normal'))
+                    break
+
+        # 敌人：(x, y, 速度)，站在一个平台上，以这个平台为巡逻范围
+        size = self.enemy_size
+        for i in range(self.enemy_count):
+            for attempt in range(10):
+                platform = rng.choice(platforms)
+                low = max(platform.left, left)
+                high = min(platform.right, left + self.chunk_width) - size
+                if low > high:
+                    continue
+                enemy = pygame.Rect(rng.randint(low, high), platform.top - size, size, size)
+                if not enemy.colliderect(self.spawn_zone):
+                    records['enemies'].append((enemy.x, enemy.y, rng.choice(self.speeds)))
+                    break
+
+        # 金币和 MegaPixel：(x, y, 浮动相位)
+        for kind, (size, drift, count) in self.items.items():
+            for i in range(count):
+                for attempt in range(10):
+                    position = self.place_item(rng, platforms, left, size, drift)
+                    if position is not None:
+                        records[kind].append((*position, rng.random() * 2 * math.pi))
+                        break
+        return records
+
+    # 平台能否放在这里：在区块和界面范围内，不挡住出生点，和水平方向重叠的平台上下留够空间
+    def fits(self, candidate, platforms):
+        if candidate.top < self.top + self.player_height or candidate.colliderect(self.spawn_zone):
+            return False
+        for platform in platforms:
+            if candidate.right + self.player_width <= platform.left or \
+               platform.right + self.player_width <= candidate.left:
+                continue
+            if candidate.bottom + self.clearance > platform.top and \
+               platform.bottom + self.clearance > candidate.top:
+                return False
+        return True
+
+    # 在某个平台上方取一个物品位置：站在平台上起跳就能碰到，上下浮动时不会进入任何平台，
+    # 平台和物品之间也没有挡住跳跃的平台；找不到时返回 None
+    def place_item(self, rng, platforms, left, size, drift):
+        platform = rng.choice(platforms)
+        low = max(platform.left, left)
+        high = min(platform.right, left + self.chunk_width) - size
+        highest = max(platform.top - self.player_height - self.jump_height + drift, self.top + drift)
+        lowest = platform.top - size - drift
+        if low > high or highest > lowest:
+            return None
+        x = rng.randint(low, high)
+        y = rng.randint(highest, lowest)
+        # 物品浮动的范围，以及玩家从平台跳到物品时经过的一列
+        top = min(y - drift, platform.top - self.player_height)
+        reach = pygame.Rect(x + size // 2 - self.player_width // 2, top,
+                            self.player_width, platform.top - top)
+        reach.union_ip((x, y - drift, size, size + 2 * drift))
+        if reach.collidelist(platforms) != -1:
+            return None
+        return x, y
+
+# 程序化生成的关卡：接口与 LevelLayout、LevelFile 相同，区块在第一次用到时才生成
+# 生成结果按 (生成器参数, 种子, 区块序号) 缓存到磁盘，再次使用同一个种子时直接读取
+class ProceduralLevel:
+    # 缓存格式版本，生成算法改变时加一，让旧缓存失效
+    CACHE_VERSION = 1
+
+    # 内存里最多保留的区块数：要多于世界同时加载的区块（视野两侧各一个，加上卸载前的缓冲），
+    # 更早用过的区块被丢掉，再次需要时从磁盘缓存读回
+    MAX_CHUNKS = 8
+
+    def __init__(self, generator, seed, chunk_count, use_cache=True, max_chunks=MAX_CHUNKS):
+        if chunk_count < 1:
+            raise ValueError(f"区块数必须至少为 1: {chunk_count!r}")
+        if max_chunks < 1:
+            raise ValueError(f"内存里保留的区块数必须至少为 1: {max_chunks!r}")
+        self.generator = generator
+        self.seed = seed
+        self.chunk_count = chunk_count
+        self.chunk_width = generator.chunk_width
+        self.width = generator.chunk_width * chunk_count
+        self.height = generator.height
+        self.cache_path = None
+        if use_cache:
+            # 缓存目录建不起来时不使用缓存，照常生成
+            try:
+                self.cache_path = cache_dir('levels')
+            except OSError:
+                pass
+        self.max_chunks = max_chunks
+        # 区块序号 -> 记录，按最近使用的顺序排列
+        self.chunks = OrderedDict()
+
+    @property
+    def bounds(self):
+        return pygame.Rect(0, 0, self.width, self.height)
+
+    # 某个区块的全部记录：种类 -> [记录]
+    def chunk(self, index):
+        records = self.chunks.get(index)
+        if records is None:
+            records = self.chunks[index] = self.load_chunk(index)
+            if len(self.chunks) > self.max_chunks:
+                self.chunks.popitem(last=False)
+        else:
+            self.chunks.move_to_end(index)
+        return records
+
+    # 提前生成一些区块（例如在加载画面里生成整个关卡），生成的区块写入磁盘缓存，
+    # 内存里只留下最后 max_chunks 个
+    def prefetch(self, indices):
+        for index in indices:
+            self.chunk(index)
+
+    # 优先读取磁盘缓存，没有时生成并写入缓存
+    def load_chunk(self, index):
+        path = None
+        if self.cache_path is not None:
+            key = repr((self.CACHE_VERSION, self.generator.params, self.seed, index))
+            path = os.path.join(self.cache_path, hashlib.sha1(key.encode()).hexdigest() + '.json')
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+                return {kind: [tuple(record) for record in data[kind]] for kind in LevelLayout.KINDS}
+            except (OSError, ValueError, KeyError, TypeError):
+                pass
+
+        records = self.generator.generate(self.seed, index)
+        if path is not None:
+            # 先写临时文件再改名，并行的批量模拟不会读到写了一半的缓存
+            temp = f'{path}.{os.getpid()}.tmp'
+            try:
+                with open(temp, 'w') as f:
+                    json.dump(records, f)
+                os.replace(temp, path)
+            except OSError:
+                pass
+        return records
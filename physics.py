@@ -0,0 +1,49 @@
+import math
+
+import numpy as np
+
+# 扫掠 AABB（连续碰撞检测）
+# 矩形 a（左上角 ax, ay，宽高 aw, ah）在一步之内以位移 (dx, dy) 匀速移动，矩形 b 静止。
+# 时间以整步为 1，返回两者重叠的时间区间 (t0, t1) 和进入轴：在 t0 < t < t1 时重叠
+# （和 Rect.colliderect 一样，只接触边不算重叠）；进入轴是最后开始重叠的轴（'x' 或 'y'），
+# 也就是撞上的是哪一对边。两者永远不会重叠时返回 None。
+# 因为考虑的是整段位移而不是最终位置，一步移动得再远也不会穿过薄的平台。
+def sweep(ax, ay, aw, ah, dx, dy, bx, by, bw, bh):
+    tx0, tx1 = axis_interval(ax, aw, dx, bx, bw)
+    ty0, ty1 = axis_interval(ay, ah, dy, by, bh)
+    t0 = max(tx0, ty0)
+    t1 = min(tx1, ty1)
+    if t0 >= t1:
+        return None
+    return t0, t1, 'x' if tx0 > ty0 else 'y'
+
+# 一个轴上两条线段重叠的时间区间；不移动时要么一直重叠，要么永不重叠
+def axis_interval(a, size, d, b, other_size):
+    if d > 0:
+        return (b - (a + size)) / d, (b + other_size - a) / d
+    if d < 0:
+        return (b + other_size - a) / d, (b - (a + size)) / d
+    if a < b + other_size and b < a + size:
+        return -math.inf, math.inf
+    return math.inf, -math.inf
+
+# 与 sweep 相同，但参数可以是 NumPy 数组（逐元素计算，结果与 sweep 完全相同）
+# 返回 (t0, t1, 进入轴是否为 x)；永远不会重叠的元素 t0 >= t1
+def sweep_arrays(ax, ay, aw, ah, dx, dy, bx, by, bw, bh):
+    tx0, tx1 = axis_intervals(ax, aw, dx, bx, bw)
+    ty0, ty1 = axis_intervals(ay, ah, dy, by, bh)
+    return np.maximum(tx0, ty0), np.minimum(tx1, ty1), tx0 > ty0
+
+def axis_intervals(a, size, d, b, other_size):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        near = (b - (a + size)) / d
+        far = (b + other_size - a) / d
+    positive = d > 0
+    t0 = np.where(positive, near, far)
+    t1 = np.where(positive, far, near)
+    # 不移动的轴
+    still = d == 0
+    overlap = (a < b + other_size) & (b < a + size)
+    t0 = np.where(still, np.where(overlap, -math.inf, math.inf), t0)
+    t1 = np.where(still, np.where(overlap, math.inf, -math.inf), t1)
+    return t0, t1
@@ -0,0 +1,132 @@
+import queue
+import threading
+from collections import namedtuple
+
+import pygame
+
+# 流水线渲染：模拟和绘制在两个线程上重叠执行
+# 串行的主循环里一帧的耗时是 输入 + 模拟 + 绘制 + 提交 之和。流水线模式下，工作线程推进第 N+1 帧
+# 的模拟并生成它的渲染快照，主线程同时绘制并提交第 N 帧的快照；Pygame 在 blit 和提交画面时、
+# NumPy 在数组运算时都会释放 GIL，所以两边可以并行，一帧的耗时接近两者中较长的一个（画面晚一帧）。
+#
+# 两个线程之间只交换快照。快照生成之后不再修改，里面只有坐标元组和图像表面的引用；
+# 这些表面都来自缓存（精灵帧、平台纹理），生成之后不会再被修改，所以交接时不复制表面，也不加锁。
+# 主线程绘制期间，模拟线程只修改模拟本身，从不触碰已经交出去的快照。
+
+# 玩家的界面状态（HUD 和结算画面用到的部分）
+PlayerState = namedtuple('PlayerState', ['health', 'max_health', 'coins'])
+
+# 一帧的渲染快照
+#   platforms  视野内平台的 (图像, 屏幕坐标)；视野没有变化时直接沿用上一个快照的元组
+#   sprites    按 z 顺序排列的全部精灵的 (图像, 屏幕坐标)
+#   view_version 即 GameSim.view_version，变化时重新合成背景
+Snapshot = namedtuple('Snapshot', ['tick', 'view_version', 'platforms', 'sprites', 'player',
+                                   'game_over', 'game_won'])
+
+# 生成 sim（GameSim）当前状态的快照，在模拟线程里调用；previous 为上一个快照
+def take_snapshot(sim, previous=None):
+    camera = sim.camera
+    if previous is not None and previous.view_version == sim.view_version:
+        platforms = previous.platforms
+    else:
+        offset = camera.offset
+        platforms = tuple((platform.image, platform.rect.move(offset).topleft)
+                          for platform in sim.platforms.query(camera.view))
+    player = sim.player
+    screen_area = pygame.Rect((0, 0), camera.view.size)
+    return Snapshot(sim.tick, sim.view_version, platforms, tuple(sim.all_sprites.blits(screen_area)),
+                    PlayerState(player.health, player.max_health, player.coins),
+                    sim.game_over, sim.game_won)
+
+# 推进模拟并生成快照
+# threaded=True 时在工作线程里执行：submit() 把下一帧的输入交给工作线程后立即返回，
+# 主线程绘制当前的 snapshot，再用 wait() 取回下一帧的快照；
+# threaded=False 时 submit() 在调用线程里同步执行（串行，用于调试），用法和画面完全相同
+# HUD 和结算画面通过 player、game_over、game_won 读取当前快照，就像读取 GameSim 一样
+class SimulationThread:
+    def __init__(self, sim, threaded=True):
+        self.sim = sim
+        self.snapshot = take_snapshot(sim)
+        self.pending = None
+        self.thread = None
+        if threaded:
+            self.requests = queue.Queue(maxsize=1)
+            self.results = queue.Queue(maxsize=1)
+            self.thread = threading.Thread(target=self._run, name='simulation', daemon=True)
+            self.thread.start()
+
+    @property
+    def player(self):
+        return self.snapshot.player
+
+    @property
+    def game_over(self):
+        return self.snapshot.game_over
+
+    @property
+    def game_won(self):
+        return self.snapshot.game_won
+
+    # 开始推进下一帧
+    def submit(self, inputs):
+        if self.thread is None:
+            self.pending = self._advance(inputs)
+        else:
+            self.requests.put(inputs)
+
+    # 等待下一帧的快照并把它设为当前快照；模拟线程里的异常在这里重新抛出
+    def wait(self):
+        if self.thread is None:
+            snapshot = self.pending
+        else:
+            snapshot = self.results.get()
+            if isinstance(snapshot, BaseException):
+                raise snapshot
+        self.snapshot = snapshot
+        return snapshot
+
+    # 停止工作线程（之后模拟只属于调用线程）
+    def close(self):
+        if self.thread is not None:
+            self.requests.put(None)
+            self.thread.join()
+            self.thread = None
+
+    # 主线程只在 wait() 里替换 snapshot，这时模拟线程正空闲，所以这里读到的总是上一帧的快照
+    def _advance(self, inputs):
+        self.sim.step(inputs)
+        return take_snapshot(self.sim, self.snapshot)
+
+    def _run(self):
+        while True:
+            inputs = self.requests.get()
+            if inputs is None:
+                return
+            try:
+                result = self._advance(inputs)
+            except BaseException as e:
+                result = e
+            self.results.put(result)
+
+# 渲染器接口：按当前快照的精灵列表绘制（快照里已经是屏幕坐标，忽略 offset），
+# 擦除时使用上一帧实际画出的矩形，与 SpriteLayer 相同
+class SnapshotSprites:
+    def __init__(self):
+        self.blits = ()
+        self.drawn_rects = []
+
+    def show(self, snapshot):
+        self.blits = snapshot.sprites
+
+    def clear(self, surface, background):
+        surface.blits([(background, rect, rect) for rect in self.drawn_rects], doreturn=False)
+
+    def draw(self, surface, offset=None):
+        rects = surface.blits(self.blits)
+        dirty = self.drawn_rects + rects
+        self.drawn_rects = rects
+        return dirty
+
+    def draw_area(self, surface, area, offset=None):
+        surface.blits([(image, position) for image, position in self.blits
+                       if area.colliderect(image.get_rect(topleft=position))], doreturn=False)
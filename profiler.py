@@ -0,0 +1,179 @@
+import csv
+import json
+import time
+from collections import deque
+
+import pygame
+
+# 游戏内逐阶段性能分析
+# 主循环用 profiler.run(阶段, 函数, *参数) 调用每个阶段；关闭时 run 直接调用函数，
+# 不读时钟、不分配内存，所以平时可以一直留在主循环里。
+# 打开后记录每个阶段每一帧的耗时：最近 history 帧用于游戏内的叠加层（各阶段的滚动平均
+# 和帧耗时曲线），指定了输出文件时还会保存全部帧，退出时写成 CSV 或 Chrome trace JSON
+# （用 chrome://tracing 或 Perfetto 打开）。
+
+# 关闭时使用的 run：直接调用
+def untimed(phase, function, *args):
+    return function(*args)
+
+def nothing():
+    pass
+
+class Profiler:
+    def __init__(self, phases, history=120):
+        self.phases = list(phases)
+        self.history = history
+        # 阶段 -> 最近 history 帧的耗时（秒），没有执行的阶段记为 0
+        self.rolling = {phase: deque([0.0] * history, maxlen=history) for phase in self.phases}
+        self.frames = deque([0.0] * history, maxlen=history)
+        self.frame_count = 0
+        # 需要保存到文件的全部帧：(帧开始时间, 帧耗时, [(阶段, 开始时间, 耗时)])
+        self.records = None
+        self.frame_started = None
+        self.current = []
+        self.enabled = False
+        self.disable()
+
+    # 在一帧中间打开时，这一帧不完整，不记录
+    def enable(self):
+        if not self.enabled:
+            self.frame_started = None
+        self.enabled = True
+        self.run = self._timed
+        self.begin_frame = self._begin_frame
+        self.end_frame = self._end_frame
+
+    def disable(self):
+        self.enabled = False
+        self.run = untimed
+        self.begin_frame = nothing
+        self.end_frame = nothing
+
+    # 开始保存每一帧的数据（用于 save()）
+    def start_recording(self):
+        self.records = []
+        self.enable()
+
+    def _timed(self, phase, function, *args):
+        started = time.perf_counter()
+        result = function(*args)
+        self.current.append((phase, started, time.perf_counter() - started))
+        return result
+
+    def _begin_frame(self):
+        self.current = []
+        self.frame_started = time.perf_counter()
+
+    def _end_frame(self):
+        if self.frame_started is None:
+            return
+        duration = time.perf_counter() - self.frame_started
+        totals = dict.fromkeys(self.phases, 0.0)
+        for phase, started, seconds in self.current:
+            totals[phase] += seconds
+        for phase, seconds in totals.items():
+            self.rolling[phase].append(seconds)
+        self.frames.append(duration)
+        self.frame_count += 1
+        if self.records is not None:
+            self.records.append((self.frame_started, duration, self.current))
+
+    # 各阶段最近 history 帧的平均耗时（毫秒）
+    def averages(self):
+        return {phase: sum(samples) / len(samples) * 1000 for phase, samples in self.rolling.items()}
+
+    # 按扩展名保存为 Chrome trace JSON（.json）或 CSV（其他）
+    def save(self, path):
+        if path.lower().endswith('.json'):
+            self.save_trace(path)
+        else:
+            self.save_csv(path)
+
+    # 每帧一行：帧序号、开始时间、帧耗时和各阶段耗时（毫秒）
+    def save_csv(self, path):
+        records = self.records or []
+        origin = records[0][0] if records else 0.0
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['frame', 'start_ms', 'frame_ms'] + [f'{phase}_ms' for phase in self.phases])
+            for frame, (started, duration, phases) in enumerate(records):
+                totals = dict.fromkeys(self.phases, 0.0)
+                for phase, phase_started, seconds in phases:
+                    totals[phase] += seconds
+                writer.writerow([frame, f'{(started - origin) * 1000:.3f}', f'{duration * 1000:.3f}'] +
+                                [f'{totals[phase] * 1000:.3f}' for phase in self.phases])
+
+    # Chrome trace 的完整事件（ph 'X'）：每帧一个事件，各阶段嵌套在帧里，时间单位为微秒
+    def save_trace(self, path):
+        records = self.records or []
+        origin = records[0][0] if records else 0.0
+        events = []
+        for frame, (started, duration, phases) in enumerate(records):
+            events.append({'name': 'frame', 'ph': 'X', 'pid': 1, 'tid': 1,
+                           'ts': (started - origin) * 1e6, 'dur': duration * 1e6, 'args': {'frame': frame}})
+            for phase, phase_started, seconds in phases:
+                events.append({'name': phase, 'ph': 'X', 'pid': 1, 'tid': 1,
+                               'ts': (phase_started - origin) * 1e6, 'dur': seconds * 1e6})
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+# 叠加层：各阶段的滚动平均耗时和最近 history 帧的帧耗时曲线
+# 作为渲染器的界面元素使用，每 refresh 帧才重新绘制一次
+class ProfilerOverlay:
+    GRAPH_HEIGHT = 60
+
+    # budget_ms 为一帧的预算（毫秒），在曲线上画成虚线
+    def __init__(self, profiler, font, position, budget_ms, refresh=10):
+        self.profiler = profiler
+        self.font = font
+        self.budget_ms = budget_ms
+        self.refresh = refresh
+        line_height = font.get_linesize()
+        width = max(profiler.history * 2, 220) + 20
+        height = line_height * (len(profiler.phases) + 1) + self.GRAPH_HEIGHT + 30
+        self.rect = pygame.Rect(position, (width, height))
+        self.image = None
+        self.image_state = None
+
+    @property
+    def state(self):
+        return self.profiler.frame_count // self.refresh
+
+    def draw(self, screen):
+        if self.image is None or self.image_state != self.state:
+            self.image = self.render()
+            self.image_state = self.state
+        screen.blit(self.image, self.rect)
+
+    def render(self):
+        profiler = self.profiler
+        font = self.font
+        image = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+        image.fill((0, 0, 0, 190))
+        pygame.draw.rect(image, (120, 120, 160), image.get_rect(), 1)
+
+        y = 10
+        averages = profiler.averages()
+        frames = list(profiler.frames)
+        frame_ms = sum(frames) / len(frames) * 1000
+        lines = [('frame', frame_ms, (255, 255, 255))]
+        lines += [(phase, ms, (200, 200, 220)) for phase, ms in averages.items()]
+        for name, ms, color in lines:
+            image.blit(font.render(name, True, color), (10, y))
+            value = font.render(f"{ms:.2f} ms", True, color)
+            image.blit(value, (self.rect.width - 10 - value.get_width(), y))
+            y += font.get_linesize()
+
+        # 帧耗时曲线：超过一帧预算的帧标成红色，虚线位置为预算
+        y += 10
+        bottom = y + self.GRAPH_HEIGHT
+        scale = self.GRAPH_HEIGHT / (self.budget_ms * 2)
+        for i, seconds in enumerate(frames):
+            ms = seconds * 1000
+            height = min(self.GRAPH_HEIGHT, max(1, int(ms * scale)))
+            color = (230, 80, 80) if ms > self.budget_ms else (90, 200, 120)
+            image.fill(color, (10 + i * 2, bottom - height, 2, height))
+        budget_y = bottom - int(self.budget_ms * scale)
+        for x in range(10, self.rect.width - 10, 6):
+            image.fill((255, 255, 255), (x, budget_y, 3, 1))
+        return image
@@ -0,0 +1,267 @@
+import pygame
+
+# 脏矩形渲染器
+# 静态背景只烘焙一次到缓存表面；每帧只把移动精灵经过的区域、
+# 以及状态发生变化的界面元素重新绘制，并只提交这些矩形到显示器
+#
+# 画面按 z 顺序分成三部分，每部分各自记录是否需要重画：
+#   静态图层（天空、平台……） 按顺序合成到缓存的背景表面，只在某一层的版本变化时重新合成
+#   精灵（Layers 里的拾取物、敌人、玩家、特效……） 每帧擦掉上一帧画过的矩形再画出新位置
+#   界面元素（HUD、结算画面、性能分析……） 只在状态变化或被精灵弄脏时重画
+#
+# 界面元素（overlay）用元组 (名字, 矩形, 状态, 绘制函数) 描述：
+# 状态与上一帧不同、或者被精灵弄脏时，才会在它的矩形内重画，
+# 绘制时总是裁剪在自己的矩形内
+class DirtyRenderer:
+    def __init__(self, screen):
+        self.screen = screen
+        self.background = None
+        self.full_redraw = True
+        # 名字 -> (矩形, 状态)
+        self.overlay_states = {}
+        # [(名字, 绘制函数, 版本函数, 范围函数)]，以及上次合成时各层的版本和范围
+        self.static_layers = []
+        self.static_versions = None
+        self.static_rects = None
+        # 背景重新合成过、下一帧要从背景恢复到屏幕上的区域
+        self.background_dirty = []
+        # 上一次提交是否整屏 flip，以及提交的像素数（重叠的矩形重复计算）
+        self.presented_full = False
+        self.presented_area = 0
+
+    def set_background(self, background):
+        self.background = background
+        self.full_redraw = True
+
+    # 添加一个静态图层（z 顺序在已有的静态图层之上）：draw(surface) 把这一层画到背景上，
+    # version() 的返回值变化时重新合成背景；rects() 给出这一层画到的屏幕矩形时，
+    # 只重画新旧矩形覆盖的区域（例如摄像机移动时的平台），否则整个背景重新合成
+    def add_static_layer(self, name, draw, version=lambda: None, rects=None):
+        self.static_layers.append((name, draw, version, rects))
+        self.static_versions = None
+
+    # 有静态图层的版本变化时，在缓存的背景表面上就地重新合成变化的区域，返回是否重新合成
+    # 变化的区域记在 background_dirty 里，由 draw_sprites() 恢复到屏幕上并提交，不需要整屏重画
+    def compose_background(self):
+        versions = [version() for name, draw, version, rects in self.static_layers]
+        if versions == self.static_versions:
+            return False
+        screen_rect = self.screen.get_rect()
+        layer_rects = [[screen_rect.clip(rect) for rect in rects()] if rects is not None else None
+                       for name, draw, version, rects in self.static_layers]
+
+        if self.background is None or self.background.get_size() != screen_rect.size:
+            self.background = pygame.Surface(screen_rect.size)
+            self.full_redraw = True
+            areas = [screen_rect]
+        elif self.static_versions is None or len(self.static_versions) != len(versions):
+            areas = [screen_rect]
+        else:
+            areas = []
+            for old, new, last, current in zip(self.static_versions, versions, self.static_rects, layer_rects):
+                if old == new:
+                    continue
+                if last is None or current is None:
+                    areas = [screen_rect]
+                    break
+                areas += last + current
+            areas = merge_rects(rect for rect in areas if rect.width and rect.height)
+
+        background = self.background
+        for area in areas:
+            background.set_clip(area)
+            for name, draw, version, rects in self.static_layers:
+                draw(background)
+        background.set_clip(None)
+        self.static_versions = versions
+        self.static_rects = layer_rects
+        self.background_dirty += areas
+        return True
+
+    # 下一帧整屏重画（例如窗口被遮挡或关卡重建之后）
+    def invalidate(self):
+        self.full_redraw = True
+
+    # 渲染一帧：静态图层 -> 精灵 -> 界面元素 -> 提交到显示器
+    def render(self, sprites, overlays=()):
+        if self.static_layers:
+            self.compose_background()
+        dirty = self.draw_sprites(sprites)
+        dirty += self.draw_overlays(sprites, overlays, dirty)
+        self.present(dirty)
+
+    # 以下几个阶段由 render() 依次调用，性能测试时也可以分别计时
+
+    # 画出精灵，返回被改动的矩形列表
+    def draw_sprites(self, sprites):
+        screen = self.screen
+        restored, self.background_dirty = self.background_dirty, []
+        if self.full_redraw:
+            screen.blit(self.background, (0, 0))
+            sprites.draw(screen)
+            return []
+
+        # 用背景擦掉精灵上一帧的位置和背景重新合成过的区域，再画出新位置
+        sprites.clear(screen, self.background)
+        screen.blits([(self.background, area, area) for area in restored], doreturn=False)
+        return restored + sprites.draw(screen)
+
+    # 画出需要更新的界面元素（dirty 为精灵改动的矩形），返回被重画的区域
+    def draw_overlays(self, sprites, overlays, dirty):
+        screen = self.screen
+        if self.full_redraw:
+            for name, rect, state, draw in overlays:
+                screen.set_clip(rect)
+                draw(screen)
+            screen.set_clip(None)
+            self._remember(overlays)
+            return []
+
+        # 找出需要重画的界面区域
+        repaint = []
+        current = set()
+        for name, rect, state, draw in overlays:
+            current.add(name)
+            last = self.overlay_states.get(name)
+            if last is None or last != (rect, state) or rect.collidelist(dirty) != -1:
+                repaint.append(rect)
+            if last is not None and last[0] != rect:
+                repaint.append(last[0])
+        # 已经消失的界面元素，需要把它原来的区域恢复
+        for name, (rect, state) in self.overlay_states.items():
+            if name not in current:
+                repaint.append(rect)
+
+        for area in repaint:
+            self._repaint(area, sprites, overlays)
+        self._remember(overlays)
+        return repaint
+
+    # 把改动的区域提交到显示器（整屏重画时直接 flip）
+    def present(self, dirty):
+        if self.full_redraw:
+            self.full_redraw = False
+            self.presented_full = True
+            self.presented_area = self.screen.get_width() * self.screen.get_height()
+            pygame.display.flip()
+        else:
+            self.presented_full = False
+            self.presented_area = sum(rect.width * rect.height for rect in dirty)
+            pygame.display.update(dirty)
+
+    # 在 area 内按 背景 -> 精灵 -> 界面 的顺序重新合成
+    # 每个界面元素都被裁剪在自己的矩形内，所以多个区域可以共用同一张界面表面
+    def _repaint(self, area, sprites, overlays):
+        screen = self.screen
+        screen.set_clip(area)
+        screen.blit(self.background, area, area)
+        draw_area(sprites, screen, area)
+        for name, rect, state, draw in overlays:
+            if rect.colliderect(area):
+                screen.set_clip(rect.clip(area))
+                draw(screen)
+        screen.set_clip(None)
+
+    def _remember(self, overlays):
+        self.overlay_states = {name: (rect.copy(), state) for name, rect, state, draw in overlays}
+
+# 合并大部分相互重叠的矩形（例如平台滚动前后的位置），合并后的面积不超过两者之和
+def merge_rects(rects):
+    merged = []
+    for rect in rects:
+        rect = pygame.Rect(rect)
+        i = 0
+        while i < len(merged):
+            union = rect.union(merged[i])
+            if union.width * union.height <= rect.width * rect.height + merged[i].width * merged[i].height:
+                rect = union
+                merged.pop(i)
+                i = 0
+            else:
+                i += 1
+        merged.append(rect)
+    return merged
+
+# 只重画与 area 重叠的精灵；实体存储等对象可以提供自己的 draw_area()
+def draw_area(sprites, surface, area):
+    if hasattr(sprites, 'draw_area'):
+        sprites.draw_area(surface, area)
+    else:
+        surface.blits([(sprite.image, sprite.rect) for sprite in sprites
+                       if sprite.rect.colliderect(area)], doreturn=False)
+
+# 可以带偏移绘制的精灵组（世界坐标 -> 屏幕坐标），擦除时使用上一帧实际画出的矩形
+class SpriteLayer(pygame.sprite.Group):
+    def __init__(self, *sprites):
+        super().__init__(*sprites)
+        self.drawn_rects = []
+
+    def clear(self, surface, background):
+        surface.blits([(background, rect, rect) for rect in self.drawn_rects], doreturn=False)
+
+    def draw(self, surface, offset=(0, 0)):
+        rects = surface.blits([(sprite.image, sprite.rect.move(offset)) for sprite in self.sprites()])
+        dirty = self.drawn_rects + rects
+        self.drawn_rects = rects
+        return dirty
+
+    def draw_area(self, surface, area, offset=(0, 0)):
+        blits = []
+        for sprite in self.sprites():
+            rect = sprite.rect.move(offset)
+            if rect.colliderect(area):
+                blits.append((sprite.image, rect))
+        surface.blits(blits, doreturn=False)
+
+    # 渲染快照接口：draw() 会画出的 (图像, 屏幕坐标) 列表
+    def blits(self, area, offset=(0, 0)):
+        return [(sprite.image, sprite.rect.move(offset).topleft) for sprite in self.sprites()]
+
+# 按顺序组合多个可绘制对象（SpriteLayer、实体存储或另一个 DrawList），对渲染器表现为一个整体
+# 给出摄像机时，所有对象都按摄像机的偏移绘制；嵌套在其他 DrawList 里时使用外层给出的偏移
+class DrawList:
+    def __init__(self, *items, camera=None):
+        self.items = list(items)
+        self.camera = camera
+
+    @property
+    def offset(self):
+        return self.camera.offset if self.camera is not None else (0, 0)
+
+    def clear(self, surface, background):
+        for item in self.items:
+            item.clear(surface, background)
+
+    def draw(self, surface, offset=None):
+        if offset is None:
+            offset = self.offset
+        dirty = []
+        for item in self.items:
+            dirty += item.draw(surface, offset)
+        return dirty
+
+    def draw_area(self, surface, area, offset=None):
+        if offset is None:
+            offset = self.offset
+        for item in self.items:
+            item.draw_area(surface, area, offset)
+
+    # 渲染快照接口：按 z 顺序合并各个对象的 (图像, 屏幕坐标) 列表，area 为屏幕范围
+    def blits(self, area, offset=None):
+        if offset is None:
+            offset = self.offset
+        blits = []
+        for item in self.items:
+            blits += item.blits(area, offset)
+        return blits
+
+# 按 z 顺序（从下到上）排列的命名精灵图层：layers 为 [(名字, 图层)]，可以用名字取出图层
+# 每一层各自记住上一帧画过的矩形；先擦掉所有层的旧位置，再从下到上画出新位置，
+# 所以上层的精灵总是盖在下层之上
+class Layers(DrawList):
+    def __init__(self, layers, camera=None):
+        super().__init__(*(layer for name, layer in layers), camera=camera)
+        self.names = [name for name, layer in layers]
+
+    def __getitem__(self, name):
+        return self.items[self.names.index(name)]
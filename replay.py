@@ -0,0 +1,129 @@
+import os
+
+# 无头回放不需要窗口和声卡
+if __name__ == "__main__":
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import argparse
+import json
+import struct
+import sys
+import time
+
+import numpy as np
+
+# 回放文件（.mprp）
+# 记录随机种子、创建 GameSim 的参数，以及每个逻辑帧的输入位掩码；
+# 输入按游程编码保存为 (位掩码, 连续帧数)，一局几分钟的游戏通常只有几 KB。
+# 同样的种子、参数和输入一定得到同样的模拟结果，所以回放既能用来复现问题，
+# 也能作为性能回归测试的固定负载。
+# 文件还保存了录制结束时的游戏状态，回放时可以检查结果是否一致。
+#
+#   python MegaPixel2.py --record run.mprp     # 录制
+#   python MegaPixel2.py --replay run.mprp     # 按正常速度回放并显示
+#   python replay.py play run.mprp             # 无头全速回放并检查结果
+#   python replay.py info run.mprp
+
+MAGIC = b'MPRP'
+VERSION = 1
+# 魔数、版本、JSON 描述的长度；JSON 之后是游程数组
+HEADER = struct.Struct('<4sHI')
+RUN = np.dtype([('inputs', 'u1'), ('count', '<u4')])
+
+class Replay:
+    def __init__(self, seed, params=None, runs=None, final=None):
+        self.seed = seed
+        self.params = dict(params or {})
+        # [[位掩码, 连续帧数], ...]
+        self.runs = [list(run) for run in runs or []]
+        # 录制结束时的游戏状态
+        self.final = final
+
+    # 录制一帧的输入
+    def record(self, inputs):
+        if self.runs and self.runs[-1][0] == inputs:
+            self.runs[-1][1] += 1
+        else:
+            self.runs.append([inputs, 1])
+
+    @property
+    def ticks(self):
+        return sum(count for inputs, count in self.runs)
+
+    # 逐帧的输入
+    def inputs(self):
+        for inputs, count in self.runs:
+            for _ in range(count):
+                yield inputs
+
+    # 逐帧的输入数组
+    def input_array(self):
+        runs = np.array([tuple(run) for run in self.runs], dtype=RUN)
+        return np.repeat(runs['inputs'], runs['count'])
+
+    def save(self, path):
+        description = json.dumps({'seed': self.seed, 'params': self.params,
+                                  'ticks': self.ticks, 'final': self.final}).encode('utf-8')
+        runs = np.array([tuple(run) for run in self.runs], dtype=RUN)
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, len(description)))
+            f.write(description)
+            f.write(runs.tobytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        if len(data) < HEADER.size:
+            raise ValueError(f"{path}: 不是有效的回放文件")
+        magic, version, length = HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: 不是有效的回放文件")
+        if version != VERSION:
+            raise ValueError(f"{path}: 不支持的回放文件版本 {version}")
+        description = json.loads(data[HEADER.size:HEADER.size + length].decode('utf-8'))
+        runs = np.frombuffer(data, dtype=RUN, offset=HEADER.size + length).tolist()
+        return cls(description['seed'], description['params'], runs, description.get('final'))
+
+# 无头全速回放，返回回放结束时的模拟（用完后由调用方 close()）
+def play_headless(replay):
+    import MegaPixel2
+    sim = MegaPixel2.GameSim(seed=replay.seed, **replay.params)
+    for inputs in replay.inputs():
+        sim.step(inputs)
+    return sim
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="MegaPixel2 回放工具")
+    commands = parser.add_subparsers(dest='command', required=True)
+    play_parser = commands.add_parser('play', help="无头全速回放，并检查结果是否与录制时一致")
+    play_parser.add_argument('path')
+    info_parser = commands.add_parser('info', help="显示回放文件的内容概要")
+    info_parser.add_argument('path')
+    args = parser.parse_args(argv)
+
+    try:
+        replay = Replay.load(args.path)
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    print(f"{args.path}: 种子 {replay.seed}，{replay.ticks} 帧，{len(replay.runs)} 段输入，参数 {replay.params}")
+    if args.command == 'info':
+        return 0
+
+    import MegaPixel2
+    started = time.perf_counter()
+    with play_headless(replay) as sim:
+        elapsed = time.perf_counter() - started
+        state = MegaPixel2.sim_state(sim)
+    print(f"回放用时 {elapsed:.3f} s（{replay.ticks / max(elapsed, 1e-9):.0f} 帧/秒）")
+    print(f"结束状态 {state}")
+    if replay.final is not None and replay.final != state:
+        print(f"与录制时的状态不一致：{replay.final}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+import pygame
+
+# 空间哈希网格（宽相位碰撞检测）
+# 把矩形按固定大小的格子分桶，查询时只检查与查询区域重叠的格子，
+# 这样碰撞检测的开销只和附近的物体数量有关，而不是和关卡中物体总数有关
+class SpatialHash:
+    def __init__(self, cell_size=128):
+        self.cell_size = cell_size
+        self.cells = {}
+        # 物体 -> (占用的格子范围, 插入序号)
+        self.entries = {}
+        self.next_order = 0
+
+    def cell_span(self, rect):
+        size = self.cell_size
+        return (rect.left // size, rect.top // size,
+                (rect.right - 1) // size, (rect.bottom - 1) // size)
+
+    def insert(self, obj, rect):
+        if obj in self.entries:
+            self.remove(obj)
+        span = self.cell_span(rect)
+        self.entries[obj] = (span, self.next_order)
+        self.next_order += 1
+        self._add_to_cells(obj, span)
+
+    def remove(self, obj):
+        entry = self.entries.pop(obj, None)
+        if entry is not None:
+            self._remove_from_cells(obj, entry[0])
+
+    # 物体移动后调用，只有占用的格子范围变化时才重新分桶
+    def move(self, obj, rect):
+        entry = self.entries.get(obj)
+        if entry is None:
+            return
+        span = self.cell_span(rect)
+        if span == entry[0]:
+            return
+        self._remove_from_cells(obj, entry[0])
+        self._add_to_cells(obj, span)
+        self.entries[obj] = (span, entry[1])
+
+    # 返回与 rect 所在格子重叠的物体（按插入顺序排列，保证结果可重复）
+    def query(self, rect):
+        x0, y0, x1, y1 = self.cell_span(rect)
+        cells = self.cells
+        found = {}
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                cell = cells.get((cx, cy))
+                if cell:
+                    found.update(cell)
+        if len(found) < 2:
+            return list(found)
+        entries = self.entries
+        return sorted(found, key=lambda obj: entries[obj][1])
+
+    def clear(self):
+        self.cells.clear()
+        self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, obj):
+        return obj in self.entries
+
+    def _add_to_cells(self, obj, span):
+        x0, y0, x1, y1 = span
+        cells = self.cells
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                cell = cells.get((cx, cy))
+                if cell is None:
+                    cell = cells[(cx, cy)] = {}
+                cell[obj] = None
+
+    def _remove_from_cells(self, obj, span):
+        x0, y0, x1, y1 = span
+        cells = self.cells
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                cell = cells.get((cx, cy))
+                if cell is not None:
+                    cell.pop(obj, None)
+                    if not cell:
+                        del cells[(cx, cy)]
+
+# 带空间哈希索引的精灵组
+# 精灵加入/移出组（包括 kill()）时自动维护网格；
+# update() 之后按精灵的新位置增量更新网格
+class SpatialGroup(pygame.sprite.Group):
+    def __init__(self, *sprites, cell_size=128):
+        self.grid = SpatialHash(cell_size)
+        super().__init__(*sprites)
+
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite, layer)
+        self.grid.insert(sprite, sprite.rect)
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        self.grid.remove(sprite)
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        grid = self.grid
+        for sprite in self.sprites():
+            grid.move(sprite, sprite.rect)
+
+    # 单个精灵移动后手动同步网格
+    def move(self, sprite):
+        self.grid.move(sprite, sprite.rect)
+
+    # 返回 rect 附近的精灵（候选集合，仍需要精确的 colliderect 检测）
+    def query(self, rect):
+        return self.grid.query(rect)
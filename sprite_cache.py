@@ -0,0 +1,39 @@
+import pygame
+
+# 精灵图像变体缓存
+# 很多精灵的外观只有有限的几种（朝向、闪烁、动画帧……），
+# 与其每帧复制/翻转/混合出新的 Surface，不如按键缓存每种变体，
+# 第一次用到时由 build(key) 生成，之后只交换引用。
+# 缓存通常挂在类上，由所有实例共享。
+class VariantCache:
+    def __init__(self, build):
+        self.build = build
+        self.variants = {}
+
+    def get(self, key):
+        variant = self.variants.get(key)
+        if variant is None:
+            variant = self.variants[key] = self.build(key)
+        return variant
+
+    # 预先生成所有变体，避免游戏过程中第一次用到时卡顿
+    def prebuild(self, keys):
+        for key in keys:
+            self.get(key)
+
+    def clear(self):
+        self.variants.clear()
+
+    def __len__(self):
+        return len(self.variants)
+
+# 一帧图像的逐像素碰撞遮罩，以及不透明像素的包围矩形（相对图像左上角）
+class FrameMask:
+    def __init__(self, image):
+        self.mask = pygame.mask.from_surface(image)
+        rects = self.mask.get_bounding_rects()
+        self.bounds = rects[0].unionall(rects[1:]) if rects else pygame.Rect(0, 0, 0, 0)
+
+# 按帧图像缓存的碰撞遮罩：玩家外观变体、金币旋转帧、MegaPixel 脉动帧等都是预先生成并复用的
+# 图像，所以每一帧的遮罩只在第一次参与碰撞时生成一次
+frame_masks = VariantCache(FrameMask)
@@ -0,0 +1,48 @@
+import time
+from contextlib import contextmanager
+
+import pygame
+
+# 启动耗时报告：记录导入、显示、字体、音效合成、关卡构建等阶段各花了多少时间
+class StartupReport:
+    def __init__(self):
+        self.phases = []
+
+    def record(self, name, seconds):
+        self.phases.append((name, seconds))
+
+    # with report.phase('fonts'): ... 记录代码块的耗时
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def total(self):
+        return sum(seconds for name, seconds in self.phases)
+
+    def format(self):
+        lines = ["启动耗时:"]
+        for name, seconds in self.phases:
+            lines.append(f"  {name:<10}{seconds * 1000:9.1f} ms")
+        lines.append(f"  {'total':<10}{self.total() * 1000:9.1f} ms")
+        return "\n".join(lines)
+
+# 延迟加载的字体：第一次使用时才初始化字体模块并调用 loader 加载，
+# 其余属性和方法（render、size……）都转交给真正的字体对象
+class LazyFont:
+    def __init__(self, loader):
+        self.loader = loader
+        self.font = None
+
+    def load(self):
+        if self.font is None:
+            if not pygame.font.get_init():
+                pygame.font.init()
+            self.font = self.loader()
+        return self.font
+
+    def __getattr__(self, name):
+        return getattr(self.load(), name)
@@ -0,0 +1,80 @@
+import hashlib
+import os
+
+import numpy as np
+import pygame
+
+from disk_cache import cache_dir
+
+# 程序化音效合成
+# 用 NumPy 一次性生成整段波形，按混音器实际的格式（采样率、位深、声道数）
+# 转换后交给 pygame.sndarray；渲染结果按参数缓存到磁盘，之后启动直接读取
+class SoundSynth:
+    # 缓存格式版本，合成算法改变时加一，让旧缓存失效
+    CACHE_VERSION = 1
+
+    def __init__(self, use_cache=True):
+        mixer_format = pygame.mixer.get_init()
+        if mixer_format is None:
+            raise pygame.error("混音器尚未初始化")
+        self.sample_rate, self.size, self.channels = mixer_format
+        self.cache_path = None
+        if use_cache:
+            # 缓存目录建不起来时（只读的主目录等）不使用缓存，照常合成
+            try:
+                self.cache_path = cache_dir('sounds')
+            except OSError:
+                pass
+
+    # 单音：frequency 赫兹，duration 毫秒
+    def tone(self, frequency, duration):
+        return self.sequence([(frequency, duration)])
+
+    # 音符序列：[(频率, 时长毫秒), ...]，依次连接
+    def sequence(self, notes):
+        return pygame.sndarray.make_sound(self.render(notes))
+
+    # 返回混音器格式的采样数组（优先读取磁盘缓存）
+    def render(self, notes):
+        notes = tuple((float(frequency), float(duration)) for frequency, duration in notes)
+        path = None
+        if self.cache_path is not None:
+            key = repr((self.CACHE_VERSION, notes, self.sample_rate, self.size, self.channels))
+            path = os.path.join(self.cache_path, hashlib.sha1(key.encode()).hexdigest() + '.npy')
+            try:
+                return np.load(path, allow_pickle=False)
+            except (OSError, ValueError):
+                pass
+
+        samples = self.to_mixer_format(np.concatenate([self.wave(frequency, duration)
+                                                       for frequency, duration in notes]))
+        if path is not None:
+            try:
+                np.save(path, samples, allow_pickle=False)
+            except OSError:
+                pass
+        return samples
+
+    # 生成 [-1, 1] 范围内的正弦波（每个音符从相位 0 开始）
+    def wave(self, frequency, duration):
+        n_samples = int(round(duration * 0.001 * self.sample_rate))
+        t = np.arange(n_samples, dtype=np.float64) / self.sample_rate
+        return np.sin(2 * np.pi * frequency * t)
+
+    # 把浮点波形转换为混音器的采样格式，多声道时复制到每个声道
+    def to_mixer_format(self, wave):
+        bits = abs(self.size)
+        if bits == 32:
+            samples = wave.astype(np.float32)
+        else:
+            peak = (1 << (bits - 1)) - 1
+            dtype = {(8, True): np.int8, (8, False): np.uint8,
+                     (16, True): np.int16, (16, False): np.uint16}[(bits, self.size < 0)]
+            samples = np.round(wave * peak)
+            if self.size > 0:
+                samples += peak + 1
+            samples = samples.astype(dtype)
+
+        if self.channels > 1:
+            samples = np.repeat(samples[:, np.newaxis], self.channels, axis=1)
+        return np.ascontiguousarray(samples)
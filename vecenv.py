@@ -0,0 +1,490 @@
+import os
+
+# 批量环境不需要窗口和声卡
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import argparse
+import random
+import time
+
+import numpy as np
+import pygame
+
+import MegaPixel2
+from MegaPixel2 import (FPS, INPUT_JUMP, INPUT_LEFT, INPUT_RIGHT, MEGAPIXEL_PULSE, PLATFORM_DATA,
+                        SCREEN_HEIGHT, SCREEN_WIDTH, TILE_SIZE, WIN_COINS)
+from entities import rect_round
+from physics import sweep_arrays
+from sprite_cache import frame_masks
+
+# 批量环境：用于训练自动玩家
+# N 局一屏的 MegaPixel2 同步推进，所有状态都是形如 (N,) 或 (N, 实体数) 的 NumPy 数组，
+# 每一步对全部实例做向量运算；规则与 GameSim 完全一致，同样的种子和动作得到同样的结果。
+# 只有按平台（9 个）和敌人槽位的循环是 Python 循环，与实例数无关。
+#
+#   env = VecEnv(1024)
+#   obs = env.reset(np.arange(1024))
+#   obs, rewards, dones = env.step(actions)   # actions 为输入位掩码数组
+
+# 观测向量的各列
+OBS_FIELDS = [
+    'x', 'y', 'velocity_x', 'velocity_y', 'on_ground', 'health', 'coins', 'invincible',
+    'enemy_dx', 'enemy_dy', 'enemy_present',
+    'coin_dx', 'coin_dy', 'coin_present',
+    'megapixel_dx', 'megapixel_dy', 'megapixel_present',
+]
+
+# 敌人、金币的尺寸，MegaPixel 的基础尺寸
+ENEMY_SIZE = TILE_SIZE
+COIN_SIZE = TILE_SIZE // 2
+MEGAPIXEL_SIZE = TILE_SIZE
+
+def overlaps(ax, ay, aw, ah, bx, by, bw, bh):
+    return (ax < bx + bw) & (bx < ax + aw) & (ay < by + bh) & (by < ay + ah)
+
+# 玩家遮罩与另一帧的遮罩在各个相对偏移下是否重叠：table[dy + pad - 1, dx + pad - 1]，
+# (dx, dy) 为另一帧左上角相对玩家左上角的偏移；pad 不小于另一帧的宽高，
+# 所以不同大小的帧可以叠成同样形状的表
+def contact_table(player_mask, mask, pad):
+    width, height = mask.get_size()
+    # convolve() 的 (i, j) 位表示另一帧的右下角放在 (i, j) 时两者重叠
+    convolved = pygame.surfarray.array_red(player_mask.convolve(mask).to_surface()).T > 0
+    player_width, player_height = player_mask.get_size()
+    table = np.zeros((player_height + pad - 1, player_width + pad - 1), dtype=bool)
+    table[pad - height:, pad - width:] = convolved
+    return table
+
+class VecEnv:
+    # 参数与 GameSim 相同（包括每步推进的逻辑帧数 dt）；max_ticks 为每局的最大帧数（超过后视为结束）
+    # 奖励 = 金币变化 * coin_reward + 生命值变化 * health_reward
+    def __init__(self, num_envs, enemy_count=6, coin_count=15, megapixel_count=4, enemy_speed=2,
+                 jump_power=16, win_coins=WIN_COINS, max_ticks=FPS * 180,
+                 coin_reward=1.0, health_reward=0.1, dt=1):
+        if not isinstance(dt, int) or dt < 1:
+            raise ValueError(f"dt 必须是正整数: {dt!r}")
+        self.num_envs = num_envs
+        self.dt = dt
+        self.counts = dict(enemy_count=enemy_count, coin_count=coin_count, megapixel_count=megapixel_count)
+        self.enemy_speed = enemy_speed
+        self.jump_power = jump_power
+        self.win_coins = win_coins
+        self.max_ticks = max_ticks
+        self.coin_reward = coin_reward
+        self.health_reward = health_reward
+
+        # 玩家的物理参数取自 Player，保证与游戏一致
+        template = MegaPixel2.Player(*MegaPixel2.PLAYER_SPAWN, MegaPixel2.SilentSoundSystem())
+        self.spawn = template.rect.topleft
+        self.player_size = template.rect.size
+        self.speed = template.speed
+        self.gravity = template.gravity
+        self.max_fall_speed = template.max_fall_speed
+        self.max_health = template.max_health
+
+        # 与游戏相同的逐像素碰撞，预先算成按相对偏移查询的表（玩家各外观变体的不透明像素相同）
+        # 接触表和可见部分的外框都按帧号排列（敌人只有一帧）
+        player_mask = frame_masks.get(template.image)
+        enemy_masks = [frame_masks.get(MegaPixel2.EnemyStore.images.get('default'))]
+        coin_masks = [frame_masks.get(frame) for frame in MegaPixel2.CoinStore.atlases.get('gold')]
+        mega_masks = [frame_masks.get(MegaPixel2.MegaPixelStore.pulse_frames.get(pulse))
+                      for pulse in range(-MEGAPIXEL_PULSE, MEGAPIXEL_PULSE + 1)]
+        self.player_bounds = tuple(player_mask.bounds)
+        self.player_feet = player_mask.bounds.bottom
+        self.enemy_head = enemy_masks[0].bounds.top
+        mega_pad = MEGAPIXEL_SIZE + MEGAPIXEL_PULSE * 2
+        self.mega_pad = mega_pad
+        self.enemy_contact = np.stack([contact_table(player_mask.mask, mask.mask, ENEMY_SIZE) for mask in enemy_masks])
+        self.coin_contact = np.stack([contact_table(player_mask.mask, mask.mask, COIN_SIZE) for mask in coin_masks])
+        self.mega_contact = np.stack([contact_table(player_mask.mask, mask.mask, mega_pad) for mask in mega_masks])
+        self.enemy_bounds = np.array([tuple(mask.bounds) for mask in enemy_masks], dtype=np.int64)
+        self.coin_bounds = np.array([tuple(mask.bounds) for mask in coin_masks], dtype=np.int64)
+        self.mega_bounds = np.array([tuple(mask.bounds) for mask in mega_masks], dtype=np.int64)
+
+        # 平台（所有实例共用，按加入的顺序）
+        platforms = np.array([data[:4] for data in PLATFORM_DATA], dtype=np.int64)
+        self.plat_x, self.plat_y, self.plat_w, self.plat_h = platforms.T
+        self.plat_right = self.plat_x + self.plat_w
+
+        n = num_envs
+        # 玩家
+        self.x = np.zeros(n, dtype=np.int64)
+        self.y = np.zeros(n, dtype=np.int64)
+        self.velocity_x = np.zeros(n, dtype=np.int64)
+        self.velocity_y = np.zeros(n, dtype=np.float64)
+        self.on_ground = np.zeros(n, dtype=bool)
+        self.health = np.zeros(n, dtype=np.int64)
+        self.coins = np.zeros(n, dtype=np.int64)
+        self.invincible = np.zeros(n, dtype=np.int64)
+        # 每局的状态
+        self.tick = np.zeros(n, dtype=np.int64)
+        self.game_over = np.zeros(n, dtype=bool)
+        self.game_won = np.zeros(n, dtype=bool)
+        self.seeds = np.zeros(n, dtype=np.int64)
+        # 敌人
+        shape = (n, enemy_count)
+        self.enemy_x = np.zeros(shape, dtype=np.int64)
+        self.enemy_y = np.zeros(shape, dtype=np.int64)
+        self.enemy_speed_x = np.zeros(shape, dtype=np.int64)
+        self.enemy_alive = np.zeros(shape, dtype=bool)
+        # 金币
+        shape = (n, coin_count)
+        self.coin_x = np.zeros(shape, dtype=np.int64)
+        self.coin_y = np.zeros(shape, dtype=np.int64)
+        self.coin_offset = np.zeros(shape, dtype=np.float64)
+        self.coin_alive = np.zeros(shape, dtype=bool)
+        # 同一局的金币一起生成，旋转角度相同
+        self.coin_rotation = np.zeros(n, dtype=np.int64)
+        # MegaPixel
+        shape = (n, megapixel_count)
+        self.mega_x = np.zeros(shape, dtype=np.int64)
+        self.mega_y = np.zeros(shape, dtype=np.int64)
+        self.mega_size = np.zeros(shape, dtype=np.int64)
+        self.mega_offset = np.zeros(shape, dtype=np.float64)
+        self.mega_timer = np.zeros(shape, dtype=np.int64)
+        self.mega_alive = np.zeros(shape, dtype=bool)
+
+    # 用给定的种子重新开始全部实例（不给出时每个实例换用下一个种子），返回观测
+    def reset(self, seeds=None):
+        if seeds is None:
+            seeds = self.seeds + self.num_envs
+        self.reset_instances(np.arange(self.num_envs), np.asarray(seeds, dtype=np.int64))
+        return self.observe()
+
+    # 重新开始部分实例；关卡与 GameSim(seed=种子) 生成的完全相同
+    def reset_instances(self, indices, seeds):
+        for i, seed in zip(indices.tolist(), seeds.tolist()):
+            layout = MegaPixel2.build_level(rng=random.Random(seed), enemy_speed=self.enemy_speed,
+                                            **self.counts)
+            records = layout.chunk(0)
+            enemies = np.array(records['enemies'], dtype=np.float64).reshape(-1, 3)
+            self.enemy_x[i], self.enemy_y[i], self.enemy_speed_x[i] = enemies.T
+            coins = np.array(records['coins'], dtype=np.float64).reshape(-1, 3)
+            self.coin_x[i], self.coin_y[i], self.coin_offset[i] = coins.T
+            megapixels = np.array(records['megapixels'], dtype=np.float64).reshape(-1, 3)
+            self.mega_x[i], self.mega_y[i], self.mega_offset[i] = megapixels.T
+        self.seeds[indices] = seeds
+
+        self.enemy_alive[indices] = True
+        self.coin_alive[indices] = True
+        self.coin_rotation[indices] = 0
+        self.mega_alive[indices] = True
+        self.mega_size[indices] = MEGAPIXEL_SIZE
+        self.mega_timer[indices] = 0
+
+        self.x[indices], self.y[indices] = self.spawn
+        self.velocity_x[indices] = 0
+        self.velocity_y[indices] = 0
+        self.on_ground[indices] = False
+        self.health[indices] = self.max_health
+        self.coins[indices] = 0
+        self.invincible[indices] = 0
+        self.tick[indices] = 0
+        self.game_over[indices] = False
+        self.game_won[indices] = False
+
+    # 推进一帧；结束的实例（游戏结束或达到 max_ticks）会自动换下一个种子重新开始，
+    # 返回的观测已经是新一局的观测
+    def step(self, actions):
+        actions = np.asarray(actions, dtype=np.int64)
+        coins_before = self.coins.copy()
+        health_before = self.health.copy()
+
+        self.tick += self.dt
+        self._update_player(actions)
+        self._update_enemies()
+        self._update_coins()
+        self._update_megapixels()
+
+        # 检查游戏结束条件
+        lost = self.health <= 0
+        won = self.coins >= self.win_coins
+        self.game_over = lost | won
+        self.game_won = won
+
+        rewards = ((self.coins - coins_before) * self.coin_reward +
+                   (self.health - health_before) * self.health_reward)
+        dones = self.game_over | (self.tick >= self.max_ticks)
+        finished = np.flatnonzero(dones)
+        if len(finished):
+            self.reset_instances(finished, self.seeds[finished] + self.num_envs)
+        return self.observe(), rewards.astype(np.float32), dones
+
+    # 与 Player.update 相同的规则
+    def _update_player(self, actions):
+        width, height = self.player_size
+        dt = self.dt
+        velocity_y = self.velocity_y
+
+        # 处理输入（右键优先）
+        left = (actions & INPUT_LEFT) != 0
+        right = (actions & INPUT_RIGHT) != 0
+        velocity_x = np.where(right, self.speed, np.where(left, -self.speed, 0))
+        jumping = ((actions & INPUT_JUMP) != 0) & self.on_ground
+        velocity_y[jumping] = -self.jump_power
+
+        # 应用重力：按 dt 个子帧逐帧累加（与 Player.update 相同）
+        y = self.y
+        for frame in range(dt):
+            velocity_y += self.gravity
+            np.minimum(velocity_y, self.max_fall_speed, out=velocity_y)
+            if frame < dt - 1:
+                y = rect_round(y + velocity_y)
+        dy = y - self.y + velocity_y
+
+        # 移动并解决与平台的碰撞
+        start_x, start_y, x, y, on_ground = self._move(velocity_x * dt, dy)
+
+        # 世界边界检查
+        np.clip(x, 0, SCREEN_WIDTH - width, out=x)
+        top = y < 0
+        y[top] = 0
+        velocity_y[top] = 0
+        bottom = y + height > SCREEN_HEIGHT
+        y[bottom] = SCREEN_HEIGHT - height
+        on_ground |= bottom
+        velocity_y[bottom] = 0
+
+        # 敌人碰撞检测：按敌人顺序依次处理，踩到敌人后的反弹会影响后面的判断
+        vulnerable = self.invincible <= 0
+        for k in range(self.enemy_x.shape[1]):
+            enemy_x = self.enemy_x[:, k]
+            enemy_y = self.enemy_y[:, k]
+            candidates = vulnerable & self.enemy_alive[:, k]
+            if not candidates.any():
+                continue
+            hit = candidates & self._touches(start_x, start_y, x, y, enemy_x, enemy_y, 0,
+                                             self.enemy_bounds, self.enemy_contact, ENEMY_SIZE)
+            if not hit.any():
+                continue
+            # 从上方跳到敌人头上（按这一步开始时可见部分的下沿和敌人可见部分的上沿判断）
+            stomp = (hit & ((velocity_y > 0) | (y > start_y)) &
+                     (start_y + self.player_feet <= enemy_y + self.enemy_head + 10))
+            self.enemy_alive[stomp, k] = False
+            velocity_y[stomp] = -self.jump_power * 0.7
+            self.coins[stomp] += 5
+            # 被敌人碰到：受伤并被击退
+            hurt = hit & ~stomp
+            self.health[hurt] -= 15
+            self.invincible[hurt] = 60
+            knockback = np.where(x + width // 2 < enemy_x + ENEMY_SIZE // 2, -8, 8)
+            velocity_x[hurt] = knockback[hurt]
+            velocity_y[hurt] = -5
+
+        # 收集金币（按当前的旋转帧）
+        frame = self.coin_rotation * len(self.coin_contact) // 360
+        hit = self.coin_alive & self._touches(
+            start_x[:, None], start_y[:, None], x[:, None], y[:, None], self.coin_x, self.coin_y,
+            frame[:, None], self.coin_bounds, self.coin_contact, COIN_SIZE)
+        self.coin_alive &= ~hit
+        self.coins += hit.sum(axis=1)
+
+        # 收集MegaPixel特殊物品（按当前的脉动帧）
+        pulse = (self.mega_size - MEGAPIXEL_SIZE) // 2 + MEGAPIXEL_PULSE
+        hit = self.mega_alive & self._touches(
+            start_x[:, None], start_y[:, None], x[:, None], y[:, None], self.mega_x, self.mega_y,
+            pulse, self.mega_bounds, self.mega_contact, self.mega_pad)
+        self.mega_alive &= ~hit
+        collected = hit.sum(axis=1)
+        self.coins += collected * 10
+        self.health = np.where(collected > 0,
+                               np.minimum(self.max_health, self.health + collected * 25), self.health)
+
+        # 无敌时间处理
+        np.maximum(self.invincible - dt, 0, out=self.invincible)
+        # 确保生命值不会低于0
+        np.maximum(self.health, 0, out=self.health)
+
+        self.x = x
+        self.y = y
+        self.velocity_x = velocity_x
+        self.on_ground = on_ground
+
+    # 与 Player.move 相同：按位移移动并解决与平台的碰撞
+    # 返回连续移动的起点、终点和是否落在平台上
+    def _move(self, dx, dy):
+        width, height = self.player_size
+        velocity_y = self.velocity_y
+        x = self.x.copy()
+        y = self.y.copy()
+        dx = dx.astype(np.float64)
+        on_ground = np.zeros(self.num_envs, dtype=bool)
+
+        # 开始时已经嵌在平台里的先推出去：按平台顺序依次处理，前一个平台的修正会影响后面的判断
+        for px, py, pw, ph in zip(self.plat_x.tolist(), self.plat_y.tolist(),
+                                  self.plat_w.tolist(), self.plat_h.tolist()):
+            hit = overlaps(x, y, width, height, px, py, pw, ph)
+            if not hit.any():
+                continue
+            land = hit & (dy > 0) & (y + height > py) & (y < py)
+            y[land] = py - height
+            on_ground |= land
+            velocity_y[land] = 0
+            dy[land] = 0
+            hit &= ~land
+            bump = hit & (dy < 0) & (y < py + ph) & (y + height > py + ph)
+            y[bump] = py + ph
+            velocity_y[bump] = 0
+            dy[bump] = 0
+            hit &= ~bump
+            push_left = hit & (dx > 0) & (x + width > px) & (x < px)
+            x[push_left] = px - width
+            hit &= ~push_left
+            push_right = hit & (dx < 0) & (x < px + pw) & (x + width > px + pw)
+            x[push_right] = px + pw
+        start_x = x
+        start_y = y
+
+        # 沿位移找出每个实例最早接触的平台，停下这个轴，剩下的位移沿另一个轴继续
+        x = x.astype(np.float64)
+        y = y.astype(np.float64)
+        rows = np.arange(self.num_envs)
+        for _ in range(3):
+            t0, t1, along_x = sweep_arrays(x[:, None], y[:, None], width, height, dx[:, None], dy[:, None],
+                                           self.plat_x, self.plat_y, self.plat_w, self.plat_h)
+            t0 = np.where((t0 < t1) & (t0 >= 0) & (t0 < 1), t0, np.inf)
+            first = t0.argmin(axis=1)
+            t = t0[rows, first]
+            contact = t < np.inf
+            free = ~contact
+            x[free] += dx[free]
+            y[free] += dy[free]
+            dx[free] = 0
+            dy[free] = 0
+            if not contact.any():
+                break
+            side = contact & along_x[rows, first]
+            vertical = contact & ~side
+
+            # 从上方落在平台上，或者从下方碰到平台
+            t_vertical = t[vertical]
+            x[vertical] += dx[vertical] * t_vertical
+            dx[vertical] -= dx[vertical] * t_vertical
+            land = vertical & (dy > 0)
+            y[land] = self.plat_y[first[land]] - height
+            on_ground |= land
+            bump = vertical & ~land
+            y[bump] = self.plat_y[first[bump]] + self.plat_h[first[bump]]
+            dy[vertical] = 0
+            velocity_y[vertical] = 0
+
+            # 水平碰撞
+            t_side = t[side]
+            y[side] += dy[side] * t_side
+            dy[side] -= dy[side] * t_side
+            x[side] = np.where(dx[side] > 0, self.plat_x[first[side]] - width, self.plat_right[first[side]])
+            dx[side] = 0
+        return start_x, start_y, rect_round(x), rect_round(y), on_ground
+
+    # 与 Player.touches 相同：这一步从 start 沿直线移动到 (x, y) 的路上，可见像素是否碰到另一个精灵
+    # frame 为另一个精灵的帧号，bounds[帧号] 为可见部分的外框 (x, y, 宽, 高)，contact[帧号] 为遮罩接触表
+    def _touches(self, start_x, start_y, x, y, other_x, other_y, frame, bounds, contact, pad):
+        own_x, own_y, own_width, own_height = self.player_bounds
+        box = bounds[frame]
+        dx = x - start_x
+        dy = y - start_y
+        t0, t1, along_x = sweep_arrays(start_x + own_x, start_y + own_y, own_width, own_height, dx, dy,
+                                       other_x + box[..., 0], other_y + box[..., 1], box[..., 2], box[..., 3])
+        hit = (t0 < t1) & (t0 < 1) & (t1 > 0)
+        if not hit.any():
+            return hit
+        index = np.nonzero(hit)
+        start_x, start_y, dx, dy, other_x, other_y, frame, t0, t1 = (
+            np.broadcast_to(values, hit.shape)[index]
+            for values in (start_x, start_y, dx, dy, other_x, other_y, frame, t0, t1))
+        # 结束时仍然重叠就取最终位置，否则取穿过时的中点
+        t = np.where(t1 > 1, 1.0, (np.maximum(t0, 0) + t1) / 2)
+        probe_x = rect_round(start_x + dx * t)
+        probe_y = rect_round(start_y + dy * t)
+        hit[index] = contact[frame, other_y - probe_y + pad - 1, other_x - probe_x + pad - 1]
+        return hit
+
+    # 与 EnemyStore.update 相同的巡逻规则
+    def _update_enemies(self):
+        speed = self.enemy_speed_x
+        self.enemy_x += speed * self.dt
+        left = self.enemy_x
+        right = left + ENEMY_SIZE
+        bottom = self.enemy_y + ENEMY_SIZE
+
+        support = ((bottom[..., None] == self.plat_y) &
+                   (right[..., None] > self.plat_x) & (left[..., None] < self.plat_right))
+        on_platform = support.any(axis=-1)
+        first = support.argmax(axis=-1)
+        at_edge = (((speed > 0) & (right >= self.plat_right[first] - 5)) |
+                   ((speed < 0) & (left <= self.plat_x[first] + 5)))
+        turn = np.where(on_platform, at_edge, True)
+        turn ^= (left < 0) | (right > SCREEN_WIDTH)
+        speed *= np.where(turn, -1, 1)
+
+    # 与 CoinStore.update 相同
+    def _update_coins(self):
+        now = (self.tick * 1000 // FPS)[:, None]
+        self.coin_y = rect_round(self.coin_y + np.sin(now / 300 + self.coin_offset) * 0.8 * self.dt)
+        self.coin_rotation = (self.coin_rotation + 2 * self.dt) % 360
+
+    # 与 MegaPixelStore.update 相同
+    def _update_megapixels(self):
+        now = (self.tick * 1000 // FPS)[:, None]
+        self.mega_y = rect_round(self.mega_y + np.sin(now / 250 + self.mega_offset) * 1.2 * self.dt)
+        self.mega_timer += self.dt
+        pulse = np.trunc(np.sin(self.mega_timer / 10) * MEGAPIXEL_PULSE).astype(np.int64)
+        growth = MEGAPIXEL_SIZE + pulse * 2 - self.mega_size
+        self.mega_x -= growth // 2
+        self.mega_y -= growth // 2
+        self.mega_size += growth
+
+    # 观测：玩家状态，以及最近的敌人、金币、MegaPixel 的相对位置（按屏幕尺寸归一化）
+    def observe(self):
+        width, height = self.player_size
+        center_x = self.x + width // 2
+        center_y = self.y + height // 2
+        obs = np.empty((self.num_envs, len(OBS_FIELDS)), dtype=np.float32)
+        obs[:, 0] = self.x / SCREEN_WIDTH
+        obs[:, 1] = self.y / SCREEN_HEIGHT
+        obs[:, 2] = self.velocity_x / self.speed
+        obs[:, 3] = self.velocity_y / self.max_fall_speed
+        obs[:, 4] = self.on_ground
+        obs[:, 5] = self.health / self.max_health
+        obs[:, 6] = self.coins / self.win_coins
+        obs[:, 7] = self.invincible > 0
+
+        column = 8
+        for entity_x, entity_y, size, alive in (
+                (self.enemy_x, self.enemy_y, ENEMY_SIZE, self.enemy_alive),
+                (self.coin_x, self.coin_y, COIN_SIZE, self.coin_alive),
+                (self.mega_x, self.mega_y, self.mega_size, self.mega_alive)):
+            dx = entity_x + size // 2 - center_x[:, None]
+            dy = entity_y + size // 2 - center_y[:, None]
+            distance = np.where(alive, dx * dx + dy * dy, np.iinfo(np.int64).max)
+            nearest = distance.argmin(axis=1)[:, None]
+            present = alive.any(axis=1)
+            obs[:, column] = np.where(present, np.take_along_axis(dx, nearest, 1)[:, 0], 0) / SCREEN_WIDTH
+            obs[:, column + 1] = np.where(present, np.take_along_axis(dy, nearest, 1)[:, 0], 0) / SCREEN_HEIGHT
+            obs[:, column + 2] = present
+            column += 3
+        return obs
+
+# 测量吞吐量：每秒推进的实例帧数（单进程）
+def measure(num_envs, steps, seed=0):
+    env = VecEnv(num_envs)
+    env.reset(np.arange(num_envs) + seed)
+    rng = np.random.default_rng(seed)
+    actions = rng.choice([0, INPUT_LEFT, INPUT_RIGHT, INPUT_JUMP, INPUT_LEFT | INPUT_JUMP,
+                          INPUT_RIGHT | INPUT_JUMP], size=(steps, num_envs))
+    started = time.perf_counter()
+    for inputs in actions:
+        env.step(inputs)
+    elapsed = time.perf_counter() - started
+    return num_envs * steps / elapsed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="MegaPixel2 批量环境吞吐量测试")
+    parser.add_argument('--envs', type=int, nargs='+', default=[1, 64, 1024], help="同时运行的实例数")
+    parser.add_argument('--steps', type=int, default=600, help="推进的帧数")
+    args = parser.parse_args(argv)
+    for num_envs in args.envs:
+        print(f"{num_envs:>6} 个实例：{measure(num_envs, args.steps):>12,.0f} 帧/秒")
+
+if __name__ == "__main__":
+    main()
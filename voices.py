@@ -0,0 +1,67 @@
+import pygame
+
+# 有限声部的音效调度
+# 游戏逻辑里的 play() 只把音效名字追加到队列，不碰混音器，所以可以在碰撞循环里随便调用；
+# 主循环每帧调用一次 dispatch()：同一帧里重复的请求合并成一次，再按优先级分配到预留的声道上。
+# 每种音效有优先级和最多同时播放的声部数：
+#   同一种音效的声部用完时，重新开始其中最早的一个（连续吃金币时总能听到最新的一声）
+#   预留的声道都在使用时，抢占优先级更低的音效里最早开始的一个；没有更低的就放弃这次播放
+# 所以一串金币声最多占用自己的几个声部，不会挤掉受伤、胜利这些重要的提示音。
+
+class SoundDispatcher:
+    # sounds 为 名字 -> pygame.mixer.Sound；voices 为 名字 -> (优先级, 最多同时播放的声部数)，
+    # 没有列出的音效优先级为 0、只有一个声部；channels 为预留给调度器的声道数
+    # （预留的声道不会被 Sound.play() 的自动分配占用）
+    def __init__(self, sounds, voices, channels=8):
+        self.sounds = sounds
+        self.voices = voices
+        if pygame.mixer.get_num_channels() < channels:
+            pygame.mixer.set_num_channels(channels)
+        pygame.mixer.set_reserved(channels)
+        self.channels = [pygame.mixer.Channel(i) for i in range(channels)]
+        # 每个声道正在播放的 (音效名字, 优先级, 开始播放的序号)，空闲时为 None
+        self.playing = [None] * channels
+        self.started = 0
+        self.queue = []
+
+    # 请求播放一次音效（只追加到队列，在下一次 dispatch() 时播放）
+    def play(self, name):
+        self.queue.append(name)
+
+    def voice(self, name):
+        return self.voices.get(name, (0, 1))
+
+    # 播放这一帧排队的音效，每帧调用一次
+    def dispatch(self):
+        if not self.queue:
+            return
+        # 合并重复的请求（保留第一次请求的顺序），优先级高的先分配声道
+        requests = sorted(dict.fromkeys(self.queue), key=lambda name: -self.voice(name)[0])
+        self.queue = []
+        for index, channel in enumerate(self.channels):
+            if self.playing[index] is not None and not channel.get_busy():
+                self.playing[index] = None
+        for name in requests:
+            self._start(name)
+
+    def _start(self, name):
+        sound = self.sounds.get(name)
+        if sound is None:
+            return
+        priority, limit = self.voice(name)
+        playing = self.playing
+        same = [index for index, state in enumerate(playing) if state is not None and state[0] == name]
+        if len(same) >= limit:
+            # 这种音效的声部用完了：重新开始最早的一个
+            index = min(same, key=lambda index: playing[index][2])
+        elif None in playing:
+            index = playing.index(None)
+        else:
+            # 抢占优先级最低、开始得最早的声道
+            lower = [index for index, state in enumerate(playing) if state[1] < priority]
+            if not lower:
+                return
+            index = min(lower, key=lambda index: playing[index][1:])
+        self.channels[index].play(sound)
+        playing[index] = (name, priority, self.started)
+        self.started += 1
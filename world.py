@@ -0,0 +1,81 @@
+import pygame
+
+# 横向卷轴世界
+# 关卡按固定宽度切分成区块（chunk），只有摄像机附近的区块被加载：
+# 区块里的平台和实体在加载时生成、卸载时移除，所以每帧的模拟和绘制开销
+# 只取决于视野附近的内容，而与关卡总长度无关
+
+# 关卡布局：平台和各类生成点的记录（世界坐标），按所在区块分组保存
+# 每条记录是一个元组，前两项为 x、y；一条记录属于它左端所在的区块
+class LevelLayout:
+    KINDS = ('platforms', 'enemies', 'coins', 'megapixels')
+
+    def __init__(self, width, height, chunk_width):
+        self.width = width
+        self.height = height
+        self.chunk_width = chunk_width
+        self.chunk_count = max(1, -(-width // chunk_width))
+        self.chunks = [{kind: [] for kind in self.KINDS} for _ in range(self.chunk_count)]
+
+    @property
+    def bounds(self):
+        return pygame.Rect(0, 0, self.width, self.height)
+
+    def chunk_of(self, x):
+        return min(max(int(x) // self.chunk_width, 0), self.chunk_count - 1)
+
+    def add(self, kind, record):
+        self.chunks[self.chunk_of(record[0])][kind].append(tuple(record))
+
+    # 某个区块的全部记录：种类 -> [记录]
+    def chunk(self, index):
+        return self.chunks[index]
+
+# 某类记录在所有区块中的全部记录（LevelLayout 和关卡文件都适用）
+def all_records(layout, kind):
+    records = []
+    for index in range(layout.chunk_count):
+        records.extend(layout.chunk(index)[kind])
+    return records
+
+# 摄像机：视野跟随目标，并限制在世界范围内
+class Camera:
+    def __init__(self, width, height, bounds):
+        self.view = pygame.Rect(0, 0, width, height)
+        self.bounds = pygame.Rect(bounds)
+
+    # 世界坐标 -> 屏幕坐标的偏移
+    @property
+    def offset(self):
+        return (-self.view.x, -self.view.y)
+
+    # 让目标位于视野中央，返回视野是否移动
+    def follow(self, rect):
+        last = self.view.topleft
+        self.view.center = rect.center
+        self.view.clamp_ip(self.bounds)
+        return self.view.topleft != last
+
+# 区块加载管理：视野两侧各保留 radius 个区块；
+# 已加载的区块要离开视野 radius + 1 个区块以上才卸载，避免在边界来回加载
+class ChunkedWorld:
+    def __init__(self, chunk_width, chunk_count, radius=1):
+        self.chunk_width = chunk_width
+        self.chunk_count = chunk_count
+        self.radius = radius
+        self.loaded = set()
+
+    # 与视野距离不超过 margin 个区块的区块下标范围
+    def chunk_range(self, view, margin):
+        first = max(0, view.left // self.chunk_width - margin)
+        last = min(self.chunk_count - 1, (view.right - 1) // self.chunk_width + margin)
+        return range(first, last + 1)
+
+    # 根据视野更新已加载的区块，返回 (需要加载的区块, 需要卸载的区块)
+    def update(self, view):
+        wanted = set(self.chunk_range(view, self.radius))
+        keep = set(self.chunk_range(view, self.radius + 1))
+        load = sorted(wanted - self.loaded)
+        unload = sorted(self.loaded - keep)
+        self.loaded = (self.loaded - set(unload)) | set(load)
+        return load, unload